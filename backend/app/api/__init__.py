@@ -1,5 +1,7 @@
 from .sessions import router as sessions_router
 from .chat import router as chat_router
 from .health import router as health_router
+from .jobs import router as jobs_router
+from .search import router as search_router
 
-__all__ = ["sessions_router", "chat_router", "health_router"]
\ No newline at end of file
+__all__ = ["sessions_router", "chat_router", "health_router", "jobs_router", "search_router"]
\ No newline at end of file
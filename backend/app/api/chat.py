@@ -1,16 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_
 from sqlmodel import Session as SQLSession, select
 from sse_starlette.sse import EventSourceResponse
-from pydantic import BaseModel
-from typing import AsyncGenerator
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import AsyncGenerator, AsyncIterator, List, Dict, Any, Optional
+import anyio
+import asyncio
 import logging
-import json
+import time
 
 from ..database import get_session
 from ..models import Session, Message
 from ..services import LLMService
+from ..services.llm_service import count_tokens, message_token_count
 from ..config import settings
+from .. import json_utils, metrics
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -19,62 +26,273 @@ logger = logging.getLogger(__name__)
 class ChatRequest(BaseModel):
     session_id: str
     text: str
+    # Per-request overrides of the SSE coalescing settings; 0 ms disables.
+    coalesce_ms: Optional[float] = Field(default=None, ge=0, le=1000)
+    coalesce_bytes: Optional[int] = Field(default=None, ge=1)
 
 
-async def generate_sse_events(
-    session_id: str,
-    user_message: str,
-    db: SQLSession
+async def coalesce_chunks(
+    chunks: AsyncIterator[str],
+    window_ms: float,
+    max_bytes: int
 ) -> AsyncGenerator[str, None]:
+    # Joins deltas that arrive within window_ms of the first one in a batch
+    # (or until max_bytes characters are buffered) into one chunk. The first
+    # delta always goes straight out so time-to-first-token is unchanged.
+    iterator = chunks.__aiter__()
+    pending: Optional[asyncio.Future] = None
     try:
-        session = db.get(Session, session_id)
-        if not session:
-            yield json.dumps({"error": "Session not found"})
+        if window_ms <= 0:
+            async for chunk in iterator:
+                yield chunk
             return
         
-        user_msg = Message(
-            session_id=session_id,
-            role="user",
-            content=user_message
-        )
-        db.add(user_msg)
-        db.commit()
+        try:
+            yield await iterator.__anext__()
+        except StopAsyncIteration:
+            return
         
-        if not session.title:
-            session.title = user_message[:77] + "..." if len(user_message) > 80 else user_message
-            db.commit()
+        loop = asyncio.get_running_loop()
+        window = window_ms / 1000
+        # The pending read is kept across batches: cancelling it on a timeout
+        # would abort the upstream stream.
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            try:
+                chunk = await pending
+            except StopAsyncIteration:
+                return
+            pending = None
+            
+            buffer = [chunk]
+            size = len(chunk)
+            deadline = loop.time() + window
+            finished = False
+            
+            while size < max_bytes:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                pending = asyncio.ensure_future(iterator.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    break
+                task, pending = pending, None
+                try:
+                    chunk = task.result()
+                except StopAsyncIteration:
+                    finished = True
+                    break
+                buffer.append(chunk)
+                size += len(chunk)
+            
+            yield "".join(buffer)
+            if finished:
+                return
+    finally:
+        # Closing the source as well means a consumer that stops early (a
+        # client disconnect) also closes the upstream response. Shielded so
+        # the cleanup still runs inside a cancelled task.
+        with anyio.CancelScope(shield=True):
+            if pending is not None:
+                pending.cancel()
+                await asyncio.wait({pending})
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+def load_context_messages(
+    db: SQLSession,
+    session_id: str,
+    max_tokens: int,
+    batch_size: int = 50
+) -> List[Dict[str, Any]]:
+    # Fetch newest-first in small batches so the cost tracks the context
+    # window, not the length of the session. Batches continue from the last
+    # (created_at, id) seen, like pagination cursors, so tied timestamps and
+    # messages committed in between can't skip or repeat a row.
+    context = []
+    total_tokens = 0
+    last: Optional[Message] = None
+    
+    while True:
+        statement = select(Message).where(Message.session_id == session_id)
+        if last is not None:
+            statement = statement.where(or_(
+                Message.created_at < last.created_at,
+                and_(Message.created_at == last.created_at, Message.id < last.id)
+            ))
+        statement = statement.order_by(Message.created_at.desc(), Message.id.desc()).limit(batch_size)
         
-        statement = select(Message).where(
-            Message.session_id == session_id
-        ).order_by(Message.created_at)
+        batch = db.exec(statement).all()
         
-        messages = db.exec(statement).all()
+        for msg in batch:
+            message = {"role": msg.role, "content": msg.content, "token_count": msg.token_count}
+            msg_tokens = message_token_count(message)
+            if total_tokens + msg_tokens > max_tokens:
+                context.reverse()
+                return context
+            total_tokens += msg_tokens
+            message["token_count"] = msg_tokens
+            context.append(message)
         
-        message_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
+        if len(batch) < batch_size:
+            context.reverse()
+            return context
+        last = batch[-1]
+
+
+def start_chat_turn(
+    db: SQLSession,
+    session_id: str,
+    user_message: str
+) -> Optional[List[Dict[str, Any]]]:
+    session = db.get(Session, session_id)
+    if not session:
+        return None
+    
+    user_msg = Message(
+        session_id=session_id,
+        role="user",
+        content=user_message,
+        token_count=count_tokens(user_message)
+    )
+    db.add(user_msg)
+    
+    if not session.title:
+        session.title = user_message[:77] + "..." if len(user_message) > 80 else user_message
+    
+    message_history = load_context_messages(
+        db,
+        session_id,
+        settings.max_context_tokens,
+        settings.context_fetch_batch_size
+    )
+    
+    # Committing last ends the transaction, so the pooled connection is not
+    # held for the whole LLM response.
+    db.commit()
+    
+    return message_history
+
+
+def save_assistant_message(
+    db: SQLSession,
+    session_id: str,
+    content: str,
+    message_id: Optional[str] = None,
+    partial: bool = False,
+    truncated: bool = False
+) -> str:
+    # Partial saves are checkpoints of a reply still streaming, so a dropped
+    # stream doesn't lose it; later saves update the same row. Tokens are
+    # counted once the reply is complete. Truncated replies are final but
+    # were cut short by the client going away.
+    assistant_msg = db.get(Message, message_id) if message_id else None
+    if assistant_msg is None:
+        assistant_msg = Message(session_id=session_id, role="assistant", content=content)
+        db.add(assistant_msg)
+    assistant_msg.content = content
+    assistant_msg.token_count = None if partial else count_tokens(content)
+    assistant_msg.truncated = truncated
+    message_id = assistant_msg.id
+    db.commit()
+    return message_id
+
+
+async def generate_sse_events(
+    session_id: str,
+    user_message: str,
+    db: SQLSession,
+    coalesce_ms: float = 0.0,
+    coalesce_bytes: int = 4096,
+    checkpoint_interval: float = 0.0
+) -> AsyncGenerator[str, None]:
+    # Collected and joined once rather than concatenated per delta.
+    parts: List[str] = []
+    message_id: Optional[str] = None
+    completed = False
+    started = time.perf_counter()
+    metrics.CHAT_ACTIVE_STREAMS.inc()
+    
+    try:
+        # Database work runs in the threadpool so a slow commit on one
+        # stream does not stall every other stream on the event loop.
+        with metrics.CHAT_STAGE_SECONDS.time(stage="history"):
+            message_history = await run_in_threadpool(
+                start_chat_turn, db, session_id, user_message
+            )
+        if message_history is None:
+            yield json_utils.dumps({"error": "Session not found"})
+            return
         
-        full_response = ""
+        loop = asyncio.get_running_loop()
+        last_checkpoint = loop.time()
         
+        stream_started = time.perf_counter()
         async with LLMService() as llm_service:
-            async for chunk in llm_service.stream_chat_completion(message_history):
-                full_response += chunk
-                yield json.dumps({"data": chunk})
+            chunks = coalesce_chunks(
+                llm_service.stream_chat_completion(message_history),
+                coalesce_ms,
+                coalesce_bytes
+            )
+            try:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    if len(parts) == 1:
+                        # As the client sees it: from the request to the first delta.
+                        metrics.CHAT_STAGE_SECONDS.observe(time.perf_counter() - started, stage="first_token")
+                    yield json_utils.dumps({"data": chunk})
+                    
+                    if checkpoint_interval > 0 and loop.time() - last_checkpoint >= checkpoint_interval:
+                        message_id = await run_in_threadpool(
+                            save_assistant_message, db, session_id, "".join(parts), message_id, True
+                        )
+                        last_checkpoint = loop.time()
+            finally:
+                # Stops the upstream request as soon as we stop reading, so a
+                # reply nobody will see isn't generated (and billed) to the end.
+                with anyio.CancelScope(shield=True):
+                    await chunks.aclose()
+        metrics.CHAT_STAGE_SECONDS.observe(time.perf_counter() - stream_started, stage="stream")
         
-        assistant_msg = Message(
-            session_id=session_id,
-            role="assistant",
-            content=full_response
-        )
-        db.add(assistant_msg)
-        db.commit()
+        with metrics.CHAT_STAGE_SECONDS.time(stage="persist"):
+            await run_in_threadpool(save_assistant_message, db, session_id, "".join(parts), message_id)
+        completed = True
+        metrics.CHAT_STREAMS.inc(outcome="completed")
         
-        yield json.dumps({"event": "end", "data": "done"})
+        yield json_utils.dumps({"event": "end", "data": "done"})
         
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client disconnected: cancellation arrives while waiting on the
+        # upstream, GeneratorExit when the response closes us at a yield.
+        if parts and not completed:
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(
+                    save_assistant_message, db, session_id, "".join(parts), message_id, False, True
+                )
+            logger.info(f"Client disconnected from session {session_id}; saved truncated reply")
+        if not completed:
+            metrics.CHAT_STREAMS.inc(outcome="disconnected")
+        raise
     except Exception as e:
+        metrics.CHAT_STREAMS.inc(outcome="error")
         logger.error(f"Error in chat streaming: {e}")
-        yield json.dumps({"error": str(e)})
+        # Whatever arrived is kept, marked as cut short, whether or not a
+        # checkpoint had saved part of it.
+        if parts and not completed:
+            try:
+                with anyio.CancelScope(shield=True):
+                    await run_in_threadpool(
+                        save_assistant_message, db, session_id, "".join(parts), message_id, False, True
+                    )
+            except Exception as save_error:
+                logger.error(f"Could not save truncated reply for session {session_id}: {save_error}")
+        yield json_utils.dumps({"error": str(e)})
+    finally:
+        metrics.CHAT_ACTIVE_STREAMS.dec()
 
 
 @router.post("/chat")
@@ -82,12 +300,25 @@ async def chat_stream(
     request: ChatRequest,
     db: SQLSession = Depends(get_session)
 ):
+    events = generate_sse_events(
+        request.session_id,
+        request.text,
+        db,
+        settings.sse_coalesce_ms if request.coalesce_ms is None else request.coalesce_ms,
+        request.coalesce_bytes or settings.sse_coalesce_max_bytes,
+        settings.chat_checkpoint_interval
+    )
+    
     async def event_generator():
-        async for event in generate_sse_events(
-            request.session_id,
-            request.text,
-            db
-        ):
-            yield f"data: {event}\n\n"
+        try:
+            async for event in events:
+                yield f"data: {event}\n\n"
+        finally:
+            with anyio.CancelScope(shield=True):
+                await events.aclose()
     
-    return EventSourceResponse(event_generator())
\ No newline at end of file
+    body = event_generator()
+    # On a disconnect sse-starlette stops iterating the body but leaves it
+    # suspended; closing it here ends the upstream stream right away instead
+    # of whenever the generator is garbage collected.
+    return EventSourceResponse(body, background=BackgroundTask(body.aclose))
\ No newline at end of file
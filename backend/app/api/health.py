@@ -1,8 +1,31 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.llm_service import get_pool_stats
+from ..services.response_cache import get_cache_stats
+from .. import metrics
 
 router = APIRouter()
 
 
 @router.get("/healthz")
 async def health_check():
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+
+@router.get("/healthz/llm-pool")
+async def llm_pool_stats():
+    return get_pool_stats()
+
+
+@router.get("/healthz/llm-cache")
+async def llm_cache_stats():
+    return get_cache_stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
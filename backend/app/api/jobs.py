@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session as SQLSession
+from sse_starlette.sse import EventSourceResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from ..database import get_session
+from ..models import Session as SessionModel
+from ..services.job_queue import JobQueue, get_job_queue
+from ..config import settings
+
+router = APIRouter(prefix="/jobs")
+
+
+class JobRequest(BaseModel):
+    session_id: str
+    kind: Literal["summarize", "notion"] = "summarize"
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    session_id: str
+    status: str
+    progress_done: int
+    progress_total: int
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+def require_job_queue() -> JobQueue:
+    job_queue = get_job_queue()
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running")
+    return job_queue
+
+
+@router.post("", status_code=202)
+async def create_job(
+    request: JobRequest,
+    db: SQLSession = Depends(get_session),
+    job_queue: JobQueue = Depends(require_job_queue)
+):
+    if request.kind == "notion" and (not settings.notion_api_key or not settings.notion_parent_page_id):
+        raise HTTPException(
+            status_code=400,
+            detail="Notion API key or parent page ID not configured"
+        )
+    
+    session = await run_in_threadpool(db.get, SessionModel, request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    job = await job_queue.enqueue(request.kind, request.session_id)
+    
+    return JobResponse(**job)
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    job_queue: JobQueue = Depends(require_job_queue)
+):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobResponse(**job)
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    job_queue: JobQueue = Depends(require_job_queue)
+):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_generator():
+        async for state in job_queue.events(job_id):
+            yield JobResponse(**state).model_dump_json()
+    
+    return EventSourceResponse(event_generator())
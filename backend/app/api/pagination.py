@@ -0,0 +1,89 @@
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlmodel import Session as SQLSession
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+import base64
+
+from ..config import settings
+
+
+# Cursors are opaque to clients: the (created_at, id) of a row, which
+# orders rows totally even when timestamps collide.
+
+
+def encode_cursor(row: Any) -> str:
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return settings.page_size
+    return min(limit, settings.max_page_size)
+
+
+def keyset_page(
+    db: SQLSession,
+    statement: Any,
+    model: Any,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    newest_first: bool = True
+) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    # Returns one page of rows (in display order) plus the cursors for the
+    # neighbouring pages: pass the first as `before` for older rows and the
+    # second as `after` for newer ones. None means there is nothing there.
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    
+    cursor = before or after
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if after:
+            statement = statement.where(or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > row_id)
+            ))
+        else:
+            statement = statement.where(or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id)
+            ))
+    
+    # Read from the cursor outwards, one row past the page to learn whether
+    # another page follows.
+    if after:
+        statement = statement.order_by(model.created_at, model.id)
+    else:
+        statement = statement.order_by(model.created_at.desc(), model.id.desc())
+    rows = list(db.exec(statement.limit(limit + 1)).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    if not rows:
+        return [], None, None
+    
+    if after:
+        oldest, newest = rows[0], rows[-1]
+        older = encode_cursor(oldest)
+        newer = encode_cursor(newest) if has_more else None
+    else:
+        oldest, newest = rows[-1], rows[0]
+        older = encode_cursor(oldest) if has_more else None
+        newer = encode_cursor(newest) if before else None
+    
+    if newest_first == bool(after):
+        rows.reverse()
+    
+    return rows, older, newer
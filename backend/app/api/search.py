@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session as SQLSession
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+import logging
+
+from ..database import get_session
+from ..search import search_available, search_messages
+from .pagination import page_limit
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class SearchResult(BaseModel):
+    message_id: str
+    session_id: str
+    session_title: Optional[str]
+    role: str
+    created_at: datetime
+    # Matched terms are wrapped in <mark>...</mark>; the rest is plain text.
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int]
+
+
+@router.get("/search", response_model=SearchResponse)
+def search(
+    q: str = Query(..., min_length=1),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    session_id: Optional[str] = None,
+    db: SQLSession = Depends(get_session)
+):
+    if not search_available(db.get_bind()):
+        raise HTTPException(status_code=501, detail="Search requires a SQLite database")
+    
+    # Ranked results don't have a stable keyset, so pages are by offset.
+    limit = page_limit(limit)
+    try:
+        rows = search_messages(db, q, limit + 1, offset, session_id)
+    except OperationalError as e:
+        logger.error(f"Search failed: {e}")
+        raise HTTPException(status_code=503, detail="Search index unavailable")
+    
+    return SearchResponse(
+        results=[
+            SearchResult(
+                message_id=row["id"],
+                session_id=row["session_id"],
+                session_title=row["title"],
+                role=row["role"],
+                created_at=row["created_at"],
+                snippet=row["snippet"],
+                score=row["score"]
+            ) for row in rows[:limit]
+        ],
+        next_offset=offset + limit if len(rows) > limit else None
+    )
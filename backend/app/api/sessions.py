@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session as SQLSession, select
-from typing import List, Dict, Any
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session as SQLSession, select, delete
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
 import uuid
 
 from ..database import get_session
-from ..models import Session as SessionModel, Message, Summary
-from ..services import SummarizerService, NotionWriter
+from .pagination import keyset_page, page_limit
+from ..models import Session as SessionModel, Message, Summary, SummaryChunk, Job
+from ..services import SummarizationError
+from ..services.session_summary import refresh_summary, export_to_notion
 from ..config import settings
 from pydantic import BaseModel
 
@@ -24,6 +27,7 @@ class MessageResponse(BaseModel):
     role: str
     content: str
     created_at: datetime
+    truncated: bool = False
 
 
 class SummaryRequest(BaseModel):
@@ -33,17 +37,34 @@ class SummaryRequest(BaseModel):
 class SummaryResponse(BaseModel):
     title: str
     markdown: str
+    # Chunks that failed to summarize are left out and retried next time.
+    partial: bool = False
+    failed_chunks: List[int] = []
 
 
 class NotionResponse(BaseModel):
     page_id: str
     url: str
+    partial: bool = False
+    failed_chunks: List[int] = []
+
+
+class BulkDeleteRequest(BaseModel):
+    session_ids: Optional[List[str]] = None
+    older_than: Optional[datetime] = None
 
 
 @router.get("")
-async def list_sessions(db: SQLSession = Depends(get_session)):
-    statement = select(SessionModel).order_by(SessionModel.created_at.desc())
-    sessions = db.exec(statement).all()
+def list_sessions(
+    limit: Optional[int] = Query(None, ge=1),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: SQLSession = Depends(get_session)
+):
+    # Newest first; pass older_cursor back as `before` to load the next page.
+    sessions, older, newer = keyset_page(
+        db, select(SessionModel), SessionModel, page_limit(limit), before, after
+    )
     
     return {
         "sessions": [
@@ -52,12 +73,14 @@ async def list_sessions(db: SQLSession = Depends(get_session)):
                 title=session.title or "New Chat",
                 created_at=session.created_at
             ) for session in sessions
-        ]
+        ],
+        "older_cursor": older,
+        "newer_cursor": newer
     }
 
 
 @router.post("")
-async def create_session(db: SQLSession = Depends(get_session)):
+def create_session(db: SQLSession = Depends(get_session)):
     session = SessionModel()
     db.add(session)
     db.commit()
@@ -67,19 +90,23 @@ async def create_session(db: SQLSession = Depends(get_session)):
 
 
 @router.get("/{session_id}/messages")
-async def get_messages(
+def get_messages(
     session_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     db: SQLSession = Depends(get_session)
 ):
     session = db.get(SessionModel, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    statement = select(Message).where(
-        Message.session_id == session_id
-    ).order_by(Message.created_at)
-    
-    messages = db.exec(statement).all()
+    # Without a cursor this is the latest page; either way messages come
+    # oldest first, and older_cursor loads the history above them.
+    statement = select(Message).where(Message.session_id == session_id)
+    messages, older, newer = keyset_page(
+        db, statement, Message, page_limit(limit), before, after, newest_first=False
+    )
     
     return {
         "messages": [
@@ -87,58 +114,36 @@ async def get_messages(
                 id=msg.id,
                 role=msg.role,
                 content=msg.content,
-                created_at=msg.created_at
+                created_at=msg.created_at,
+                truncated=msg.truncated
             ) for msg in messages
-        ]
+        ],
+        "older_cursor": older,
+        "newer_cursor": newer
     }
 
 
+# Async routes below await the LLM/Notion, so their blocking database calls
+# are pushed to the threadpool; purely synchronous routes are plain `def`
+# and run there already.
 @router.post("/{session_id}/summarize")
 async def summarize_session(
     session_id: str,
     db: SQLSession = Depends(get_session)
 ):
-    session = db.get(SessionModel, session_id)
+    session = await run_in_threadpool(db.get, SessionModel, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    existing_summary = db.get(Summary, session_id)
-    if existing_summary:
-        return SummaryResponse(
-            title=existing_summary.title,
-            markdown=existing_summary.markdown
-        )
-    
-    statement = select(Message).where(
-        Message.session_id == session_id
-    ).order_by(Message.created_at)
-    
-    messages = db.exec(statement).all()
+    try:
+        summary = await refresh_summary(db, session_id)
+    except SummarizationError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to summarize session: {str(e)}")
     
-    if not messages:
+    if summary is None:
         raise HTTPException(status_code=400, detail="No messages to summarize")
     
-    message_dicts = [
-        {"role": msg.role, "content": msg.content}
-        for msg in messages
-    ]
-    
-    async with SummarizerService() as summarizer:
-        title, markdown = await summarizer.summarize_session(message_dicts)
-    
-    summary = Summary(
-        session_id=session_id,
-        title=title,
-        markdown=markdown
-    )
-    db.add(summary)
-    
-    if not session.title:
-        session.title = title
-    
-    db.commit()
-    
-    return SummaryResponse(title=title, markdown=markdown)
+    return SummaryResponse(**summary)
 
 
 @router.post("/{session_id}/notion")
@@ -152,56 +157,31 @@ async def save_to_notion(
             detail="Notion API key or parent page ID not configured"
         )
     
-    session = db.get(SessionModel, session_id)
+    session = await run_in_threadpool(db.get, SessionModel, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    summary = db.get(Summary, session_id)
-    
-    if not summary:
-        statement = select(Message).where(
-            Message.session_id == session_id
-        ).order_by(Message.created_at)
-        
-        messages = db.exec(statement).all()
-        
-        if not messages:
-            raise HTTPException(status_code=400, detail="No messages to save")
-        
-        message_dicts = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-        
-        async with SummarizerService() as summarizer:
-            title, markdown = await summarizer.summarize_session(message_dicts)
-        
-        summary = Summary(
-            session_id=session_id,
-            title=title,
-            markdown=markdown
-        )
-        db.add(summary)
-        
-        if not session.title:
-            session.title = title
-        
-        db.commit()
+    try:
+        summary = await refresh_summary(db, session_id)
+    except SummarizationError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to summarize session: {str(e)}")
     
-    notion_writer = NotionWriter(
-        settings.notion_api_key,
-        settings.notion_parent_page_id
-    )
+    if summary is None:
+        raise HTTPException(status_code=400, detail="No messages to save")
     
     try:
-        result = await notion_writer.create_notion_page(
-            summary.title,
-            summary.markdown
+        result = await export_to_notion(
+            db,
+            session_id,
+            summary["title"],
+            summary["markdown"]
         )
         
         return NotionResponse(
             page_id=result["page_id"],
-            url=result["url"]
+            url=result["url"],
+            partial=summary["partial"],
+            failed_chunks=summary["failed_chunks"]
         )
     except Exception as e:
         raise HTTPException(
@@ -211,7 +191,7 @@ async def save_to_notion(
 
 
 @router.get("/{session_id}")
-async def get_session_by_id(
+def get_session_by_id(
     session_id: str,
     db: SQLSession = Depends(get_session)
 ):
@@ -226,8 +206,44 @@ async def get_session_by_id(
     )
 
 
+def delete_session_rows(db: SQLSession, session_ids: Any) -> int:
+    # Set-based deletes, children before parents (SQLite doesn't enforce the
+    # foreign keys, so nothing cascades). session_ids may be a list or a
+    # subquery selecting session ids.
+    for model in (Message, SummaryChunk, Summary, Job):
+        db.exec(delete(model).where(model.session_id.in_(session_ids)))
+    result = db.exec(delete(SessionModel).where(SessionModel.id.in_(session_ids)))
+    return result.rowcount
+
+
+@router.post("/bulk-delete")
+def bulk_delete_sessions(
+    request: BulkDeleteRequest,
+    db: SQLSession = Depends(get_session)
+):
+    if (request.session_ids is None) == (request.older_than is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide either session_ids or older_than"
+        )
+    
+    if request.session_ids is not None:
+        session_ids: Any = request.session_ids
+    else:
+        # created_at is stored as naive UTC.
+        older_than = request.older_than
+        if older_than.tzinfo is not None:
+            older_than = older_than.astimezone(timezone.utc).replace(tzinfo=None)
+        session_ids = select(SessionModel.id).where(SessionModel.created_at < older_than)
+    
+    deleted = delete_session_rows(db, session_ids)
+    db.commit()
+    
+    return {"deleted": deleted}
+
+
 @router.delete("/{session_id}")
-async def delete_session(
+def delete_session(
     session_id: str,
     db: SQLSession = Depends(get_session)
 ):
@@ -235,19 +251,7 @@ async def delete_session(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Delete related messages
-    statement = select(Message).where(Message.session_id == session_id)
-    messages = db.exec(statement).all()
-    for message in messages:
-        db.delete(message)
-    
-    # Delete related summary if exists
-    summary = db.get(Summary, session_id)
-    if summary:
-        db.delete(summary)
-    
-    # Delete the session
-    db.delete(session)
+    delete_session_rows(db, [session_id])
     db.commit()
     
-    return {"message": "Session deleted successfully"}
\ No newline at end of file
+    return {"message": "Session deleted successfully"}
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from pathlib import Path
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -9,11 +10,56 @@ class Settings(BaseSettings):
     chat_top_p: float = 1.0
     summary_temperature: float = 0.3
     summary_top_p: float = 1.0
+    summary_concurrency: int = 4
+    summary_max_retries: int = 2
+    summary_retry_backoff: float = 1.0
+    summary_reduce_budget: int = 6000
+    job_concurrency: int = 2
     litellm_url: str = "http://localhost:4000/v1/chat/completions"
     database_url: str = "sqlite:///./app.db"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    sqlite_tuning_enabled: bool = True
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size: int = -65536
+    sqlite_mmap_size: int = 268435456
+    sqlite_temp_store: str = "MEMORY"
     notion_api_key: Optional[str] = None
     notion_parent_page_id: Optional[str] = None
+    notion_base_url: Optional[str] = None
+    notion_requests_per_second: float = 3.0
+    notion_burst: int = 3
+    notion_max_retries: int = 3
+    notion_retry_backoff: float = 1.0
+    page_size: int = 50
+    max_page_size: int = 200
+    search_max_candidates: int = 2000
+    json_backend: Literal["auto", "orjson", "json"] = "auto"
+    sse_coalesce_ms: float = 0.0
+    sse_coalesce_max_bytes: int = 4096
+    chat_checkpoint_interval: float = 0.0
     max_context_tokens: int = 5000
+    tokenizer_encoding: str = "cl100k_base"
+    # tiktoken reads BPE files from here (named by the sha1 of their
+    # download URL) before trying to download them; the default holds a
+    # copy of cl100k_base so token counting works offline. It is exported
+    # as TIKTOKEN_CACHE_DIR only if that isn't already in the environment
+    # (where it also overrides this setting).
+    tiktoken_cache_dir: str = str(Path(__file__).parent / "data" / "tiktoken")
+    context_fetch_batch_size: int = 50
+    llm_timeout: float = 60.0
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry: float = 30.0
+    llm_http2: bool = False
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./llm_cache.db"
+    llm_cache_ttl: float = 604800.0
+    llm_cache_max_bytes: int = 67108864
+    llm_cache_sweep_interval: float = 300.0
     
     class Config:
         env_file = ".env"
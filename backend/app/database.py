@@ -1,16 +1,155 @@
-from sqlmodel import create_engine, SQLModel, Session as SQLSession
+from sqlalchemy import bindparam, event, inspect, text, update
+from sqlalchemy.engine import Engine
+from sqlmodel import create_engine, SQLModel, Session as SQLSession, select
+from typing import Optional
 from .config import settings
+from .search import ensure_search_index
+from . import metrics
+import logging
+import threading
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
+logger = logging.getLogger(__name__)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # Applied on every new pooled connection: most pragmas are per-connection,
+    # and WAL lets readers proceed while a chat turn is being written.
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA temp_store={settings.sqlite_temp_store}")
+    cursor.close()
+
+
+def create_db_engine(database_url: str) -> Engine:
+    is_sqlite = database_url.startswith("sqlite")
+    in_memory = is_sqlite and (database_url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in database_url)
+    
+    kwargs = {}
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not in_memory:
+        kwargs["pool_size"] = settings.db_pool_size
+        kwargs["max_overflow"] = settings.db_max_overflow
+        kwargs["pool_timeout"] = settings.db_pool_timeout
+    
+    db_engine = create_engine(database_url, **kwargs)
+    
+    if is_sqlite and not in_memory and settings.sqlite_tuning_enabled:
+        event.listen(db_engine, "connect", apply_sqlite_pragmas)
+    
+    return db_engine
+
+
+engine = create_db_engine(settings.database_url)
+
+
+def _pool_connections() -> dict:
+    # Only QueuePool reports sizes; in-memory databases use a static pool.
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        ("checked_out",): pool.checkedout(),
+        ("idle",): pool.checkedin(),
+        ("overflow",): max(0, pool.overflow()),
+    }
+
+
+metrics.gauge(
+    "db_pool_connections",
+    "Database connection pool: checked out, idle and overflow connections",
+    ["state"],
+    collect=_pool_connections
 )
 
+# Columns added after the initial schema. create_all() never alters existing
+# tables, so these are applied to older databases on startup.
+_ADDED_COLUMNS = {
+    "message": {
+        "token_count": "INTEGER",
+        "truncated": "BOOLEAN NOT NULL DEFAULT 0",
+    },
+    "summary": {
+        "message_count": "INTEGER",
+        "last_message_id": "VARCHAR",
+        "notion_page_id": "VARCHAR",
+        "notion_url": "VARCHAR",
+        "notion_blocks": "TEXT",
+    },
+}
+
+
+def run_migrations(bind=engine):
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table, columns in _ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspector.get_columns(table)}
+            for name, ddl in columns.items():
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                    logger.info(f"Added column {table}.{name}")
+        
+        # Likewise, indexes declared on models after a table was created.
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    run_migrations()
+    ensure_search_index(engine)
+
+
+def backfill_token_counts(
+    bind=engine,
+    batch_size: int = 500,
+    stop: Optional[threading.Event] = None
+) -> int:
+    # Counts tokens for messages stored before token_count existed. Walks
+    # the table once in primary key order, so it stays one pass however many
+    # rows are left; stop (checked between batches) ends it early. Rows
+    # written meanwhile are only filled in if still empty.
+    from .models import Message
+    from .services.llm_service import count_tokens
+    
+    fill = update(Message).where(
+        Message.id == bindparam("message_id"),
+        Message.token_count == None  # noqa: E711
+    ).values(token_count=bindparam("tokens"))
+    
+    # The id-order walk reads rows out of storage order; a plain scan is
+    # far cheaper for the usual case of nothing left to fill.
+    with bind.connect() as conn:
+        missing = conn.execute(
+            select(Message.id).where(Message.token_count == None).limit(1)  # noqa: E711
+        ).first()
+    if missing is None:
+        return 0
+    
+    updated = 0
+    last_id = ""
+    while stop is None or not stop.is_set():
+        with bind.begin() as conn:
+            rows = conn.execute(
+                select(Message.id, Message.content).where(
+                    Message.id > last_id,
+                    Message.token_count == None  # noqa: E711
+                ).order_by(Message.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            conn.execute(fill, [{"message_id": row.id, "tokens": count_tokens(row.content)} for row in rows])
+        updated += len(rows)
+        last_id = rows[-1].id
+    
+    return updated
 
 
 def get_session():
     with SQLSession(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -0,0 +1,46 @@
+from typing import Any, Union
+import json
+
+from .config import settings
+
+# JSON encoding/decoding for the hot streaming paths. orjson is used when
+# installed (JSON_BACKEND=auto) and the stdlib otherwise; both produce
+# compact output and raise ValueError subclasses on bad input. Asking for
+# orjson explicitly when it isn't installed fails at startup.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _select_backend(name: str) -> str:
+    if name == "orjson" and orjson is None:
+        raise RuntimeError("JSON_BACKEND is 'orjson' but orjson is not installed")
+    if name == "auto":
+        return "orjson" if orjson is not None else "json"
+    return name
+
+
+backend = _select_backend(settings.json_backend)
+
+if backend == "orjson":
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+    
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+    
+    def loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    
+    def dumps(obj: Any) -> str:
+        return _encoder.encode(obj)
+    
+    def dumps_bytes(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode()
+    
+    def loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
@@ -1,21 +1,53 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
+import threading
 
-from .database import create_db_and_tables
-from .api import sessions_router, chat_router, health_router
+from .database import engine, create_db_and_tables, backfill_token_counts
+from .api import sessions_router, chat_router, health_router, jobs_router, search_router
+from .services.llm_service import init_http_client, close_http_client, warm_up_encoder
+from .services.response_cache import init_response_cache, close_response_cache
+from .services.job_queue import start_job_queue, stop_job_queue
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+async def backfill_in_background(stop: threading.Event) -> None:
+    # Off the startup path: a message without a count is counted when it's
+    # read, so requests don't need to wait for this.
+    try:
+        backfilled = await run_in_threadpool(backfill_token_counts, engine, 500, stop)
+    except Exception as e:
+        logger.error(f"Token count backfill failed: {e}")
+        return
+    if backfilled:
+        logger.info(f"Backfilled token counts for {backfilled} messages")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
     logger.info("Database tables created")
+    if warm_up_encoder():
+        logger.info("Tokenizer loaded")
+    stop_backfill = threading.Event()
+    backfill = asyncio.create_task(backfill_in_background(stop_backfill))
+    await init_http_client()
+    logger.info("LLM HTTP client pool initialized")
+    if init_response_cache():
+        logger.info("LLM response cache opened")
+    await start_job_queue(engine)
     yield
     logger.info("Shutting down")
+    stop_backfill.set()
+    await backfill
+    await stop_job_queue()
+    await close_http_client()
+    close_response_cache()
 
 
 app = FastAPI(
@@ -35,6 +67,8 @@ app.add_middleware(
 app.include_router(health_router, prefix="/api")
 app.include_router(sessions_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
+app.include_router(jobs_router, prefix="/api")
+app.include_router(search_router, prefix="/api")
 
 
 @app.get("/")
@@ -0,0 +1,272 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Minimal Prometheus instrumentation: counters, gauges and histograms with
+# labels, rendered in the text exposition format by /api/metrics. Metrics
+# are module-level objects so any layer can record without plumbing;
+# updates take a per-metric lock because the threadpool records too.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric(ABC):
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+    
+    def label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        # (name suffix, label names, label values, value) per sample line.
+        ...
+    
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+    
+    def get(self, **labels: str) -> float:
+        return self.values.get(self.label_values(labels), 0.0)
+    
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [("", self.labelnames, key, value) for key, value in items]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        # With collect, values are read from it at scrape time instead of
+        # being set, for state owned elsewhere (pool sizes, cache stats).
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.collect = collect
+    
+    def set(self, value: float, **labels: str) -> None:
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = value
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self.label_values(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+    
+    def get(self, **labels: str) -> float:
+        return self.values.get(self.label_values(labels), 0.0)
+    
+    def samples(self):
+        if self.collect is not None:
+            # A failing collector drops its own samples, not the whole scrape.
+            try:
+                items = sorted(self.collect().items())
+            except Exception as e:
+                logger.warning(f"Collecting {self.name} failed: {e}")
+                items = []
+        else:
+            with self.lock:
+                items = sorted(self.values.items())
+        return [("", self.labelnames, key, value) for key, value in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket (non-cumulative) counts, with the last
+        # slot for +Inf, then the sum.
+        self.values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        key = self.label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def count(self, **labels: str) -> int:
+        entry = self.values.get(self.label_values(labels))
+        return sum(entry[0]) if entry else 0
+    
+    def samples(self):
+        with self.lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self.values.items())
+        
+        samples = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(("_bucket", names, key + (_format_value(bound),), cumulative))
+            samples.append(("_sum", self.labelnames, key, total))
+            samples.append(("_count", self.labelnames, key, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    collect: Optional[Callable[[], Dict[LabelValues, float]]] = None
+) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, collect))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Chat pipeline
+CHAT_STAGE_SECONDS = histogram(
+    "chat_stage_seconds",
+    "Time spent in each stage of a /api/chat turn",
+    ["stage"]
+)
+CHAT_TOKENS_PER_SECOND = histogram(
+    "chat_tokens_per_second",
+    "Streaming rate of completed chat replies, first token to last",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000, 2500)
+)
+CHAT_ACTIVE_STREAMS = gauge("chat_active_streams", "Chat replies currently streaming")
+CHAT_STREAMS = counter("chat_streams_total", "Chat streams by how they ended", ["outcome"])
+
+# Upstream LLM
+LLM_REQUESTS = counter("llm_requests_total", "Requests to the LiteLLM proxy", ["kind", "outcome"])
+LLM_REQUEST_SECONDS = histogram(
+    "llm_request_seconds",
+    "Duration of non-streamed completions, excluding cache hits",
+    buckets=LATENCY_BUCKETS + (120.0,)
+)
+LLM_CACHE_LOOKUPS = counter("llm_cache_lookups_total", "LLM response cache lookups", ["result"])
+LLM_CACHE_SAVED_SECONDS = counter(
+    "llm_cache_saved_seconds_total",
+    "Upstream time avoided by cache hits, from the latency recorded with each entry"
+)
+
+# Summaries
+SUMMARY_CHUNK_SECONDS = histogram(
+    "summary_chunk_seconds",
+    "Time to summarize one chunk, including retries",
+    buckets=LATENCY_BUCKETS + (120.0,)
+)
+SUMMARY_CHUNKS = counter("summary_chunks_total", "Chunks summarized in the map phase", ["outcome"])
+SUMMARY_RETRIES = counter("summary_retries_total", "Retried summary LLM calls")
+
+# Notion
+NOTION_CALLS = counter("notion_api_calls_total", "Notion API calls by endpoint and outcome", ["endpoint", "outcome"])
+NOTION_CALL_SECONDS = histogram("notion_api_seconds", "Notion API call duration, per attempt", ["endpoint"])
+NOTION_RETRIES = counter("notion_api_retries_total", "Retried Notion API calls", ["endpoint"])
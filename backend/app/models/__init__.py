@@ -1,5 +1,7 @@
 from .session import Session
 from .message import Message
 from .summary import Summary
+from .summary_chunk import SummaryChunk
+from .job import Job
 
-__all__ = ["Session", "Message", "Summary"]
\ No newline at end of file
+__all__ = ["Session", "Message", "Summary", "SummaryChunk", "Job"]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+from typing import Optional
+import uuid
+
+
+class Job(SQLModel, table=True):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    kind: str = Field()  # "summarize" or "notion" (summarize, then export)
+    session_id: str = Field(foreign_key="session.id", index=True)
+    status: str = Field(default="pending", index=True)  # pending, running, succeeded, failed
+    progress_done: int = Field(default=0)
+    progress_total: int = Field(default=0)
+    result: Optional[str] = Field(default=None)  # JSON
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from datetime import datetime
 from typing import Optional
@@ -5,10 +6,17 @@ import uuid
 
 
 class Message(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_message_session_id_created_at", "session_id", "created_at"),
+    )
+    
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     session_id: str = Field(foreign_key="session.id", index=True)
     role: str = Field()  # Will be validated to be "user" or "assistant"
     content: str = Field()
+    token_count: Optional[int] = Field(default=None)
+    # Set when the client disconnected before the reply finished streaming.
+    truncated: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     
     def __repr__(self):
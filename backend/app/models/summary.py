@@ -1,11 +1,18 @@
 from sqlmodel import Field, SQLModel
 from datetime import datetime
+from typing import Optional
 
 
 class Summary(SQLModel, table=True):
     session_id: str = Field(foreign_key="session.id", primary_key=True)
     title: str = Field(max_length=80)
     markdown: str = Field()
+    message_count: Optional[int] = Field(default=0)
+    last_message_id: Optional[str] = Field(default=None)
+    notion_page_id: Optional[str] = Field(default=None)
+    notion_url: Optional[str] = Field(default=None)
+    # JSON list of the exported top-level blocks: id, content hash, type.
+    notion_blocks: Optional[str] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     def __repr__(self):
@@ -0,0 +1,17 @@
+from sqlmodel import Field, SQLModel
+from datetime import datetime
+import uuid
+
+
+class SummaryChunk(SQLModel, table=True):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    session_id: str = Field(foreign_key="session.id", index=True)
+    position: int = Field()
+    first_message_id: str = Field()
+    last_message_id: str = Field()
+    message_count: int = Field()
+    summary: str = Field()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<SummaryChunk(session_id={self.session_id}, position={self.position})>"
@@ -0,0 +1,196 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session as SQLSession
+from typing import Any, Dict, List, Optional
+from .config import settings
+import argparse
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Full-text index over message content, kept in sync by triggers. FTS5
+# rows are keyed by message_search_key.id, an INTEGER PRIMARY KEY mapped to
+# message.id: message has no integer key of its own, and its implicit
+# rowids may be renumbered by VACUUM. The index reads content through the
+# message_search_content view, so snippets come from the message table.
+# Short prefixes are indexed too, since every query ends in a prefix term.
+# If it ever looks stale, rebuild it with
+#   python -m app.search --rebuild
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+SNIPPET_TOKENS = 16
+
+_TRIGGER_NAMES = ["message_fts_insert", "message_fts_delete", "message_fts_update"]
+
+_CREATE_TABLES = [
+    "CREATE TABLE IF NOT EXISTS message_search_key ("
+    "id INTEGER PRIMARY KEY, message_id VARCHAR NOT NULL UNIQUE)",
+    "CREATE VIEW IF NOT EXISTS message_search_content AS "
+    "SELECT k.id AS id, m.content AS content "
+    "FROM message_search_key k JOIN message m ON m.id = k.message_id",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5("
+    "content, content='message_search_content', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+]
+
+_KEY = "(SELECT id FROM message_search_key WHERE message_id = {row}.id)"
+
+_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS message_fts_insert AFTER INSERT ON message BEGIN "
+    "INSERT INTO message_search_key(message_id) VALUES (new.id); "
+    f"INSERT INTO message_fts(rowid, content) VALUES ({_KEY.format(row='new')}, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_delete AFTER DELETE ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) "
+    f"VALUES ('delete', {_KEY.format(row='old')}, old.content); "
+    "DELETE FROM message_search_key WHERE message_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS message_fts_update AFTER UPDATE OF content ON message BEGIN "
+    "INSERT INTO message_fts(message_fts, rowid, content) "
+    f"VALUES ('delete', {_KEY.format(row='old')}, old.content); "
+    f"INSERT INTO message_fts(rowid, content) VALUES ({_KEY.format(row='new')}, new.content); END",
+]
+
+# Keys for messages written while the index didn't exist (oldest first, so
+# key order follows message age), and none for messages that are gone.
+_SYNC_KEYS = [
+    "DELETE FROM message_search_key WHERE message_id NOT IN (SELECT id FROM message)",
+    "INSERT INTO message_search_key(message_id) SELECT id FROM message "
+    "WHERE id NOT IN (SELECT message_id FROM message_search_key) ORDER BY created_at",
+]
+
+# Candidates are the newest matches (FTS5 walks rowids in order without
+# scoring everything), capped so a term that appears in half the table
+# doesn't bm25-score and snippet every one of them; only those are ranked.
+_SEARCH = (
+    "WITH hits AS ("
+    "SELECT message_fts.rowid AS rowid, bm25(message_fts) AS score, "
+    "snippet(message_fts, 0, :start, :end, '…', :tokens) AS snippet "
+    "FROM message_fts {session_join}"
+    "WHERE message_fts MATCH :query {session_filter}"
+    "ORDER BY message_fts.rowid DESC LIMIT :candidates) "
+    "SELECT m.id, m.session_id, s.title, m.role, m.created_at, hits.snippet, hits.score "
+    "FROM hits "
+    "JOIN message_search_key k ON k.id = hits.rowid "
+    "JOIN message m ON m.id = k.message_id "
+    "JOIN session s ON s.id = m.session_id "
+    "ORDER BY hits.score, hits.rowid LIMIT :limit OFFSET :offset"
+)
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def search_available(bind: Engine) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def ensure_search_index(bind: Engine) -> bool:
+    # Creates the index and its triggers if missing, backfilling it from
+    # existing messages. Returns False when the database can't host it.
+    if not search_available(bind):
+        logger.info("Full-text search needs SQLite; /api/search is disabled")
+        return False
+    
+    try:
+        with bind.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'message_search_key'"
+            )).first() is not None
+            if not exists:
+                # Also replaces an index keyed on message rowids.
+                for name in _TRIGGER_NAMES:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                conn.execute(text("DROP TABLE IF EXISTS message_fts"))
+            for statement in _CREATE_TABLES + _TRIGGERS:
+                conn.execute(text(statement))
+            if not exists:
+                for statement in _SYNC_KEYS:
+                    conn.execute(text(statement))
+                conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('rebuild')"))
+                logger.info("Built full-text index for existing messages")
+    except OperationalError as e:
+        logger.warning(f"Full-text search unavailable: {e}")
+        return False
+    
+    return True
+
+
+def rebuild_search_index(bind: Engine) -> int:
+    if not ensure_search_index(bind):
+        raise RuntimeError("Full-text search index could not be created")
+    with bind.begin() as conn:
+        for statement in _SYNC_KEYS:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('optimize')"))
+        return conn.execute(text("SELECT COUNT(*) FROM message")).scalar()
+
+
+def build_match_query(query: str) -> Optional[str]:
+    # User input isn't FTS5 syntax: match every word (quoted, so operators
+    # and punctuation are literal), treating the last one as a prefix so
+    # results show up while typing.
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_messages(
+    db: SQLSession,
+    query: str,
+    limit: int,
+    offset: int = 0,
+    session_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    # Best match first (bm25 scores are negative; lower is better). Fetches
+    # limit rows; callers ask for one extra to learn whether more follow.
+    # SEARCH_MAX_CANDIDATES of 0 ranks every match.
+    match = build_match_query(query)
+    if match is None:
+        return []
+    
+    params = {
+        "query": match,
+        "start": SNIPPET_START,
+        "end": SNIPPET_END,
+        "tokens": SNIPPET_TOKENS,
+        "limit": limit,
+        "offset": offset,
+        "candidates": settings.search_max_candidates or -1,
+    }
+    session_join = session_filter = ""
+    if session_id:
+        session_join = (
+            "JOIN message_search_key ON message_search_key.id = message_fts.rowid "
+            "JOIN message ON message.id = message_search_key.message_id "
+        )
+        session_filter = "AND message.session_id = :session_id "
+        params["session_id"] = session_id
+    
+    statement = text(_SEARCH.format(session_join=session_join, session_filter=session_filter))
+    rows = db.connection().execute(statement, params)
+    return [dict(row._mapping) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the full-text message index")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from the message table")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    if args.rebuild:
+        from .database import engine
+        
+        if not search_available(engine):
+            parser.error("Full-text search needs a SQLite database")
+        try:
+            count = rebuild_search_index(engine)
+        except RuntimeError as e:
+            parser.exit(1, f"{e}; see the warning above\n")
+        logger.info(f"Rebuilt full-text index over {count} messages")
+    else:
+        parser.print_help()
@@ -1,5 +1,20 @@
-from .llm_service import LLMService
-from .summarizer import SummarizerService
-from .notion_writer import NotionWriter
+import importlib
 
-__all__ = ["LLMService", "SummarizerService", "NotionWriter"]
\ No newline at end of file
+# Services are imported on first access, so importing one of them (or this
+# package) doesn't load the others and their dependencies.
+_EXPORTS = {
+    "LLMService": ".llm_service",
+    "SummarizerService": ".summarizer",
+    "SummarizationError": ".summarizer",
+    "NotionWriter": ".notion_writer",
+}
+
+__all__ = ["LLMService", "SummarizerService", "SummarizationError", "NotionWriter"]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,209 @@
+from sqlalchemy.engine import Engine
+from sqlmodel import Session as SQLSession, select
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+
+from ..config import settings
+from ..models import Job
+from .session_summary import refresh_summary, export_to_notion
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("summarize", "notion")
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "session_id": job.session_id,
+        "status": job.status,
+        "progress_done": job.progress_done,
+        "progress_total": job.progress_total,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+class JobQueue:
+    # Summarize/export jobs persisted in the database and executed by a
+    # fixed number of in-process workers.
+    def __init__(self, engine: Engine, concurrency: int = 2):
+        self.engine = engine
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.workers: List[asyncio.Task] = []
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # Progress callbacks from concurrent chunks must land in order.
+        self.write_lock = asyncio.Lock()
+    
+    async def start(self) -> None:
+        pending = await run_in_threadpool(self._recover_jobs)
+        for job_id in pending:
+            self.queue.put_nowait(job_id)
+        if pending:
+            logger.info(f"Re-queued {len(pending)} unfinished jobs")
+        
+        self.workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(self.concurrency)
+        ]
+    
+    async def stop(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+    
+    def _recover_jobs(self) -> List[str]:
+        # Jobs that were running when the process stopped start over.
+        with SQLSession(self.engine) as db:
+            statement = select(Job).where(
+                Job.status.in_(["pending", "running"])
+            ).order_by(Job.created_at)
+            jobs = db.exec(statement).all()
+            for job in jobs:
+                job.status = "pending"
+            db.commit()
+            return [job.id for job in jobs]
+    
+    def _create_job(self, kind: str, session_id: str) -> Dict[str, Any]:
+        with SQLSession(self.engine) as db:
+            job = Job(kind=kind, session_id=session_id)
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job_to_dict(job)
+    
+    def _update_job(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        # None if the job is gone (deleting a session deletes its jobs).
+        with SQLSession(self.engine) as db:
+            job = db.get(Job, job_id)
+            if job is None:
+                return None
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            db.refresh(job)
+            return job_to_dict(job)
+    
+    def _get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with SQLSession(self.engine) as db:
+            job = db.get(Job, job_id)
+            return job_to_dict(job) if job else None
+    
+    async def enqueue(self, kind: str, session_id: str) -> Dict[str, Any]:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job = await run_in_threadpool(self._create_job, kind, session_id)
+        self.queue.put_nowait(job["id"])
+        return job
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await run_in_threadpool(self._get_job, job_id)
+    
+    async def events(self, job_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+        # Yields the job's current state, then every update until it finishes.
+        updates: asyncio.Queue = asyncio.Queue()
+        self.subscribers.setdefault(job_id, set()).add(updates)
+        try:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            yield job
+            
+            while job["status"] not in TERMINAL_STATUSES:
+                job = await updates.get()
+                if job is None:
+                    return
+                yield job
+        finally:
+            self.subscribers[job_id].discard(updates)
+            if not self.subscribers[job_id]:
+                del self.subscribers[job_id]
+    
+    async def _publish(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        # None means the job was cancelled; followers are told by a None
+        # update.
+        async with self.write_lock:
+            job = await run_in_threadpool(self._update_job, job_id, **fields)
+        for updates in self.subscribers.get(job_id, ()):
+            updates.put_nowait(job)
+        return job
+    
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                # Nothing may escape here, or the worker is gone for good.
+                try:
+                    await self._publish(job_id, status="failed", error=str(e))
+                except Exception as e:
+                    logger.error(f"Could not record the failure of job {job_id}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    async def _run(self, job_id: str) -> None:
+        job = await self._publish(job_id, status="running", error=None)
+        if job is None:
+            logger.info(f"Job {job_id} was cancelled before it started")
+            return
+        
+        async def on_progress(done: int, total: int) -> None:
+            await self._publish(job_id, progress_done=done, progress_total=total)
+        
+        with SQLSession(self.engine) as db:
+            summary = await refresh_summary(db, job["session_id"], on_progress)
+            
+            if summary is None:
+                raise ValueError("No messages to summarize")
+            
+            result: Dict[str, Any] = dict(summary)
+            
+            if job["kind"] == "notion":
+                page = await export_to_notion(db, job["session_id"], summary["title"], summary["markdown"])
+                result = {
+                    "title": summary["title"],
+                    "page_id": page["page_id"],
+                    "url": page["url"],
+                    "partial": summary["partial"],
+                    "failed_chunks": summary["failed_chunks"],
+                }
+        
+        if await self._publish(job_id, status="succeeded", result=json.dumps(result)) is None:
+            logger.info(f"Job {job_id} was cancelled while running")
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+async def start_job_queue(engine: Engine) -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(engine, settings.job_concurrency)
+        await _job_queue.start()
+    return _job_queue
+
+
+async def stop_job_queue() -> None:
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue = None
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    return _job_queue
@@ -1,47 +1,201 @@
 import httpx
-import json
-from typing import AsyncGenerator, List, Dict, Optional
+from functools import lru_cache
+from json.decoder import scanstring
+from starlette.concurrency import run_in_threadpool
+from typing import TYPE_CHECKING, AsyncGenerator, List, Dict, Optional, Any
 from ..config import settings
-import tiktoken
+from .. import json_utils, metrics
+from .response_cache import cache_key, get_response_cache
 import logging
+import os
+import time
+
+if TYPE_CHECKING:
+    import tiktoken
 
 logger = logging.getLogger(__name__)
 
+# Process-wide client shared by every LLMService; created and closed by the
+# application lifespan so connections to the LiteLLM proxy are reused.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+@lru_cache(maxsize=1)
+def get_encoder() -> "tiktoken.Encoding":
+    # tiktoken is imported on first use rather than with the app. It only
+    # takes its cache location from the environment; a directory already
+    # set there is left for every tiktoken user in the process.
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", settings.tiktoken_cache_dir)
+    import tiktoken
+    
+    return tiktoken.get_encoding(settings.tokenizer_encoding)
+
+
+def warm_up_encoder() -> bool:
+    # Loads the BPE ranks at startup so the first chat turn doesn't wait for
+    # them. A failure is left for that turn to report.
+    try:
+        get_encoder().encode("warm up")
+    except Exception as e:
+        logger.warning(f"Could not load the {settings.tokenizer_encoding} tokenizer: {e}")
+        return False
+    return True
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoder().encode(text))
+
+
+def message_token_count(message: Dict[str, Any]) -> int:
+    token_count = message.get("token_count")
+    if token_count is None:
+        return count_tokens(message["content"])
+    return token_count
+
+
+# Upstream chunks are compact JSON with the delta's content first, e.g.
+#   {"id":...,"choices":[{"index":0,"delta":{"content":"Hi"},...}]}
+# so the text can usually be read straight out of the line.
+_DELTA_CONTENT = '"delta":{"content":"'
+
+
+def parse_delta_content(data: str) -> Optional[str]:
+    # Returns choices[0].delta.content, or None if the chunk carries no text.
+    # Raises ValueError for malformed JSON.
+    start = data.find(_DELTA_CONTENT)
+    if start != -1:
+        try:
+            return scanstring(data, start + len(_DELTA_CONTENT))[0]
+        except ValueError:
+            pass
+    
+    chunk = json_utils.loads(data)
+    choices = chunk.get("choices")
+    if not choices:
+        return None
+    content = (choices[0].get("delta") or {}).get("content")
+    return content if isinstance(content, str) else None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry
+    )
+    
+    http2 = settings.llm_http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("LLM_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+            http2 = False
+    
+    return httpx.AsyncClient(timeout=settings.llm_timeout, limits=limits, http2=http2)
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> Optional[httpx.AsyncClient]:
+    return _http_client
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {
+        "initialized": _http_client is not None,
+        "http2": settings.llm_http2,
+        "max_connections": settings.llm_max_connections,
+        "max_keepalive_connections": settings.llm_max_keepalive_connections,
+        "keepalive_expiry": settings.llm_keepalive_expiry,
+        "connections": 0,
+        "idle_connections": 0,
+        "active_connections": 0,
+        "queued_requests": 0,
+    }
+    
+    # httpx does not expose pool state publicly, so read it from httpcore.
+    pool = getattr(getattr(_http_client, "_transport", None), "_pool", None)
+    if pool is None:
+        return stats
+    
+    connections = list(pool.connections)
+    idle = sum(1 for conn in connections if conn.is_idle())
+    stats["connections"] = len(connections)
+    stats["idle_connections"] = idle
+    stats["active_connections"] = len(connections) - idle
+    stats["queued_requests"] = len(getattr(pool, "_requests", []))
+    return stats
+
+
+def _pool_connections() -> Dict[tuple, float]:
+    stats = get_pool_stats()
+    return {
+        ("active",): stats["active_connections"],
+        ("idle",): stats["idle_connections"],
+        ("queued",): stats["queued_requests"],
+    }
+
+
+metrics.gauge(
+    "llm_pool_connections",
+    "Shared LiteLLM client pool: active and idle connections, queued requests",
+    ["state"],
+    collect=_pool_connections
+)
+
 
 class LLMService:
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=60.0)
-        self.encoder = tiktoken.encoding_for_model("gpt-4")
-        
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        shared_client = client or get_http_client()
+        self._owns_client = shared_client is None
+        self.client = shared_client or create_http_client()
+        self.encoder = get_encoder()
+    
     async def __aenter__(self):
         return self
-        
+    
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
     
     def count_tokens(self, text: str) -> int:
         return len(self.encoder.encode(text))
     
     def trim_messages_to_token_limit(
         self, 
-        messages: List[Dict[str, str]], 
+        messages: List[Dict[str, Any]], 
         max_tokens: int = 5000
-    ) -> List[Dict[str, str]]:
+    ) -> List[Dict[str, Any]]:
+        # Walk back from the newest message using stored token counts where
+        # available, then slice once instead of prepending message by message.
         total_tokens = 0
-        trimmed_messages = []
+        start = len(messages)
         
-        for msg in reversed(messages):
-            msg_tokens = self.count_tokens(msg["content"])
+        for i in range(len(messages) - 1, -1, -1):
+            msg_tokens = message_token_count(messages[i])
             if total_tokens + msg_tokens > max_tokens:
                 break
             total_tokens += msg_tokens
-            trimmed_messages.insert(0, msg)
+            start = i
         
-        return trimmed_messages
+        return messages[start:]
     
     async def stream_chat_completion(
         self, 
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         temperature: Optional[float] = None,
         top_p: Optional[float] = None
     ) -> AsyncGenerator[str, None]:
@@ -50,26 +204,36 @@ class LLMService:
             "Authorization": f"Bearer {settings.openai_api_key}"
         }
         
-        trimmed_messages = self.trim_messages_to_token_limit(
-            messages, 
-            settings.max_context_tokens
-        )
+        with metrics.CHAT_STAGE_SECONDS.time(stage="trim"):
+            trimmed_messages = self.trim_messages_to_token_limit(
+                messages, 
+                settings.max_context_tokens
+            )
         
         payload = {
             "model": settings.model,
-            "messages": trimmed_messages,
+            "messages": [
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in trimmed_messages
+            ],
             "stream": True,
             "temperature": temperature or settings.chat_temperature,
             "top_p": top_p or settings.chat_top_p
         }
         
+        deltas = 0
+        first_delta = None
         try:
+            started = time.perf_counter()
             async with self.client.stream(
                 "POST",
                 settings.litellm_url,
                 headers=headers,
-                json=payload
+                content=json_utils.dumps_bytes(payload)
             ) as response:
+                # Until the response headers arrive: connection setup (or pool
+                # wait) plus the proxy's time to start the completion.
+                metrics.CHAT_STAGE_SECONDS.observe(time.perf_counter() - started, stage="upstream_connect")
                 response.raise_for_status()
                 
                 async for line in response.aiter_lines():
@@ -79,18 +243,28 @@ class LLMService:
                             break
                         
                         try:
-                            chunk = json.loads(data)
-                            if "choices" in chunk and len(chunk["choices"]) > 0:
-                                delta = chunk["choices"][0].get("delta", {})
-                                if "content" in delta:
-                                    yield delta["content"]
-                        except json.JSONDecodeError:
+                            content = parse_delta_content(data)
+                        except ValueError:
                             logger.warning(f"Failed to parse SSE chunk: {data}")
-                            
+                            continue
+                        if content:
+                            deltas += 1
+                            if first_delta is None:
+                                first_delta = time.perf_counter()
+                            yield content
+            
+            metrics.LLM_REQUESTS.inc(kind="stream", outcome="ok")
+            if deltas > 1:
+                elapsed = time.perf_counter() - first_delta
+                if elapsed > 0:
+                    metrics.CHAT_TOKENS_PER_SECOND.observe((deltas - 1) / elapsed)
+        
         except httpx.HTTPStatusError as e:
+            metrics.LLM_REQUESTS.inc(kind="stream", outcome="error")
             logger.error(f"HTTP error during streaming: {e}")
             raise
         except Exception as e:
+            metrics.LLM_REQUESTS.inc(kind="stream", outcome="error")
             logger.error(f"Unexpected error during streaming: {e}")
             raise
     
@@ -98,7 +272,35 @@ class LLMService:
         self,
         messages: List[Dict[str, str]],
         temperature: Optional[float] = None,
-        top_p: Optional[float] = None
+        top_p: Optional[float] = None,
+        cache: bool = False
+    ) -> str:
+        # cache=True is for callers whose prompts are worth reusing verbatim
+        # (summaries); chat replies are never cached.
+        params = {
+            "temperature": temperature or settings.chat_temperature,
+            "top_p": top_p or settings.chat_top_p
+        }
+        response_cache = get_response_cache() if cache else None
+        if response_cache is not None:
+            key = cache_key(settings.model, params, messages)
+            cached = await run_in_threadpool(response_cache.get, key)
+            if cached is not None:
+                return cached
+        
+        started = time.perf_counter()
+        content = await self.request_completion(messages, params)
+        
+        if response_cache is not None:
+            await run_in_threadpool(
+                response_cache.put, key, settings.model, content, time.perf_counter() - started
+            )
+        return content
+    
+    async def request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any]
     ) -> str:
         headers = {
             "Content-Type": "application/json",
@@ -108,24 +310,28 @@ class LLMService:
         payload = {
             "model": settings.model,
             "messages": messages,
-            "temperature": temperature or settings.chat_temperature,
-            "top_p": top_p or settings.chat_top_p
+            **params
         }
         
         try:
-            response = await self.client.post(
-                settings.litellm_url.replace("/chat/completions", "") + "/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-            
+            with metrics.LLM_REQUEST_SECONDS.time():
+                response = await self.client.post(
+                    settings.litellm_url.replace("/chat/completions", "") + "/chat/completions",
+                    headers=headers,
+                    content=json_utils.dumps_bytes(payload)
+                )
+                response.raise_for_status()
+                
+                result = response.json()
+                content = result["choices"][0]["message"]["content"]
+            metrics.LLM_REQUESTS.inc(kind="completion", outcome="ok")
+            return content
+        
         except httpx.HTTPStatusError as e:
+            metrics.LLM_REQUESTS.inc(kind="completion", outcome="error")
             logger.error(f"HTTP error during completion: {e}")
             raise
         except Exception as e:
+            metrics.LLM_REQUESTS.inc(kind="completion", outcome="error")
             logger.error(f"Unexpected error during completion: {e}")
             raise
\ No newline at end of file
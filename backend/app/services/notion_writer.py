@@ -1,184 +1,516 @@
-from notion_client import Client
-from typing import List, Dict, Any, Optional
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Tuple, Any, Optional, Callable, Iterable, Iterator
+from ..config import settings
+from .. import metrics
+import asyncio
+import difflib
+import hashlib
+import httpx
+import json
 import re
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# notion_client is imported where it's used rather than here, so it isn't
+# loaded at startup, only once something is exported.
+
+NOTION_BATCH_SIZE = 100
+NOTION_TEXT_LIMIT = 2000
+# Notion accepts at most two levels of children in one request; deeper
+# list items are flattened onto the deepest allowed level.
+NOTION_MAX_NESTING = 2
+# Writes that aren't safe to repeat: if Notion applied one before failing,
+# a retry creates a second page or appends the batch twice.
+NON_IDEMPOTENT_ENDPOINTS = {"pages.create", "blocks.children.append"}
+
+# Line-level syntax: a code fence, a heading, or a (possibly indented)
+# bulleted or numbered list item. Anything else is a paragraph.
+BLOCK_PATTERN = re.compile(
+    r'(?P<fence>```)'
+    r'|(?P<hashes>#{1,6})\s+(?P<heading>(?P<heading_text>.*))'
+    r'|(?P<indent>[ \t]*)(?:(?P<bullet>[-*+])|\d+[.)])\s+(?P<item>(?P<item_text>.*))'
+)
+
+INLINE_PATTERN = re.compile(
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|`(?P<code>[^`]+)`'
+    r'|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)\)'
+    r'|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])'
+    r'|(?<![\w_])_(?P<italic_alt>[^_\s](?:[^_]*[^_\s])?)_(?![\w_])'
+)
+
+
+def rich_text_items(
+    content: str,
+    annotations: Optional[Dict[str, bool]] = None,
+    link: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    # Notion rejects rich text objects over 2,000 characters, so long runs
+    # become several objects with the same formatting.
+    items = []
+    for start in range(0, len(content), NOTION_TEXT_LIMIT):
+        text: Dict[str, Any] = {"content": content[start:start + NOTION_TEXT_LIMIT]}
+        if link:
+            text["link"] = {"url": link}
+        item: Dict[str, Any] = {"type": "text", "text": text}
+        if annotations:
+            item["annotations"] = annotations
+        items.append(item)
+    return items
+
+
+def block_record(block: Dict[str, Any], block_id: str) -> Dict[str, Any]:
+    # What is remembered about an exported top-level block: enough to tell
+    # whether it changed and whether it can be edited in place.
+    content = block[block["type"]]
+    return {
+        "id": block_id,
+        "hash": hashlib.sha1(json.dumps(block, sort_keys=True).encode()).hexdigest(),
+        "type": block["type"],
+        "nested": bool(content.get("children")),
+    }
+
+
+def can_update_in_place(record: Dict[str, Any], block: Dict[str, Any]) -> bool:
+    # Notion can edit a block's content but not its type or children.
+    return (
+        record["type"] == block["type"]
+        and not record["nested"]
+        and not block[block["type"]].get("children")
+    )
+
+
+class TokenBucket:
+    # Reservation-style limiter: each caller takes a token immediately
+    # (possibly going into debt) and sleeps until its slot, so no lock is
+    # needed on a single event loop.
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+_rate_limiter: Optional[TokenBucket] = None
+
+
+def get_rate_limiter() -> TokenBucket:
+    # Notion's limit applies per integration, so all writers share one bucket.
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = TokenBucket(settings.notion_requests_per_second, settings.notion_burst)
+    return _rate_limiter
+
+
+def is_retryable_notion_error(error: Exception, idempotent: bool = True) -> bool:
+    from notion_client.errors import HTTPResponseError, RequestTimeoutError
+    
+    if not idempotent:
+        # Only failures that show the request was never applied: rate
+        # limited, refused as unavailable, or never connected.
+        if isinstance(error, HTTPResponseError):
+            return error.status in (429, 503)
+        return isinstance(error, httpx.ConnectError)
+    if isinstance(error, HTTPResponseError):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (RequestTimeoutError, httpx.TransportError))
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    headers = getattr(error, "headers", None)
+    if not headers or "retry-after" not in headers:
+        return None
+    try:
+        return max(0.0, float(headers["retry-after"]))
+    except ValueError:
+        return None
+
+
+def endpoint_name(endpoint: Callable[..., Any]) -> str:
+    # e.g. "blocks.children.append" for client.blocks.children.append.
+    owner = type(getattr(endpoint, "__self__", None)).__name__
+    words = re.findall(r"[A-Z][a-z]*", owner.removesuffix("Endpoint"))
+    prefix = ".".join(word.lower() for word in words)
+    name = getattr(endpoint, "__name__", "call")
+    return f"{prefix}.{name}" if prefix else name
+
+
+def notion_error_outcome(error: Exception) -> str:
+    from notion_client.errors import HTTPResponseError
+    
+    if isinstance(error, HTTPResponseError):
+        return "rate_limited" if error.status == 429 else f"http_{error.status}"
+    return "error"
+
+
+def batched(blocks: Iterable[Dict[str, Any]], size: int = NOTION_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for block in blocks:
+        batch.append(block)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
 class NotionWriter:
-    def __init__(self, api_key: str, parent_page_id: str):
-        self.client = Client(auth=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        parent_page_id: str,
+        http_client: Optional[httpx.Client] = None,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
+        from notion_client import Client
+        
+        options: Dict[str, Any] = {"auth": api_key}
+        if settings.notion_base_url:
+            options["base_url"] = settings.notion_base_url
+        self.client = Client(client=http_client, **options)
         self.parent_page_id = parent_page_id
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+    
+    async def request(self, endpoint: Callable[..., Any], **kwargs: Any) -> Any:
+        # notion_client's Client is synchronous: run each call in the
+        # threadpool, under the shared rate limit, retrying 429/5xx
+        # (non-idempotent writes only when nothing was applied).
+        name = endpoint_name(endpoint)
+        idempotent = name not in NON_IDEMPOTENT_ENDPOINTS
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            try:
+                with metrics.NOTION_CALL_SECONDS.time(endpoint=name):
+                    result = await run_in_threadpool(endpoint, **kwargs)
+                metrics.NOTION_CALLS.inc(endpoint=name, outcome="ok")
+                return result
+            except Exception as e:
+                metrics.NOTION_CALLS.inc(endpoint=name, outcome=notion_error_outcome(e))
+                if attempt >= settings.notion_max_retries or not is_retryable_notion_error(e, idempotent):
+                    raise
+                metrics.NOTION_RETRIES.inc(endpoint=name)
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = settings.notion_retry_backoff * (2 ** attempt)
+                attempt += 1
+                logger.warning(f"Notion request failed ({e}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+    
+    async def append_batches(
+        self,
+        block_id: str,
+        batches: Iterator[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        # Appends must stay sequential to keep block order, so the pipeline
+        # overlaps building the next batch with the request in flight.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        
+        async def produce() -> None:
+            try:
+                for batch in batches:
+                    await queue.put(batch)
+            finally:
+                await queue.put(None)
+        
+        producer = asyncio.create_task(produce())
+        appended = []
+        try:
+            while (batch := await queue.get()) is not None:
+                response = await self.request(
+                    self.client.blocks.children.append,
+                    block_id=block_id,
+                    children=batch
+                )
+                appended.extend(response.get("results", []))
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+        
+        return appended
     
     def markdown_to_notion_blocks(self, markdown: str) -> List[Dict[str, Any]]:
-        blocks = []
-        lines = markdown.split('\n')
-        i = 0
+        return list(self.iter_notion_blocks(markdown))
+    
+    def iter_notion_blocks(self, markdown: str) -> Iterator[Dict[str, Any]]:
+        # Single pass over the lines. A top-level list item is held back
+        # until the next line shows whether more nested items follow.
+        pending: Optional[Dict[str, Any]] = None
+        open_items: List[Tuple[int, Dict[str, Any]]] = []
+        code_lines: Optional[List[str]] = None
         
-        while i < len(lines):
-            line = lines[i].rstrip()
+        for raw_line in markdown.splitlines():
+            line = raw_line.rstrip()
+            
+            if code_lines is not None:
+                if line.startswith('```'):
+                    if code_lines:
+                        yield self.code_block('\n'.join(code_lines))
+                    code_lines = None
+                else:
+                    code_lines.append(line)
+                continue
             
             if not line:
-                i += 1
                 continue
             
-            if line.startswith('# '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_1",
-                    "heading_1": {
-                        "rich_text": [{"type": "text", "text": {"content": line[2:]}}]
-                    }
-                })
-            
-            elif line.startswith('## '):
-                blocks.append({
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"type": "text", "text": {"content": line[3:]}}]
-                    }
-                })
-            
-            elif line.startswith('- '):
-                blocks.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": self.parse_inline_formatting(line[2:])
-                    }
-                })
+            match = BLOCK_PATTERN.match(line)
+            kind = match.lastgroup if match else None
             
-            elif line.startswith('```'):
-                code_lines = []
-                language = line[3:].strip() or "plain text"
-                i += 1
-                
-                while i < len(lines) and not lines[i].rstrip().startswith('```'):
-                    code_lines.append(lines[i].rstrip())
-                    i += 1
+            if kind == "item":
+                indent = len(match.group("indent").expandtabs(4))
+                block_type = "bulleted_list_item" if match.group("bullet") else "numbered_list_item"
+                block = self.text_block(block_type, match.group("item_text"))
                 
-                if code_lines:
-                    blocks.append({
-                        "object": "block",
-                        "type": "code",
-                        "code": {
-                            "rich_text": [{"type": "text", "text": {"content": '\n'.join(code_lines)}}],
-                            "language": "plain text"
-                        }
-                    })
+                while open_items and (
+                    open_items[-1][0] >= indent or len(open_items) > NOTION_MAX_NESTING
+                ):
+                    open_items.pop()
+                if open_items:
+                    parent = open_items[-1][1]
+                    parent[parent["type"]].setdefault("children", []).append(block)
+                else:
+                    if pending is not None:
+                        yield pending
+                    pending = block
+                open_items.append((indent, block))
+                continue
             
-            else:
-                blocks.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": self.parse_inline_formatting(line)
-                    }
-                })
+            if pending is not None:
+                yield pending
+                pending = None
+                open_items = []
             
-            i += 1
+            if kind == "fence":
+                code_lines = []
+            elif kind == "heading":
+                level = min(len(match.group("hashes")), 3)
+                yield self.text_block(f"heading_{level}", match.group("heading_text"))
+            else:
+                yield self.text_block("paragraph", line.strip())
         
-        return blocks
+        if pending is not None:
+            yield pending
+        if code_lines:
+            yield self.code_block('\n'.join(code_lines))
+    
+    def text_block(self, block_type: str, text: str) -> Dict[str, Any]:
+        return {
+            "object": "block",
+            "type": block_type,
+            block_type: {
+                "rich_text": self.parse_inline_formatting(text)
+            }
+        }
+    
+    def code_block(self, code: str) -> Dict[str, Any]:
+        return {
+            "object": "block",
+            "type": "code",
+            "code": {
+                "rich_text": rich_text_items(code),
+                "language": "plain text"
+            }
+        }
     
     def parse_inline_formatting(self, text: str) -> List[Dict[str, Any]]:
         rich_text = []
+        position = 0
         
-        bold_pattern = r'\*\*(.*?)\*\*'
-        code_pattern = r'`([^`]+)`'
-        
-        combined_pattern = f'({bold_pattern}|{code_pattern})'
-        
-        parts = re.split(combined_pattern, text)
-        
-        i = 0
-        while i < len(parts):
-            part = parts[i] if parts[i] else ""
-            
-            if not part:
-                i += 1
-                continue
+        for match in INLINE_PATTERN.finditer(text):
+            if match.start() > position:
+                rich_text.extend(rich_text_items(text[position:match.start()]))
             
-            if i + 2 < len(parts) and parts[i] == '**' and parts[i + 2] == '**':
-                rich_text.append({
-                    "type": "text",
-                    "text": {"content": parts[i + 1]},
-                    "annotations": {"bold": True}
-                })
-                i += 3
-            elif part.startswith('**') and part.endswith('**') and len(part) > 4:
-                rich_text.append({
-                    "type": "text",
-                    "text": {"content": part[2:-2]},
-                    "annotations": {"bold": True}
-                })
-                i += 1
-            elif part.startswith('`') and part.endswith('`') and len(part) > 2:
-                rich_text.append({
-                    "type": "text",
-                    "text": {"content": part[1:-1]},
-                    "annotations": {"code": True}
-                })
-                i += 1
+            kind = match.lastgroup
+            if kind == "link_url":
+                rich_text.extend(rich_text_items(match.group("link_text"), link=match.group("link_url")))
             else:
-                if part:
-                    rich_text.append({
-                        "type": "text",
-                        "text": {"content": part}
-                    })
-                i += 1
+                annotation = "italic" if kind == "italic_alt" else kind
+                rich_text.extend(rich_text_items(match.group(kind), {annotation: True}))
+            position = match.end()
+        
+        if position < len(text):
+            rich_text.extend(rich_text_items(text[position:]))
         
         if not rich_text:
             rich_text = [{"type": "text", "text": {"content": text}}]
         
         return rich_text
     
+    def title_properties(self, title: str) -> Dict[str, Any]:
+        return {
+            "title": {
+                "title": [
+                    {
+                        "type": "text",
+                        "text": {"content": title}
+                    }
+                ]
+            }
+        }
+    
     async def create_notion_page(
         self, 
         title: str, 
         markdown_content: str
-    ) -> Dict[str, str]:
+    ) -> Dict[str, Any]:
         try:
-            blocks = self.markdown_to_notion_blocks(markdown_content)
-            
-            page = self.client.pages.create(
+            # The page is created empty and filled by appends, whose responses
+            # carry the block ids needed to update it later.
+            page = await self.request(
+                self.client.pages.create,
                 parent={"page_id": self.parent_page_id},
-                properties={
-                    "title": {
-                        "title": [
-                            {
-                                "type": "text",
-                                "text": {"content": title}
-                            }
-                        ]
-                    }
-                },
-                children=blocks[:100]
+                properties=self.title_properties(title)
             )
             
             page_id = page["id"]
             page_url = page["url"]
             
-            if len(blocks) > 100:
-                for i in range(100, len(blocks), 100):
-                    batch = blocks[i:i+100]
-                    self.client.blocks.children.append(
-                        block_id=page_id,
-                        children=batch
-                    )
+            blocks: List[Dict[str, Any]] = []
+            
+            def track(converted: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+                for block in converted:
+                    blocks.append(block)
+                    yield block
+            
+            appended = await self.append_batches(
+                page_id,
+                batched(track(self.iter_notion_blocks(markdown_content)))
+            )
             
             logger.info(f"Created Notion page: {page_id}")
             
             return {
                 "page_id": page_id,
-                "url": page_url
+                "url": page_url,
+                "blocks": [
+                    block_record(block, result["id"])
+                    for block, result in zip(blocks, appended)
+                ]
             }
-            
+        
         except Exception as e:
             logger.error(f"Failed to create Notion page: {e}")
             raise
     
+    async def sync_notion_page(
+        self,
+        title: str,
+        markdown_content: str,
+        page_id: Optional[str] = None,
+        previous_blocks: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        # Brings a previously exported page up to date, touching only the
+        # top-level blocks that changed. Falls back to a new page if there
+        # is none yet or it has been deleted.
+        if not page_id or previous_blocks is None:
+            return await self.create_notion_page(title, markdown_content)
+        
+        from notion_client.errors import HTTPResponseError
+        
+        try:
+            page = await self.request(
+                self.client.pages.update,
+                page_id=page_id,
+                properties=self.title_properties(title)
+            )
+        except HTTPResponseError as e:
+            if e.status != 404:
+                raise
+            page = None
+        
+        if page is None or page.get("archived"):
+            logger.info(f"Notion page {page_id} is gone, creating a new one")
+            return await self.create_notion_page(title, markdown_content)
+        
+        blocks = self.markdown_to_notion_blocks(markdown_content)
+        records = await self.apply_block_diff(page_id, previous_blocks, blocks)
+        
+        logger.info(f"Synced Notion page: {page_id}")
+        
+        return {
+            "page_id": page_id,
+            "url": page["url"],
+            "blocks": records
+        }
+    
+    async def apply_block_diff(
+        self,
+        page_id: str,
+        old: List[Dict[str, Any]],
+        new: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        new_records = [block_record(block, "") for block in new]
+        matcher = difflib.SequenceMatcher(
+            a=[record["hash"] for record in old],
+            b=[record["hash"] for record in new_records],
+            autojunk=False
+        )
+        
+        records: List[Dict[str, Any]] = []
+        anchor: Optional[str] = None
+        
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                records.extend(old[i1:i2])
+                anchor = records[-1]["id"]
+                continue
+            
+            # Changed blocks are edited in place where Notion allows it; the
+            # rest of the range is deleted and re-inserted.
+            i, j = i1, j1
+            while i < i2 and j < j2 and can_update_in_place(old[i], new[j]):
+                block = new[j]
+                await self.request(
+                    self.client.blocks.update,
+                    block_id=old[i]["id"],
+                    **{block["type"]: block[block["type"]]}
+                )
+                records.append({**new_records[j], "id": old[i]["id"]})
+                anchor = old[i]["id"]
+                i += 1
+                j += 1
+            
+            for record in old[i:i2]:
+                await self.request(self.client.blocks.delete, block_id=record["id"])
+            
+            if j == j2:
+                continue
+            
+            if anchor is None and i2 < len(old):
+                # Notion can only insert after an existing block, so a change
+                # at the very top rewrites the rest of the page.
+                for record in old[i2:]:
+                    await self.request(self.client.blocks.delete, block_id=record["id"])
+                appended = await self.append_batches(page_id, batched(new))
+                return [block_record(block, result["id"]) for block, result in zip(new, appended)]
+            
+            for batch_start in range(j, j2, NOTION_BATCH_SIZE):
+                batch = new[batch_start:min(batch_start + NOTION_BATCH_SIZE, j2)]
+                options: Dict[str, Any] = {"block_id": page_id, "children": batch}
+                if anchor is not None:
+                    options["after"] = anchor
+                response = await self.request(self.client.blocks.children.append, **options)
+                results = response.get("results", [])
+                records.extend(
+                    {**record, "id": result["id"]}
+                    for record, result in zip(new_records[batch_start:], results)
+                )
+                anchor = records[-1]["id"]
+        
+        return records
+    
     def validate_config(self) -> bool:
         try:
             self.client.pages.retrieve(page_id=self.parent_page_id)
@@ -0,0 +1,212 @@
+from typing import Any, Dict, List, Optional
+from ..config import settings
+from .. import metrics
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache, opened and closed by the application lifespan. Left
+# unset (so caching is skipped) when LLM_CACHE_ENABLED is false.
+_response_cache: Optional["ResponseCache"] = None
+
+
+def cache_key(model: str, params: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+    # Sorted, compact stdlib JSON so the key doesn't depend on dict order or
+    # on which JSON backend is installed.
+    material = json.dumps(
+        {"model": model, "params": params, "messages": messages},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    # Completions stored in their own SQLite file, keyed by a hash of
+    # (model, params, prompt). Entries expire after ttl seconds, and the
+    # least recently used are evicted once the responses exceed max_bytes.
+    # Entry and byte totals are kept in memory, so a write only trims when
+    # over the limit and stats() needs no query; expired entries are swept
+    # every sweep_interval seconds.
+    def __init__(self, path: str, ttl: float, max_bytes: int, sweep_interval: float = 300.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, "
+            "model TEXT NOT NULL, "
+            "response TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "latency REAL NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "last_used_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used_at ON llm_cache (last_used_at)"
+        )
+        self.entries, self.total_bytes = self._stored_totals()
+        self.last_sweep = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+    
+    def _stored_totals(self) -> tuple:
+        return tuple(self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone())
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT response, latency, created_at, size FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] > self.ttl:
+                self.connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.entries -= 1
+                self.total_bytes -= row[3]
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                metrics.LLM_CACHE_LOOKUPS.inc(result="miss")
+                return None
+            
+            self.connection.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self.saved_seconds += row[1]
+            metrics.LLM_CACHE_LOOKUPS.inc(result="hit")
+            metrics.LLM_CACHE_SAVED_SECONDS.inc(row[1])
+            return row[0]
+    
+    def put(self, key: str, model: str, response: str, latency: float) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        
+        with self.lock:
+            replaced = self.connection.execute(
+                "SELECT size FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO llm_cache "
+                "(key, model, response, size, latency, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, latency, now, now)
+            )
+            if replaced is None:
+                self.entries += 1
+            self.total_bytes += size - (replaced[0] if replaced else 0)
+            
+            if now - self.last_sweep >= self.sweep_interval:
+                self._sweep(now)
+            if self.total_bytes > self.max_bytes:
+                self._trim()
+    
+    def _sweep(self, now: float) -> None:
+        self.evictions += self.connection.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+        # A full scan anyway, so also resync the running totals.
+        self.entries, self.total_bytes = self._stored_totals()
+        self.last_sweep = now
+    
+    def _trim(self) -> None:
+        # Least recently used first (via the last_used_at index) until the
+        # rest fits in max_bytes.
+        excess = self.total_bytes - self.max_bytes
+        victims = []
+        rows = self.connection.execute("SELECT key, size FROM llm_cache ORDER BY last_used_at")
+        for key, size in rows:
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+            self.total_bytes -= size
+        rows.close()
+        self.connection.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        self.entries -= len(victims)
+        self.evictions += len(victims)
+    
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM llm_cache")
+            self.entries = 0
+            self.total_bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        # Only in-memory counters: this runs on the event loop for every
+        # metrics scrape and health check.
+        with self.lock:
+            entries, total_bytes = self.entries, self.total_bytes
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+    
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+def init_response_cache() -> Optional[ResponseCache]:
+    global _response_cache
+    if _response_cache is None and settings.llm_cache_enabled:
+        _response_cache = ResponseCache(
+            settings.llm_cache_path,
+            settings.llm_cache_ttl,
+            settings.llm_cache_max_bytes,
+            settings.llm_cache_sweep_interval
+        )
+    return _response_cache
+
+
+def close_response_cache() -> None:
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _response_cache
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    if _response_cache is None:
+        return {"enabled": False}
+    return _response_cache.stats()
+
+
+def _cache_size() -> Dict[tuple, float]:
+    stats = get_cache_stats()
+    if not stats["enabled"]:
+        return {}
+    return {("entries",): stats["entries"], ("bytes",): stats["bytes"]}
+
+
+metrics.gauge("llm_cache_size", "Entries and response bytes in the LLM response cache", ["unit"], collect=_cache_size)
@@ -0,0 +1,212 @@
+from sqlalchemy.engine import Engine
+from sqlmodel import Session as SQLSession, select, delete
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+
+from ..config import settings
+from ..models import Session as SessionModel, Message, Summary, SummaryChunk
+from .notion_writer import NotionWriter
+from .singleflight import SingleFlight
+from .summarizer import SummarizerService, ProgressCallback
+
+logger = logging.getLogger(__name__)
+
+_flights = SingleFlight()
+
+
+def load_summary_inputs(
+    db: SQLSession,
+    session_id: str
+) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    summary = db.get(Summary, session_id)
+    
+    # Same total order as pagination: reused chunks are matched by message
+    # id, so tied timestamps must sort the same way every time.
+    statement = select(Message).where(
+        Message.session_id == session_id
+    ).order_by(Message.created_at, Message.id)
+    messages = [
+        {"id": msg.id, "role": msg.role, "content": msg.content, "token_count": msg.token_count}
+        for msg in db.exec(statement).all()
+    ]
+    
+    statement = select(SummaryChunk).where(
+        SummaryChunk.session_id == session_id
+    ).order_by(SummaryChunk.position)
+    chunks = [
+        {
+            "first_message_id": chunk.first_message_id,
+            "last_message_id": chunk.last_message_id,
+            "message_count": chunk.message_count,
+            "summary": chunk.summary,
+        }
+        for chunk in db.exec(statement).all()
+    ]
+    
+    summary_state = None
+    if summary:
+        summary_state = {
+            "title": summary.title,
+            "markdown": summary.markdown,
+            "message_count": summary.message_count,
+            "last_message_id": summary.last_message_id,
+        }
+    
+    return summary_state, messages, chunks
+
+
+def is_summary_current(summary: Dict[str, Any], messages: List[Dict[str, Any]]) -> bool:
+    last_message_id = messages[-1]["id"] if messages else None
+    return (
+        summary["message_count"] == len(messages)
+        and summary["last_message_id"] == last_message_id
+    )
+
+
+def store_summary(
+    db: SQLSession,
+    session_id: str,
+    title: str,
+    markdown: str,
+    messages: List[Dict[str, Any]],
+    chunks: List[Dict[str, Any]],
+    complete: bool = True
+) -> None:
+    session = db.get(SessionModel, session_id)
+    if session is None:
+        # Deleted while it was being summarized.
+        return
+    if not session.title:
+        session.title = title
+    
+    summary = db.get(Summary, session_id)
+    if summary is None:
+        summary = Summary(session_id=session_id, title=title, markdown=markdown)
+        db.add(summary)
+    else:
+        summary.title = title
+        summary.markdown = markdown
+    
+    if complete:
+        summary.message_count = len(messages)
+        summary.last_message_id = messages[-1]["id"]
+    else:
+        # Some chunks failed: claim only what the stored chunks cover, so
+        # the summary isn't current and the next refresh maps the rest.
+        summary.message_count = sum(chunk["message_count"] for chunk in chunks)
+        summary.last_message_id = chunks[-1]["last_message_id"] if chunks else None
+    
+    db.exec(delete(SummaryChunk).where(SummaryChunk.session_id == session_id))
+    db.add_all([
+        SummaryChunk(session_id=session_id, position=position, **chunk)
+        for position, chunk in enumerate(chunks)
+    ])
+    
+    db.commit()
+
+
+async def refresh_summary(
+    db: SQLSession,
+    session_id: str,
+    on_progress: Optional[ProgressCallback] = None
+) -> Optional[Dict[str, Any]]:
+    # Returns the stored summary if it still covers every message; otherwise
+    # summarizes only what changed since, reusing stored chunk summaries.
+    # partial/failed_chunks report chunks that could not be summarized
+    # (a stored summary is never partial). None means there is nothing to
+    # summarize. Concurrent calls for the same
+    # session share one computation (progress goes to the first caller).
+    return await _flights.do(
+        f"summary:{session_id}",
+        _refresh_summary,
+        db.get_bind(),
+        session_id,
+        on_progress
+    )
+
+
+async def _refresh_summary(
+    bind: Engine,
+    session_id: str,
+    on_progress: Optional[ProgressCallback]
+) -> Optional[Dict[str, Any]]:
+    # Uses its own database session: the computation may outlive the request
+    # that started it.
+    with SQLSession(bind) as db:
+        summary, messages, chunks = await run_in_threadpool(load_summary_inputs, db, session_id)
+        
+        if summary and is_summary_current(summary, messages):
+            return {"title": summary["title"], "markdown": summary["markdown"], "partial": False, "failed_chunks": []}
+        
+        if not messages:
+            return None
+        
+        async with SummarizerService() as summarizer:
+            title, markdown = await summarizer.summarize_session(messages, chunks, on_progress)
+            new_chunks = summarizer.chunks
+            failed_chunks = summarizer.failed_chunks
+        
+        await run_in_threadpool(
+            store_summary, db, session_id, title, markdown, messages, new_chunks, not failed_chunks
+        )
+    
+    return {"title": title, "markdown": markdown, "partial": bool(failed_chunks), "failed_chunks": failed_chunks}
+
+
+def load_notion_state(db: SQLSession, session_id: str) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]]]:
+    summary = db.get(Summary, session_id)
+    if summary is None or not summary.notion_page_id or not summary.notion_blocks:
+        return None, None
+    return summary.notion_page_id, json.loads(summary.notion_blocks)
+
+
+def store_notion_state(db: SQLSession, session_id: str, page: Dict[str, Any]) -> None:
+    summary = db.get(Summary, session_id)
+    if summary is None:
+        return
+    summary.notion_page_id = page["page_id"]
+    summary.notion_url = page["url"]
+    # Without block ids the page can't be diffed, so the next export
+    # starts a fresh page.
+    blocks = page.get("blocks")
+    summary.notion_blocks = json.dumps(blocks) if blocks is not None else None
+    db.commit()
+
+
+async def export_to_notion(
+    db: SQLSession,
+    session_id: str,
+    title: str,
+    markdown: str
+) -> Dict[str, str]:
+    # Coalesced like refresh_summary, so a double-click creates one page.
+    # Re-exports update the session's existing page in place.
+    return await _flights.do(
+        f"notion:{session_id}",
+        _export_to_notion,
+        db.get_bind(),
+        session_id,
+        title,
+        markdown
+    )
+
+
+async def _export_to_notion(
+    bind: Engine,
+    session_id: str,
+    title: str,
+    markdown: str
+) -> Dict[str, str]:
+    notion_writer = NotionWriter(
+        settings.notion_api_key,
+        settings.notion_parent_page_id
+    )
+    
+    with SQLSession(bind) as db:
+        page_id, blocks = await run_in_threadpool(load_notion_state, db, session_id)
+        page = await notion_writer.sync_notion_page(title, markdown, page_id, blocks)
+        await run_in_threadpool(store_notion_state, db, session_id, page)
+    
+    return {"page_id": page["page_id"], "url": page["url"]}
@@ -0,0 +1,24 @@
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+
+class SingleFlight:
+    # Coalesces concurrent calls that share a key: the first caller starts
+    # the work and everyone who arrives before it finishes awaits the same
+    # result (or exception).
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Task] = {}
+    
+    async def do(self, key: str, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        
+        # Shielded so one caller going away does not cancel the work the
+        # others are waiting on.
+        return await asyncio.shield(task)
+    
+    def in_flight(self, key: str) -> bool:
+        return key in self.calls
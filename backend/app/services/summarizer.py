@@ -1,14 +1,36 @@
-from typing import List, Dict, Tuple
-from .llm_service import LLMService
+from typing import List, Dict, Tuple, Any, Optional, Callable, Awaitable
+from .llm_service import LLMService, message_token_count
 from ..config import settings
+from .. import metrics
+import asyncio
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Called with (chunks done, chunks total) as the map phase progresses.
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+
+class SummarizationError(Exception):
+    def __init__(self, message: str, failed_chunks: List[int]):
+        super().__init__(message)
+        self.failed_chunks = failed_chunks
+
+
+def is_retryable_error(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
 
 class SummarizerService:
     def __init__(self):
         self.llm_service = LLMService()
+        self.semaphore = asyncio.Semaphore(settings.summary_concurrency)
+        self.failed_chunks: List[int] = []
+        self.chunks: List[Dict[str, Any]] = []
         
     async def __aenter__(self):
         await self.llm_service.__aenter__()
@@ -27,7 +49,7 @@ class SummarizerService:
         current_tokens = 0
         
         for msg in messages:
-            msg_tokens = self.llm_service.count_tokens(msg["content"])
+            msg_tokens = message_token_count(msg)
             
             if current_tokens + msg_tokens > chunk_size and current_chunk:
                 chunks.append(current_chunk)
@@ -65,9 +87,146 @@ Provide a structured summary with:
         return await self.llm_service.get_completion(
             messages,
             temperature=settings.summary_temperature,
-            top_p=settings.summary_top_p
+            top_p=settings.summary_top_p,
+            cache=True
         )
     
+    async def run_with_retry(self, label: str, func, *args) -> str:
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    return await func(*args)
+            except Exception as e:
+                if attempt >= settings.summary_max_retries or not is_retryable_error(e):
+                    raise
+                delay = settings.summary_retry_backoff * (2 ** attempt)
+                attempt += 1
+                metrics.SUMMARY_RETRIES.inc()
+                logger.warning(f"{label} failed ({e}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    async def summarize_chunk_with_retry(self, index: int, chunk_text: str) -> str:
+        try:
+            with metrics.SUMMARY_CHUNK_SECONDS.time():
+                summary = await self.run_with_retry(f"Chunk {index}", self.summarize_chunk, chunk_text)
+        except Exception:
+            metrics.SUMMARY_CHUNKS.inc(outcome="failed")
+            raise
+        metrics.SUMMARY_CHUNKS.inc(outcome="ok")
+        return summary
+    
+    async def map_chunks(
+        self,
+        chunks: List[List[Dict[str, str]]],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> List[str]:
+        done = 0
+        
+        async def run(index: int, chunk: List[Dict[str, str]]) -> str:
+            nonlocal done
+            try:
+                return await self.summarize_chunk_with_retry(index, self.format_chunk_for_summary(chunk))
+            finally:
+                done += 1
+                if on_progress:
+                    await on_progress(done, len(chunks))
+        
+        results = await asyncio.gather(
+            *[run(i, chunk) for i, chunk in enumerate(chunks)],
+            return_exceptions=True
+        )
+        
+        summaries = []
+        self.failed_chunks = []
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to summarize chunk {i + 1}/{len(chunks)}: {result}")
+                self.failed_chunks.append(i)
+            else:
+                summaries.append(result)
+        
+        if not summaries:
+            raise SummarizationError("All chunks failed to summarize", self.failed_chunks)
+        if self.failed_chunks:
+            logger.warning(
+                f"Summary built from {len(summaries)}/{len(chunks)} chunks; "
+                f"failed chunks: {self.failed_chunks}"
+            )
+        
+        return summaries
+    
+    async def merge_summaries(self, summaries: List[str]) -> str:
+        combined = "\n\n---\n\n".join(summaries)
+        
+        prompt = f"""The following are summaries of consecutive parts of one conversation, in order. Merge them into a single concise summary, preserving key points, decisions, action items, and important technical details:
+
+{combined}
+
+Provide a structured summary with:
+- Main topics discussed
+- Key decisions or conclusions
+- Action items (if any)
+- Important technical details or code snippets"""
+        
+        messages = [{"role": "user", "content": prompt}]
+        
+        return await self.llm_service.get_completion(
+            messages,
+            temperature=settings.summary_temperature,
+            top_p=settings.summary_top_p,
+            cache=True
+        )
+    
+    def group_summaries(self, summaries: List[str], budget: int) -> List[List[str]]:
+        groups = []
+        current_group = []
+        current_tokens = 0
+        
+        for summary in summaries:
+            summary_tokens = self.llm_service.count_tokens(summary)
+            
+            if current_tokens + summary_tokens > budget and current_group:
+                groups.append(current_group)
+                current_group = []
+                current_tokens = 0
+            
+            current_group.append(summary)
+            current_tokens += summary_tokens
+        
+        if current_group:
+            groups.append(current_group)
+        
+        # Summaries that each fill the budget would never shrink; pair them
+        # up so every round still halves the count.
+        if len(groups) == len(summaries):
+            groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+        
+        return groups
+    
+    async def reduce_summaries(self, summaries: List[str]) -> List[str]:
+        budget = settings.summary_reduce_budget
+        level = 0
+        
+        while len(summaries) > 1 and sum(
+            self.llm_service.count_tokens(summary) for summary in summaries
+        ) > budget:
+            groups = self.group_summaries(summaries, budget)
+            level += 1
+            logger.info(f"Reduce level {level}: merging {len(summaries)} summaries into {len(groups)}")
+            
+            summaries = list(await asyncio.gather(*[
+                self.merge_group(f"Reduce level {level} group {i}", group)
+                for i, group in enumerate(groups)
+            ]))
+        
+        return summaries
+    
+    async def merge_group(self, label: str, group: List[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        return await self.run_with_retry(label, self.merge_summaries, group)
+    
     async def combine_summaries(self, summaries: List[str], title: str) -> str:
         combined = "\n\n---\n\n".join(summaries)
         
@@ -105,32 +264,75 @@ Requirements:
         return await self.llm_service.get_completion(
             messages,
             temperature=settings.summary_temperature,
-            top_p=settings.summary_top_p
+            top_p=settings.summary_top_p,
+            cache=True
         )
     
+    def reusable_chunks(
+        self,
+        messages: List[Dict[str, Any]],
+        previous_chunks: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        # Every stored chunk but the last (which may have been partial) is
+        # reused, as long as it still lines up with the session's messages.
+        kept = previous_chunks[:-1]
+        covered = 0
+        
+        for chunk in kept:
+            covered += chunk["message_count"]
+            if covered > len(messages) or messages[covered - 1].get("id") != chunk["last_message_id"]:
+                return []
+        
+        return kept
+    
     async def summarize_session(
         self, 
-        messages: List[Dict[str, str]]
+        messages: List[Dict[str, Any]],
+        previous_chunks: Optional[List[Dict[str, Any]]] = None,
+        on_progress: Optional[ProgressCallback] = None
     ) -> Tuple[str, str]:
+        self.chunks = []
+        self.failed_chunks = []
+        
         if not messages:
             return "Empty Session", "# Empty Session\n\n## TL;DR\n- No messages in session\n\n## Key Points\n- N/A\n\n## Action Items\n- N/A\n\n## Notes\n- N/A"
         
         title = self.generate_title(messages)
         
-        if len(messages) <= 10:
-            chunk_text = self.format_chunk_for_summary(messages)
-            summary = await self.summarize_chunk(chunk_text)
-            final_markdown = await self.combine_summaries([summary], title)
+        kept_chunks = self.reusable_chunks(messages, previous_chunks or [])
+        covered = sum(chunk["message_count"] for chunk in kept_chunks)
+        remaining = messages[covered:]
+        
+        if not kept_chunks and len(messages) <= 10:
+            new_chunks = [messages]
         else:
-            chunks = self.chunk_messages(messages)
-            summaries = []
-            
-            for chunk in chunks:
-                chunk_text = self.format_chunk_for_summary(chunk)
-                summary = await self.summarize_chunk(chunk_text)
-                summaries.append(summary)
-            
-            final_markdown = await self.combine_summaries(summaries, title)
+            new_chunks = self.chunk_messages(remaining)
+        
+        new_summaries = await self.map_chunks(new_chunks, on_progress) if new_chunks else []
+        
+        # Only a contiguous run of chunks can be reused next time, so stop
+        # recording at the first chunk that failed.
+        self.chunks = list(kept_chunks)
+        failed = set(self.failed_chunks)
+        # Reported as positions in the whole session's chunk list.
+        self.failed_chunks = [len(kept_chunks) + i for i in self.failed_chunks]
+        successful = iter(new_summaries)
+        for i, chunk in enumerate(new_chunks):
+            if i in failed:
+                break
+            self.chunks.append({
+                "first_message_id": chunk[0].get("id"),
+                "last_message_id": chunk[-1].get("id"),
+                "message_count": len(chunk),
+                "summary": next(successful),
+            })
+        
+        if kept_chunks:
+            logger.info(f"Reused {len(kept_chunks)} chunk summaries, mapped {len(new_chunks)} new chunks")
+        
+        summaries = [chunk["summary"] for chunk in kept_chunks] + new_summaries
+        summaries = await self.reduce_summaries(summaries)
+        final_markdown = await self.combine_summaries(summaries, title)
         
         extracted_title = self.extract_title_from_markdown(final_markdown)
         
@@ -0,0 +1,162 @@
+"""Token latency of concurrent /api/chat streams.
+
+Starts the fake LLM server and the backend as subprocesses against a fresh
+SQLite file, opens N chat streams with staggered starts (so session
+commits land while other streams are mid-response) and reports the
+client-observed time-to-first-token and inter-token gaps, plus the
+backend's CPU time per streamed token. --coalesce-ms turns on SSE
+coalescing for the measured streams:
+
+    cd backend
+    python -m benchmarks.bench_concurrent_streams --streams 50
+    python -m benchmarks.bench_concurrent_streams --streams 50 --coalesce-ms 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+import httpx
+from sqlmodel import Session as SQLSession, SQLModel, create_engine
+
+from app.models import Session, Message
+from .servers import free_port, process_cpu_seconds, run_server
+
+
+def seed_database(url: str, sessions: int, history: int) -> List[str]:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    start = datetime.utcnow() - timedelta(days=1)
+    
+    session_ids = []
+    with SQLSession(engine) as db:
+        for _ in range(sessions):
+            session = Session(title="bench")
+            db.add(session)
+            session_ids.append(session.id)
+            for i in range(history):
+                db.add(Message(
+                    session_id=session.id,
+                    role="user" if i % 2 == 0 else "assistant",
+                    content="lorem ipsum dolor sit amet " * 20,
+                    token_count=100,
+                    created_at=start + timedelta(seconds=i)
+                ))
+        db.commit()
+    engine.dispose()
+    return session_ids
+
+
+async def run_stream(
+    client: httpx.AsyncClient,
+    session_id: str,
+    delay: float,
+    ttfts: List[float],
+    gaps: List[float],
+    coalesce_ms: float = 0.0
+) -> None:
+    await asyncio.sleep(delay)
+    started = time.perf_counter()
+    last = None
+    
+    async with client.stream(
+        "POST", "/api/chat", json={"session_id": session_id, "text": "hello", "coalesce_ms": coalesce_ms}
+    ) as response:
+        async for line in response.aiter_lines():
+            # chat.py pre-formats "data: ..." and EventSourceResponse adds
+            # its own prefix, so strip as many as are present.
+            payload = line
+            while payload.startswith("data: "):
+                payload = payload[6:]
+            if not payload or payload == line:
+                continue
+            event = json.loads(payload)
+            if "data" not in event or event.get("event") == "end":
+                continue
+            now = time.perf_counter()
+            if last is None:
+                ttfts.append(now - started)
+            else:
+                gaps.append(now - last)
+            last = now
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name: str, values: List[float]) -> None:
+    ms = [v * 1000 for v in values]
+    print(
+        f"{name:>16}: n={len(ms):<6} p50={percentile(ms, 50):7.2f}ms "
+        f"p95={percentile(ms, 95):7.2f}ms p99={percentile(ms, 99):7.2f}ms "
+        f"max={max(ms):7.2f}ms mean={statistics.mean(ms):7.2f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        session_ids = seed_database(db_url, args.streams, args.history)
+        
+        llm_port, api_port = free_port(), free_port()
+        llm_env = {
+            "FAKE_LLM_TOKENS": str(args.tokens),
+            "FAKE_LLM_TOKEN_INTERVAL_MS": str(args.token_interval_ms),
+        }
+        api_env = {
+            "DATABASE_URL": db_url,
+            "LITELLM_URL": f"http://127.0.0.1:{llm_port}/v1/chat/completions",
+            "OPENAI_API_KEY": "bench",
+        }
+        
+        with run_server("benchmarks.fake_llm:app", llm_port, llm_env), \
+                run_server("app.main:app", api_port, api_env) as backend:
+            ttfts: List[float] = []
+            gaps: List[float] = []
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{api_port}",
+                timeout=120.0,
+                limits=httpx.Limits(max_connections=args.streams)
+            ) as client:
+                # One untimed turn so tokenizer loading and connection setup
+                # are not attributed to the measured streams.
+                await run_stream(client, session_ids[0], 0, [], [])
+                
+                cpu_before = process_cpu_seconds(backend.pid)
+                started = time.perf_counter()
+                await asyncio.gather(*[
+                    run_stream(client, session_id, i * args.stagger_ms / 1000, ttfts, gaps, args.coalesce_ms)
+                    for i, session_id in enumerate(session_ids)
+                ])
+                elapsed = time.perf_counter() - started
+                cpu_after = process_cpu_seconds(backend.pid)
+    
+    print(
+        f"{args.streams} streams x {args.tokens} tokens, history={args.history}, "
+        f"coalesce={args.coalesce_ms:g}ms, wall={elapsed:.2f}s"
+    )
+    report("TTFT", ttfts)
+    report("inter-event gap", gaps)
+    print(f"{'events':>16}: {len(ttfts) + len(gaps)}")
+    if cpu_before is not None and cpu_after is not None:
+        per_token = (cpu_after - cpu_before) / (args.streams * args.tokens)
+        print(f"{'backend CPU':>16}: {cpu_after - cpu_before:.2f}s total, {per_token * 1e6:.1f}us per token")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-interval-ms", type=float, default=5)
+    parser.add_argument("--history", type=int, default=200)
+    parser.add_argument("--stagger-ms", type=float, default=10)
+    parser.add_argument("--coalesce-ms", type=float, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""Deleting one very long session, object by object vs set-based.
+
+Seeds a fresh SQLite file per strategy with one session of --messages
+messages (plus a summary and chunk rows, and a few small sessions that
+must survive), then times the delete and reports peak Python memory.
+
+    cd backend
+    python -m benchmarks.bench_delete --messages 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from sqlmodel import Session as SQLSession, SQLModel, func, select
+
+from app.api.sessions import delete_session_rows
+from app.database import create_db_engine
+from app.models import Session, Message, Summary, SummaryChunk, Job
+
+
+def orm_delete(db: SQLSession, session_id: str) -> None:
+    # The previous implementation: load every row, delete one at a time.
+    for model in (Message, SummaryChunk, Job):
+        for row in db.exec(select(model).where(model.session_id == session_id)).all():
+            db.delete(row)
+    summary = db.get(Summary, session_id)
+    if summary:
+        db.delete(summary)
+    db.delete(db.get(Session, session_id))
+    db.commit()
+
+
+def set_delete(db: SQLSession, session_id: str) -> None:
+    delete_session_rows(db, [session_id])
+    db.commit()
+
+
+def seed(db: SQLSession, args: argparse.Namespace) -> str:
+    long_session = Session(title="long")
+    others = [Session(title=f"other {i}") for i in range(5)]
+    db.add_all([long_session, *others])
+    db.commit()
+    
+    for start in range(0, args.messages, 5000):
+        db.add_all([
+            Message(session_id=long_session.id, role="user" if i % 2 else "assistant",
+                    content="x" * args.size, token_count=10)
+            for i in range(start, min(start + 5000, args.messages))
+        ])
+        db.commit()
+    db.add(Summary(session_id=long_session.id, title="long", markdown="# long"))
+    db.add_all([
+        SummaryChunk(session_id=long_session.id, position=i, first_message_id="a",
+                     last_message_id="b", message_count=20, summary="chunk")
+        for i in range(args.messages // 20)
+    ])
+    for other in others:
+        db.add_all([Message(session_id=other.id, role="user", content="keep") for _ in range(10)])
+    db.commit()
+    return long_session.id
+
+
+def run(name: str, delete: Callable[[SQLSession, str], None], args: argparse.Namespace) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        SQLModel.metadata.create_all(engine)
+        with SQLSession(engine) as db:
+            session_id = seed(db, args)
+        
+        with SQLSession(engine) as db:
+            tracemalloc.start()
+            started = time.perf_counter()
+            delete(db, session_id)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            left = db.exec(select(func.count()).select_from(Message)).one()
+        engine.dispose()
+    
+    return {"name": name, "seconds": elapsed, "peak MB": peak / (1024 * 1024), "messages left": left}
+
+
+def main(args: argparse.Namespace) -> None:
+    print(f"Deleting a {args.messages}-message session")
+    for name, delete in (("orm", orm_delete), ("set-based", set_delete)):
+        result = run(name, delete, args)
+        print("  " + "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                               for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--size", type=int, default=400)
+    main(parser.parse_args())
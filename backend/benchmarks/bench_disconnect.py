@@ -0,0 +1,113 @@
+"""Upstream tokens generated after clients disconnect from /api/chat.
+
+Starts the fake LLM server and the backend as subprocesses, opens N chat
+streams that each read a few events and then drop the connection (a closed
+tab), and reports how many tokens the fake LLM still produced for streams
+nobody was reading, plus how many truncated replies were saved:
+
+    cd backend
+    python -m benchmarks.bench_disconnect --streams 20 --read 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import List
+
+import httpx
+from sqlmodel import Session as SQLSession, SQLModel, create_engine, select
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app.models import Session, Message
+from .servers import free_port, run_server
+
+
+def seed_database(url: str, sessions: int) -> List[str]:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with SQLSession(engine) as db:
+        session_ids = []
+        for _ in range(sessions):
+            session = Session(title="bench")
+            db.add(session)
+            session_ids.append(session.id)
+        db.commit()
+    engine.dispose()
+    return session_ids
+
+
+def truncated_replies(url: str) -> int:
+    engine = create_engine(url)
+    with SQLSession(engine) as db:
+        count = len(db.exec(select(Message).where(Message.truncated == True)).all())  # noqa: E712
+    engine.dispose()
+    return count
+
+
+async def read_then_drop(client: httpx.AsyncClient, session_id: str, events: int) -> int:
+    received = 0
+    async with client.stream("POST", "/api/chat", json={"session_id": session_id, "text": "hello"}) as response:
+        async for line in response.aiter_lines():
+            payload = line
+            while payload.startswith("data: "):
+                payload = payload[6:]
+            if not payload or payload == line:
+                continue
+            if "data" in json.loads(payload):
+                received += 1
+            if received >= events:
+                break
+    return received
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        session_ids = seed_database(db_url, args.streams)
+        
+        llm_port, api_port = free_port(), free_port()
+        llm_env = {
+            "FAKE_LLM_TOKENS": str(args.tokens),
+            "FAKE_LLM_TOKEN_INTERVAL_MS": str(args.token_interval_ms),
+        }
+        api_env = {
+            "DATABASE_URL": db_url,
+            "LITELLM_URL": f"http://127.0.0.1:{llm_port}/v1/chat/completions",
+            "OPENAI_API_KEY": "bench",
+        }
+        
+        with run_server("benchmarks.fake_llm:app", llm_port, llm_env), \
+                run_server("app.main:app", api_port, api_env):
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{api_port}",
+                timeout=120.0,
+                limits=httpx.Limits(max_connections=args.streams)
+            ) as client:
+                read = sum(await asyncio.gather(*[
+                    read_then_drop(client, session_id, args.read) for session_id in session_ids
+                ]))
+            
+            # Long enough for an uncancelled upstream to finish every stream.
+            await asyncio.sleep(args.tokens * args.token_interval_ms / 1000 + 1)
+            stats = httpx.get(f"http://127.0.0.1:{llm_port}/stats").json()
+        
+        saved = truncated_replies(db_url)
+    
+    wasted = stats["tokens_sent"] - read
+    print(f"{args.streams} streams x {args.tokens} tokens, each dropped after {args.read} events")
+    print(f"{'tokens read':>16}: {read}")
+    print(f"{'tokens generated':>16}: {stats['tokens_sent']} ({stats['cancelled']} upstream streams cancelled)")
+    print(f"{'wasted':>16}: {wasted} ({wasted / max(1, args.streams * args.tokens):.1%} of the full replies)")
+    print(f"{'truncated saved':>16}: {saved}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-interval-ms", type=float, default=10)
+    parser.add_argument("--read", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
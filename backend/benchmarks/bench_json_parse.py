@@ -0,0 +1,98 @@
+"""Parse and encode cost per streamed token, replaying a recorded stream.
+
+benchmarks/data/litellm_stream.txt is a LiteLLM chat completion stream
+(one "data: {...}" chunk per token). Each strategy extracts the delta
+text from every line; the outgoing side encodes {"data": chunk} events.
+The last row streams the file through LLMService end to end.
+
+    cd backend
+    python -m benchmarks.bench_json_parse --rounds 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+import httpx
+
+from app import json_utils
+from app.services.llm_service import LLMService, parse_delta_content
+
+RECORDING = Path(__file__).parent / "data" / "litellm_stream.txt"
+
+
+def stdlib_delta(data: str) -> Optional[str]:
+    # The previous implementation.
+    chunk = json.loads(data)
+    if "choices" in chunk and len(chunk["choices"]) > 0:
+        return chunk["choices"][0].get("delta", {}).get("content")
+    return None
+
+
+def backend_delta(data: str) -> Optional[str]:
+    chunk = json_utils.loads(data)
+    return chunk["choices"][0].get("delta", {}).get("content") if chunk.get("choices") else None
+
+
+def per_token(func: Callable[[], int], rounds: int) -> float:
+    best = float("inf")
+    tokens = 1
+    for _ in range(rounds):
+        started = time.perf_counter()
+        tokens = func()
+        best = min(best, time.perf_counter() - started)
+    return best / tokens * 1e6
+
+
+async def stream_once(body: bytes) -> int:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+    async with httpx.AsyncClient(transport=transport) as client:
+        service = LLMService(client=client)
+        count = 0
+        async for _ in service.stream_chat_completion([{"role": "user", "content": "hi"}]):
+            count += 1
+        return count
+
+
+def main(args: argparse.Namespace) -> None:
+    body = RECORDING.read_bytes()
+    lines = [line[6:] for line in body.decode().splitlines() if line.startswith("data: ") and line != "data: [DONE]"]
+    texts: List[str] = [text for text in map(stdlib_delta, lines) if text]
+    
+    def parse_with(extract: Callable[[str], Optional[str]]) -> Callable[[], int]:
+        def run() -> int:
+            for line in lines:
+                extract(line)
+            return len(texts)
+        return run
+    
+    def encode_with(dumps: Callable[[object], str]) -> Callable[[], int]:
+        def run() -> int:
+            for text in texts:
+                dumps({"data": text})
+            return len(texts)
+        return run
+    
+    assert [text for text in map(parse_delta_content, lines) if text] == texts
+    
+    print(f"{len(texts)} tokens per stream, JSON backend: {json_utils.backend}, best of {args.rounds}")
+    print(f"  parse   stdlib json.loads      {per_token(parse_with(stdlib_delta), args.rounds):6.2f} us/token")
+    print(f"  parse   json_utils.loads       {per_token(parse_with(backend_delta), args.rounds):6.2f} us/token")
+    print(f"  parse   parse_delta_content    {per_token(parse_with(parse_delta_content), args.rounds):6.2f} us/token")
+    print(f"  encode  stdlib json.dumps      {per_token(encode_with(json.dumps), args.rounds):6.2f} us/token")
+    print(f"  encode  json_utils.dumps       {per_token(encode_with(json_utils.dumps), args.rounds):6.2f} us/token")
+    
+    stream_rounds = max(1, args.rounds // 10)
+    print(f"  stream  LLMService end to end  "
+          f"{per_token(lambda: asyncio.run(stream_once(body)), stream_rounds):6.2f} us/token")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,125 @@
+"""Building and persisting a very long streamed reply.
+
+First compares assembling a reply from many small deltas by repeated
+concatenation (as chat.py used to) with collecting a list and joining
+once. CPython can sometimes extend a local string in place, so both a
+local and an attribute accumulator are shown. Then runs
+generate_sse_events end to end over a fake upstream stream against a
+temporary SQLite file, with and without periodic checkpoints of the
+partial reply.
+
+    cd backend
+    python -m benchmarks.bench_long_response --deltas 20000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from sqlalchemy import event
+from sqlmodel import Session as SQLSession, SQLModel, select
+
+from app.api.chat import generate_sse_events
+from app.database import create_db_engine
+from app.models import Session, Message
+from app.services.llm_service import count_tokens
+
+
+class Reply:
+    def __init__(self):
+        self.text = ""
+
+
+def concat_local(deltas: List[str]) -> str:
+    text = ""
+    for delta in deltas:
+        text += delta
+    return text
+
+
+def concat_attribute(deltas: List[str]) -> str:
+    reply = Reply()
+    for delta in deltas:
+        reply.text += delta
+    return reply.text
+
+
+def join_once(deltas: List[str]) -> str:
+    parts = []
+    for delta in deltas:
+        parts.append(delta)
+    return "".join(parts)
+
+
+def time_builders(deltas: List[str]) -> None:
+    for builder in (concat_local, concat_attribute, join_once):
+        started = time.perf_counter()
+        builder(deltas)
+        print(f"  {builder.__name__:18s} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+
+async def stream_reply(db_path: Path, deltas: List[str], interval: float, checkpoint: float) -> None:
+    engine = create_db_engine(f"sqlite:///{db_path}")
+    SQLModel.metadata.create_all(engine)
+    writes = 0
+    
+    def count_writes(conn, cursor, statement, parameters, context, executemany):
+        nonlocal writes
+        if statement.startswith(("INSERT INTO message", "UPDATE message")):
+            writes += 1
+    
+    event.listen(engine, "before_cursor_execute", count_writes)
+    
+    async def fake_stream(self, messages):
+        for delta in deltas:
+            await asyncio.sleep(interval)
+            yield delta
+    
+    with SQLSession(engine) as db:
+        session = Session(title="bench")
+        db.add(session)
+        db.commit()
+        session_id = session.id
+        
+        with patch("app.services.llm_service.LLMService.stream_chat_completion", fake_stream):
+            cpu_started = time.process_time()
+            started = time.perf_counter()
+            async for _ in generate_sse_events(session_id, "hello", db, checkpoint_interval=checkpoint):
+                pass
+            elapsed = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+        
+        stored = db.exec(select(Message).where(Message.role == "assistant")).one()
+        assert stored.content == "".join(deltas)
+    engine.dispose()
+    
+    label = f"checkpoint every {checkpoint:g}s" if checkpoint else "no checkpoints"
+    print(f"  {label:24s} wall {elapsed:6.2f}s  cpu {cpu:6.2f}s  message writes {writes}")
+
+
+def main(args: argparse.Namespace) -> None:
+    deltas = [f" tok{i % 1000}" for i in range(args.deltas)]
+    reply_kb = len("".join(deltas)) / 1024
+    
+    print(f"Assembling {args.deltas} deltas ({reply_kb:.0f} KB)")
+    time_builders(deltas)
+    
+    count_tokens("warm up the tokenizer")
+    print(f"Streaming {args.deltas} deltas through generate_sse_events")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, checkpoint in enumerate((0.0, *args.checkpoints)):
+            asyncio.run(stream_reply(Path(tmp) / f"bench{i}.db", deltas, args.interval_ms / 1000, checkpoint))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deltas", type=int, default=20000)
+    parser.add_argument("--interval-ms", type=float, default=0)
+    parser.add_argument("--checkpoints", type=float, nargs="*", default=[1.0, 0.25])
+    main(parser.parse_args())
@@ -0,0 +1,130 @@
+"""Markdown to Notion block conversion over multi-megabyte documents.
+
+Compares a condensed copy of the previous line-by-line converter
+with NotionWriter.iter_notion_blocks, reporting throughput and the time
+to the first block, which is what lets exports start appending early.
+
+    cd backend
+    python -m benchmarks.bench_markdown --megabytes 4
+"""
+import argparse
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app.services.notion_writer import NotionWriter
+
+
+def legacy_parse_inline_formatting(text: str) -> List[Dict[str, Any]]:
+    rich_text = []
+    parts = re.split(r'(\*\*(.*?)\*\*|`([^`]+)`)', text)
+    for part in parts:
+        if not part:
+            continue
+        if part.startswith('**') and part.endswith('**') and len(part) > 4:
+            rich_text.append({"type": "text", "text": {"content": part[2:-2]}, "annotations": {"bold": True}})
+        elif part.startswith('`') and part.endswith('`') and len(part) > 2:
+            rich_text.append({"type": "text", "text": {"content": part[1:-1]}, "annotations": {"code": True}})
+        else:
+            rich_text.append({"type": "text", "text": {"content": part}})
+    return rich_text or [{"type": "text", "text": {"content": text}}]
+
+
+def legacy_markdown_to_notion_blocks(markdown: str) -> List[Dict[str, Any]]:
+    blocks = []
+    lines = markdown.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip()
+        if not line:
+            pass
+        elif line.startswith('# '):
+            blocks.append({"object": "block", "type": "heading_1",
+                           "heading_1": {"rich_text": [{"type": "text", "text": {"content": line[2:]}}]}})
+        elif line.startswith('## '):
+            blocks.append({"object": "block", "type": "heading_2",
+                           "heading_2": {"rich_text": [{"type": "text", "text": {"content": line[3:]}}]}})
+        elif line.startswith('- '):
+            blocks.append({"object": "block", "type": "bulleted_list_item",
+                           "bulleted_list_item": {"rich_text": legacy_parse_inline_formatting(line[2:])}})
+        elif line.startswith('```'):
+            code_lines = []
+            i += 1
+            while i < len(lines) and not lines[i].rstrip().startswith('```'):
+                code_lines.append(lines[i].rstrip())
+                i += 1
+            if code_lines:
+                blocks.append({"object": "block", "type": "code", "code": {
+                    "rich_text": [{"type": "text", "text": {"content": '\n'.join(code_lines)}}],
+                    "language": "plain text"}})
+        else:
+            blocks.append({"object": "block", "type": "paragraph",
+                           "paragraph": {"rich_text": legacy_parse_inline_formatting(line)}})
+        i += 1
+    return blocks
+
+
+SECTION = """## Section {n}
+
+Discussion of **item {n}** with `inline_code()` and a [reference](https://example.com/{n}) in *italics*.
+
+- Key point {n} about the **design** and `config.value`
+  - Nested detail with _emphasis_
+    - Deeper note
+1. First step
+2. Second step
+
+```
+def handler_{n}(request):
+    return process(request)
+```
+
+"""
+
+
+def build_document(megabytes: float) -> str:
+    parts = ["# Benchmark Document\n\n"]
+    size = 0
+    n = 0
+    while size < megabytes * 1024 * 1024:
+        section = SECTION.format(n=n)
+        parts.append(section)
+        size += len(section)
+        n += 1
+    return "".join(parts)
+
+
+def measure(name: str, convert: Callable[[str], Iterable[Dict[str, Any]]], markdown: str, rounds: int) -> None:
+    best = float("inf")
+    first = float("inf")
+    count = 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        blocks = iter(convert(markdown))
+        next(blocks)
+        first = min(first, time.perf_counter() - started)
+        count = 1 + sum(1 for _ in blocks)
+        best = min(best, time.perf_counter() - started)
+    
+    megabytes = len(markdown) / (1024 * 1024)
+    print(f"  {name:10s} {best * 1000:8.1f} ms  {megabytes / best:6.1f} MB/s  "
+          f"first block {first * 1000:7.3f} ms  {count} blocks")
+
+
+def main(args: argparse.Namespace) -> None:
+    writer = NotionWriter("bench", "parent")
+    markdown = build_document(args.megabytes)
+    
+    print(f"{len(markdown) / (1024 * 1024):.1f} MB markdown, best of {args.rounds}")
+    measure("legacy", legacy_markdown_to_notion_blocks, markdown, args.rounds)
+    measure("compiled", writer.iter_notion_blocks, markdown, args.rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--megabytes", type=float, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,148 @@
+"""Large Notion exports against the in-process fake Notion server.
+
+Compares the old synchronous export (Notion calls made directly on the
+event loop) with NotionWriter.create_notion_page, reporting wall time,
+requests, 429 responses and the longest event-loop stall seen by a
+concurrent ticker task. Then re-exports the same document with one
+section edited, comparing a fresh page against an incremental sync.
+
+    cd backend
+    python -m benchmarks.bench_notion_export --blocks 1500 --latency-ms 100
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from fastapi.testclient import TestClient
+
+from app.services.notion_writer import NotionWriter, TokenBucket, batched
+from .fake_notion import FakeNotion
+
+
+async def measure_loop_lag(task: Awaitable, interval: float = 0.01) -> float:
+    worst = 0.0
+    done = False
+    
+    async def ticker() -> None:
+        nonlocal worst
+        expected = time.perf_counter() + interval
+        while not done:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            worst = max(worst, now - expected)
+            expected = now + interval
+    
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        await task
+    finally:
+        done = True
+        await ticker_task
+    return worst
+
+
+async def blocking_export(writer: NotionWriter, title: str, markdown: str) -> None:
+    # The previous implementation: synchronous client calls on the loop.
+    blocks = writer.markdown_to_notion_blocks(markdown)
+    page = writer.client.pages.create(
+        parent={"page_id": writer.parent_page_id},
+        properties={"title": {"title": [{"type": "text", "text": {"content": title}}]}},
+        children=blocks[:100]
+    )
+    for batch in batched(blocks[100:]):
+        writer.client.blocks.children.append(block_id=page["id"], children=batch)
+
+
+async def async_export(writer: NotionWriter, title: str, markdown: str) -> None:
+    await writer.create_notion_page(title, markdown)
+
+
+async def run(
+    name: str,
+    export: Callable[[NotionWriter, str, str], Awaitable[None]],
+    args: argparse.Namespace
+) -> Dict[str, float]:
+    fake = FakeNotion(latency=args.latency_ms / 1000, rate_limit=args.server_rate_limit)
+    writer = NotionWriter(
+        "bench",
+        "parent",
+        http_client=TestClient(fake.app, base_url="https://api.notion.com"),
+        rate_limiter=TokenBucket(args.client_rate, int(args.client_rate))
+    )
+    markdown = "\n".join(
+        f"- **Item {i}** with `code` and some text to convert" if i % 3 else f"## Section {i}"
+        for i in range(args.blocks)
+    )
+    
+    started = time.perf_counter()
+    try:
+        lag = await measure_loop_lag(export(writer, "Benchmark", markdown))
+        error = ""
+    except Exception as e:
+        lag = float("nan")
+        error = type(e).__name__
+    elapsed = time.perf_counter() - started
+    
+    pages = list(fake.pages)
+    stored = len(fake.page_blocks(pages[0])) if pages else 0
+    return {
+        "name": name,
+        "wall s": elapsed,
+        "requests": len(fake.requests),
+        "429s": fake.rate_limited,
+        "blocks": stored,
+        "max loop stall ms": lag * 1000,
+        "error": error,
+    }
+
+
+async def resync(args: argparse.Namespace) -> None:
+    fake = FakeNotion()
+    writer = NotionWriter(
+        "bench",
+        "parent",
+        http_client=TestClient(fake.app, base_url="https://api.notion.com"),
+        rate_limiter=TokenBucket(1000, 1000)
+    )
+    markdown = "\n".join(
+        f"- **Item {i}** with `code` and some text to convert" if i % 3 else f"## Section {i}"
+        for i in range(args.blocks)
+    )
+    edited = markdown.replace("**Item 7**", "**Item 7 (revised)**").replace("## Section 30\n", "")
+    
+    first = await writer.create_notion_page("Benchmark", markdown)
+    
+    fake.requests.clear()
+    await writer.create_notion_page("Benchmark", edited)
+    recreate = len(fake.requests)
+    
+    fake.requests.clear()
+    await writer.sync_notion_page("Benchmark", edited, first["page_id"], first["blocks"])
+    print(f"re-export after a small edit: new page {recreate} requests, incremental sync {len(fake.requests)} requests")
+
+
+async def main(args: argparse.Namespace) -> None:
+    results: List[Dict[str, float]] = [
+        await run("blocking", blocking_export, args),
+        await run("async", async_export, args),
+    ]
+    
+    print(f"{args.blocks} blocks, {args.latency_ms:.0f}ms latency, server limit {args.server_rate_limit}/s")
+    for result in results:
+        print("  " + "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                               for key, value in result.items()))
+    
+    await resync(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=1500)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--server-rate-limit", type=float, default=3)
+    parser.add_argument("--client-rate", type=float, default=3)
+    asyncio.run(main(parser.parse_args()))
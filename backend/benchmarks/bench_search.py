@@ -0,0 +1,116 @@
+"""Full-text search latency over a large message table.
+
+Builds a SQLite database with N synthetic messages (words drawn from a
+Zipf-like vocabulary, so some terms are rare and some match a large share
+of all messages), indexes it, then times search_messages for rare, common
+and multi-word queries:
+
+    cd backend
+    python -m benchmarks.bench_search --messages 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlmodel import Session as SQLSession, SQLModel, create_engine
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app import models  # noqa: F401
+from app.search import ensure_search_index, search_messages
+
+VOCABULARY = [f"w{i}" for i in range(20000)]
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def populate(engine, messages: int, per_session: int, words: int) -> None:
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        sessions, rows = [], []
+        session_id = None
+        for i in range(messages):
+            if i % per_session == 0:
+                session_id = str(uuid.uuid4())
+                sessions.append({"id": session_id, "title": f"session {len(sessions)}", "created_at": start})
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": " ".join(rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=words)),
+                "created_at": start + timedelta(seconds=i),
+            })
+            if len(rows) == 50000:
+                flush(conn, sessions, rows)
+                sessions, rows = [], []
+        flush(conn, sessions, rows)
+
+
+def flush(conn, sessions, rows) -> None:
+    if sessions:
+        conn.execute(text("INSERT INTO session (id, title, created_at) VALUES (:id, :title, :created_at)"), sessions)
+    if rows:
+        conn.execute(text(
+            "INSERT INTO message (id, session_id, role, content, created_at, truncated) "
+            "VALUES (:id, :session_id, :role, :content, :created_at, 0)"
+        ), rows)
+
+
+def time_query(engine, query: str, repeat: int, limit: int):
+    timings = []
+    with SQLSession(engine) as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            results = search_messages(db, query, limit)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, len(results)
+
+
+def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(args.keep) if args.keep else Path(tmp) / "bench.db"
+        engine = create_engine(f"sqlite:///{path}")
+        SQLModel.metadata.create_all(engine)
+        
+        started = time.perf_counter()
+        populate(engine, args.messages, args.per_session, args.words)
+        print(f"inserted {args.messages} messages in {time.perf_counter() - started:.1f}s")
+        
+        # Creating the index backfills it, like on an existing database.
+        started = time.perf_counter()
+        ensure_search_index(engine)
+        print(f"built index in {time.perf_counter() - started:.1f}s")
+        
+        queries = {
+            "rare term": "w15000",
+            "mid term": "w500",
+            "common term": "w3",
+            "two terms": "w40 w90",
+            "prefix": "w123",
+        }
+        for name, query in queries.items():
+            timings, count = time_query(engine, query, args.repeat, args.limit)
+            print(
+                f"{name:>12} ({query!r}): p50={statistics.median(timings):7.2f}ms "
+                f"max={max(timings):7.2f}ms results={count}"
+            )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--per-session", type=int, default=200)
+    parser.add_argument("--words", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", help="Write the database here instead of a temporary file")
+    main(parser.parse_args())
@@ -0,0 +1,257 @@
+"""Service and endpoint timings over a synthetic database, with baselines.
+
+Builds a database with benchmarks.datagen at the chosen scale (10k, 100k or
+1M messages; --cache-dir keeps a template so later runs just copy it) and
+times the paths whose cost grows with history: paging through the largest
+session, listing sessions, the startup token-count backfill scan, loading
+and chunking a session for summarization, converting a long summary to
+Notion blocks and deleting sessions. Each case runs for several rounds and
+is reported pytest-benchmark style (min/median/mean/stddev).
+
+--save stores the results as the baseline for that scale under
+benchmarks/baselines/; --compare checks the run against it and exits 1 if
+a case's fastest round is more than --tolerance slower (the minimum is far
+steadier than the median on a busy machine). Baselines are only
+comparable on the machine that recorded them, so re-save them there:
+
+    cd backend
+    python -m benchmarks.bench_services --scale 10k --compare
+    python -m benchmarks.bench_services --scale 1m --cache-dir /tmp/bench-dbs --save
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.engine import Engine
+from sqlmodel import Session as SQLSession, create_engine, func, select
+
+from app.api.pagination import encode_cursor
+from app.database import backfill_token_counts, create_db_engine, get_session
+from app.main import app
+from app.models import Session, Message
+from app.services.notion_writer import NotionWriter
+from app.services.session_summary import load_summary_inputs
+from app.services.summarizer import SummarizerService
+from .datagen import SIZES, generate
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def build_database(path: Path, args: argparse.Namespace) -> None:
+    messages = SCALES[args.scale]
+    if args.cache_dir:
+        template = Path(args.cache_dir) / f"services-{args.scale}-{args.sizes}-{args.seed}.db"
+        if not template.exists():
+            template.parent.mkdir(parents=True, exist_ok=True)
+            generate_file(template, messages, args)
+        shutil.copyfile(template, path)
+    else:
+        generate_file(path, messages, args)
+
+
+def generate_file(path: Path, messages: int, args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    engine = create_engine(f"sqlite:///{path}")
+    generate(engine, messages, max(1, messages // 200), args.sizes, seed=args.seed)
+    engine.dispose()
+    print(f"Generated {messages} messages in {time.perf_counter() - started:.1f}s")
+
+
+def summary_markdown(messages: List[Dict[str, Any]]) -> str:
+    # A summary document as long as the session: a heading per 20 turns and
+    # a bullet per message.
+    lines = ["# Session summary", ""]
+    for i, message in enumerate(messages):
+        if i % 20 == 0:
+            lines += ["", f"## Part {i // 20 + 1}", ""]
+        lines.append(f"- **{message['role']}**: {message['content'][:80]}")
+    return "\n".join(lines) + "\n"
+
+
+def measure(func: Callable[[int], Any], rounds: int, warmup: bool = True) -> Dict[str, float]:
+    if warmup:
+        func(-1)
+    timings = []
+    for i in range(rounds):
+        started = time.perf_counter()
+        func(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "rounds": rounds,
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+        "stddev_ms": round(statistics.stdev(timings), 3) if rounds > 1 else 0.0,
+    }
+
+
+def run_cases(engine: Engine, rounds: int) -> Dict[str, Dict[str, float]]:
+    def get_session_override():
+        with SQLSession(engine) as db:
+            yield db
+    
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    
+    with SQLSession(engine) as db:
+        # datagen creates the largest session first.
+        session_ids = list(db.exec(select(Session.id).order_by(Session.created_at)).all())
+        largest = session_ids[0]
+        size = db.exec(select(func.count()).select_from(Message).where(Message.session_id == largest)).one()
+        middle = db.exec(
+            select(Message).where(Message.session_id == largest)
+            .order_by(Message.created_at, Message.id).offset(size // 2).limit(1)
+        ).one()
+        cursor = encode_cursor(middle)
+        _, messages, _ = load_summary_inputs(db, largest)
+    
+    def get(path: str, **params: str) -> Callable[[int], None]:
+        def call(_: int) -> None:
+            response = client.get(path, params=params)
+            assert response.status_code == 200, response.text
+        return call
+    
+    def load_inputs(_: int) -> None:
+        with SQLSession(engine) as db:
+            load_summary_inputs(db, largest)
+    
+    summarizer = SummarizerService()
+    writer = NotionWriter("bench", "parent")
+    markdown = summary_markdown(messages)
+    
+    # Deletes use up a session per round: typical ones from the end of the
+    # list, then the largest once.
+    victims = session_ids[-rounds:]
+    
+    def delete(session_ids: List[str]) -> Callable[[int], None]:
+        def call(i: int) -> None:
+            response = client.delete(f"/api/sessions/{session_ids[i]}")
+            assert response.status_code == 200, response.text
+        return call
+    
+    results = {}
+    cases = [
+        ("get_messages.latest_page", get(f"/api/sessions/{largest}/messages"), rounds, True),
+        ("get_messages.middle_page", get(f"/api/sessions/{largest}/messages", before=cursor), rounds, True),
+        ("list_sessions.first_page", get("/api/sessions"), rounds, True),
+        ("backfill_token_counts.scan", lambda _: backfill_token_counts(engine), rounds, True),
+        ("load_summary_inputs.largest", load_inputs, rounds, True),
+        ("chunk_messages.largest", lambda _: summarizer.chunk_messages(messages), rounds, True),
+        ("markdown_to_notion_blocks.largest", lambda _: writer.markdown_to_notion_blocks(markdown), rounds, True),
+        ("delete_session.typical", delete(victims), len(victims), False),
+        ("delete_session.largest", delete([largest]), 1, False),
+    ]
+    for name, case, case_rounds, warmup in cases:
+        results[name] = measure(case, case_rounds, warmup)
+        print(f"  {name:36s} median {results[name]['median_ms']:10.2f} ms", file=sys.stderr)
+    
+    app.dependency_overrides.clear()
+    print(
+        f"Largest session: {size} messages, summary markdown {len(markdown) / 1e6:.1f} MB, "
+        f"{len(summarizer.chunk_messages(messages))} chunks"
+    )
+    return results
+
+
+def baseline_path(args: argparse.Namespace) -> Path:
+    return BASELINE_DIR / f"services-{args.scale}.json"
+
+
+def report(
+    results: Dict[str, Dict[str, float]],
+    baseline: Optional[Dict[str, Any]],
+    tolerance: float,
+    min_delta_ms: float
+) -> List[str]:
+    regressions = []
+    header = f"{'case':36s} {'rounds':>6} {'min':>10} {'median':>10} {'mean':>10} {'stddev':>9}"
+    if baseline:
+        header += f" {'base min':>10} {'change':>8}"
+    print(header + "   (ms)")
+    for name, result in results.items():
+        line = (
+            f"{name:36s} {result['rounds']:>6} {result['min_ms']:10.2f} {result['median_ms']:10.2f} "
+            f"{result['mean_ms']:10.2f} {result['stddev_ms']:9.2f}"
+        )
+        previous = baseline["results"].get(name) if baseline else None
+        if previous:
+            change = result["min_ms"] / previous["min_ms"] - 1 if previous["min_ms"] else 0.0
+            line += f" {previous['min_ms']:10.2f} {change:+8.1%}"
+            # Sub-millisecond cases are mostly noise in relative terms.
+            if change > tolerance and result["min_ms"] - previous["min_ms"] > min_delta_ms:
+                line += "  REGRESSION"
+                regressions.append(f"{name}: {previous['min_ms']:.2f} -> {result['min_ms']:.2f} ms ({change:+.0%})")
+        print(line)
+    return regressions
+
+
+def main(args: argparse.Namespace) -> int:
+    # The app logs every TestClient request through httpx.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "services.db"
+        build_database(path, args)
+        engine = create_db_engine(f"sqlite:///{path}")
+        try:
+            results = run_cases(engine, args.rounds)
+        finally:
+            engine.dispose()
+    
+    baseline = None
+    if args.compare:
+        if not baseline_path(args).exists():
+            print(f"No baseline at {baseline_path(args)}; run with --save first", file=sys.stderr)
+            return 1
+        baseline = json.loads(baseline_path(args).read_text())
+        if baseline.get("sizes") != args.sizes or baseline.get("seed") != args.seed:
+            print("Baseline was recorded with different --sizes/--seed", file=sys.stderr)
+    
+    print(f"\n{SCALES[args.scale]} messages ({args.sizes}), {args.rounds} rounds")
+    regressions = report(results, baseline, args.tolerance, args.min_delta_ms)
+    
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        baseline_path(args).write_text(json.dumps({
+            "scale": args.scale,
+            "messages": SCALES[args.scale],
+            "sizes": args.sizes,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"Saved baseline to {baseline_path(args)}")
+    
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--sizes", choices=SIZES, default="chat")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--cache-dir", help="keep generated databases here and reuse them")
+    parser.add_argument("--save", action="store_true", help="store the results as this scale's baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,141 @@
+"""Write/read contention on the Message table under each storage profile.
+
+Writer threads append messages (one commit per message, like a chat turn)
+while reader threads run the newest-first context query. Each profile runs
+against a fresh SQLite file:
+
+    cd backend
+    python -m benchmarks.bench_sqlite_contention --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session as SQLSession, SQLModel, select
+
+from app.config import settings
+from app.database import create_db_engine
+from app.models import Session, Message
+
+PROFILES: Dict[str, Dict[str, object]] = {
+    # SQLite defaults: rollback journal, synchronous=FULL, no busy wait
+    # beyond the driver's 5s timeout.
+    "default": {"sqlite_tuning_enabled": False},
+    "production": {"sqlite_tuning_enabled": True},
+}
+
+
+def run_profile(name: str, args: argparse.Namespace) -> Dict[str, float]:
+    for key, value in PROFILES[name].items():
+        setattr(settings, key, value)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        SQLModel.metadata.create_all(engine)
+        
+        with SQLSession(engine) as db:
+            sessions = [Session(title="bench") for _ in range(args.writers)]
+            db.add_all(sessions)
+            db.commit()
+            session_ids = [session.id for session in sessions]
+            for session_id in session_ids:
+                db.add_all([
+                    Message(session_id=session_id, role="user", content="x" * args.size, token_count=10)
+                    for _ in range(args.seed)
+                ])
+            db.commit()
+        
+        stop = threading.Event()
+        writes: List[float] = []
+        reads: List[float] = []
+        errors: List[str] = []
+        lock = threading.Lock()
+        
+        def writer(session_id: str) -> None:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with SQLSession(engine) as db:
+                        db.add(Message(session_id=session_id, role="assistant", content="y" * args.size, token_count=10))
+                        db.commit()
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e.orig))
+                    continue
+                with lock:
+                    writes.append(time.perf_counter() - started)
+        
+        def reader(session_id: str) -> None:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with SQLSession(engine) as db:
+                        statement = select(Message).where(
+                            Message.session_id == session_id
+                        ).order_by(Message.created_at.desc()).limit(50)
+                        db.exec(statement).all()
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e.orig))
+                    continue
+                with lock:
+                    reads.append(time.perf_counter() - started)
+        
+        threads = [
+            threading.Thread(target=writer, args=(session_ids[i % len(session_ids)],))
+            for i in range(args.writers)
+        ] + [
+            threading.Thread(target=reader, args=(session_ids[i % len(session_ids)],))
+            for i in range(args.readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+    
+    def p(values: List[float], pct: float) -> float:
+        if not values:
+            return float("nan")
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000
+    
+    return {
+        "writes/s": len(writes) / args.seconds,
+        "reads/s": len(reads) / args.seconds,
+        "write p50 ms": p(writes, 50),
+        "write p99 ms": p(writes, 99),
+        "read p50 ms": p(reads, 50),
+        "read p99 ms": p(reads, 99),
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=2000, help="messages per session before the run")
+    parser.add_argument("--size", type=int, default=500, help="message size in characters")
+    args = parser.parse_args()
+    
+    results = {name: run_profile(name, args) for name in PROFILES}
+    
+    metrics = list(next(iter(results.values())))
+    print(f"{'':>14}" + "".join(f"{name:>14}" for name in results))
+    for metric in metrics:
+        print(f"{metric:>14}" + "".join(f"{results[name][metric]:>14.1f}" for name in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Import and startup time of the backend, checked against a budget.
+
+Each run starts a fresh interpreter that imports app.main, then runs the
+application lifespan (tables, tokenizer warm-up, pools) against a
+throwaway SQLite file and counts tokens once. It reports the median import
+time, time until the app is ready to serve and the cost of that first
+token count, plus the slowest imports app.main makes per `python -X importtime`.
+
+Network access is pointed at a dead proxy, so a tokenizer that would have
+to be downloaded fails instead of stalling. The exit status is 1 if a
+median exceeds its budget or tiktoken/notion_client are loaded at import:
+
+    cd backend
+    python -m benchmarks.bench_startup --runs 5 --import-budget-ms 1500 --ready-budget-ms 2500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .servers import BACKEND_DIR
+
+DEFERRED = ("tiktoken", "notion_client")
+
+PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+eager = [name for name in {DEFERRED!r} if name in sys.modules]
+from fastapi.testclient import TestClient
+from app.services.llm_service import count_tokens
+lifespan_started = time.perf_counter()
+with TestClient(app.main.app):
+    ready = time.perf_counter()
+    count_tokens("The first message of the day")
+    counted = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - lifespan_started) * 1000,
+    "first_count_ms": (counted - ready) * 1000,
+    "eager": eager,
+}}))
+"""
+
+
+def probe_env(tmp: Path) -> Dict[str, str]:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "DATABASE_URL": f"sqlite:///{tmp / 'startup.db'}",
+        "LLM_CACHE_PATH": str(tmp / "llm_cache.db"),
+        "HTTP_PROXY": "http://127.0.0.1:9",
+        "HTTPS_PROXY": "http://127.0.0.1:9",
+    }
+    # Measure the bundled tokenizer, not whatever cache this shell points at.
+    env.pop("TIKTOKEN_CACHE_DIR", None)
+    return env
+
+
+def run_probe(env: Dict[str, str]) -> Dict[str, object]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: Dict[str, str], top: int) -> List[Tuple[str, int]]:
+    # Direct imports of app.main with their cumulative microseconds. The
+    # tree lists a module's imports (indented one level deeper) just
+    # before the module itself.
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    children: List[Tuple[str, int]] = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 1:
+            children.append((name.strip(), int(parts[1])))
+        elif depth == 0:
+            if name == "app.main":
+                break
+            children = []
+    return sorted(children, key=lambda entry: -entry[1])[:top]
+
+
+def main(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = probe_env(Path(tmp))
+        # Untimed run so the .pyc files are written.
+        run_probe(env)
+        runs = [run_probe(env) for _ in range(args.runs)]
+        imports = slowest_imports(env, args.top)
+    
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    lifespan_ms = statistics.median(run["lifespan_ms"] for run in runs)
+    ready_ms = statistics.median(run["import_ms"] + run["lifespan_ms"] for run in runs)
+    first_count_ms = statistics.median(run["first_count_ms"] for run in runs)
+    eager = sorted({name for run in runs for name in run["eager"]})
+    
+    print(f"median of {args.runs} fresh interpreters")
+    print(f"{'import app.main':>20}: {import_ms:8.1f} ms  (budget {args.import_budget_ms:g} ms)")
+    print(f"{'lifespan':>20}: {lifespan_ms:8.1f} ms")
+    print(f"{'ready to serve':>20}: {ready_ms:8.1f} ms  (budget {args.ready_budget_ms:g} ms)")
+    print(f"{'first token count':>20}: {first_count_ms:8.2f} ms")
+    print(f"{'loaded at import':>20}: {', '.join(eager) or 'none of ' + ', '.join(DEFERRED)}")
+    print("\nslowest imports made by app.main (cumulative, -X importtime):")
+    for name, microseconds in imports:
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+    
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import took {import_ms:.0f} ms, budget {args.import_budget_ms:g} ms")
+    if ready_ms > args.ready_budget_ms:
+        failures.append(f"startup took {ready_ms:.0f} ms, budget {args.ready_budget_ms:g} ms")
+    if eager:
+        failures.append(f"{', '.join(eager)} imported eagerly by app.main")
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--ready-budget-ms", type=float, default=2500)
+    sys.exit(main(parser.parse_args()))
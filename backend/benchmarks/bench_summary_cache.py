@@ -0,0 +1,82 @@
+"""Re-summarizing a session with and without the LLM response cache.
+
+Starts the fake LLM server as a subprocess (each non-streamed completion
+takes tokens x token-interval), then summarizes the same synthetic session
+several times in-process and reports the wall time of each run and the
+cache's hit/miss counters:
+
+    cd backend
+    python -m benchmarks.bench_summary_cache --messages 200 --runs 3
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app.config import settings
+from app.services import response_cache
+from app.services.llm_service import init_http_client, close_http_client
+from app.services.summarizer import SummarizerService
+from .servers import free_port, run_server
+
+
+def synthetic_messages(count: int):
+    return [
+        {
+            "id": f"m{i}",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"message {i}: " + "lorem ipsum dolor sit amet " * 40,
+        }
+        for i in range(count)
+    ]
+
+
+async def summarize(messages) -> float:
+    started = time.perf_counter()
+    async with SummarizerService() as summarizer:
+        await summarizer.summarize_session(messages)
+    return time.perf_counter() - started
+
+
+async def main(args: argparse.Namespace) -> None:
+    messages = synthetic_messages(args.messages)
+    llm_port = free_port()
+    llm_env = {
+        "FAKE_LLM_TOKENS": str(args.tokens),
+        "FAKE_LLM_TOKEN_INTERVAL_MS": str(args.token_interval_ms),
+    }
+    settings.litellm_url = f"http://127.0.0.1:{llm_port}/v1/chat/completions"
+    
+    with tempfile.TemporaryDirectory() as tmp, run_server("benchmarks.fake_llm:app", llm_port, llm_env):
+        settings.llm_cache_path = str(Path(tmp) / "llm_cache.db")
+        await init_http_client()
+        try:
+            for cached in (False, True):
+                settings.llm_cache_enabled = cached
+                response_cache.init_response_cache()
+                timings = [await summarize(messages) for _ in range(args.runs)]
+                stats = response_cache.get_cache_stats()
+                response_cache.close_response_cache()
+                
+                runs = " ".join(f"{t:6.2f}s" for t in timings)
+                print(f"{'cache' if cached else 'no cache':>9}: {runs}")
+                if cached:
+                    print(
+                        f"{'':>9}  hits={stats['hits']} misses={stats['misses']} "
+                        f"saved={stats['saved_seconds']:.2f}s entries={stats['entries']}"
+                    )
+        finally:
+            await close_http_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--token-interval-ms", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+"""Synthetic chat database generator for benchmarks.
+
+Fills a SQLite file with --sessions sessions holding --messages messages in
+total. One session gets a --largest share of them (the long-running
+conversation that stresses per-session paths); the rest are split evenly.
+Message lengths follow --sizes:
+
+    fixed   every message has --words words
+    chat    log-normal around --words, with a long tail of big replies
+    heavy   chat, plus 5% markdown/code-heavy messages 20x longer
+
+Words come from a Zipf-like vocabulary, so full-text queries see both rare
+and very common terms. token_count is filled in (estimated from the word
+count) as it is for every message the app stores. Output is deterministic
+for a given --seed.
+
+    cd backend
+    python -m benchmarks.datagen --out big.db --messages 1000000 --sessions 5000 --sizes chat
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel, create_engine
+
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from app import models  # noqa: F401
+from app.search import ensure_search_index
+
+SIZES = ("fixed", "chat", "heavy")
+BATCH = 50000
+HEAVY_SHARE = 0.05
+
+VOCABULARY = [f"w{i}" for i in range(20000)]
+CUMULATIVE_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+# Token counts are estimated rather than counted: tiktoken over a million
+# messages would dominate generation time, and nothing benchmarked depends
+# on the exact figure.
+TOKENS_PER_WORD = 1.3
+
+
+def word_count(rng: random.Random, sizes: str, words: int) -> int:
+    if sizes == "fixed":
+        return words
+    # Median of `words`; sigma 1 puts the 99th percentile near 10x that.
+    count = int(rng.lognormvariate(math.log(words), 1.0))
+    return max(1, min(count, words * 50))
+
+
+def message_content(rng: random.Random, count: int, heavy: bool) -> str:
+    body = " ".join(rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=count))
+    if not heavy:
+        return body
+    # Roughly what a long assistant answer looks like: headings, bullets
+    # and a fenced code block around the same words.
+    words = body.split(" ")
+    third = max(1, len(words) // 3)
+    return (
+        f"## {' '.join(words[:3])}\n\n"
+        + "\n".join(f"- {' '.join(words[i:i + 8])}" for i in range(3, third, 8))
+        + "\n\n```\n"
+        + "\n".join(" ".join(words[i:i + 10]) for i in range(third, len(words), 10))
+        + "\n```\n"
+    )
+
+
+def session_sizes(messages: int, sessions: int, largest: float) -> List[int]:
+    if sessions == 1:
+        return [messages]
+    first = max(1, int(messages * largest))
+    rest, extra = divmod(messages - first, sessions - 1)
+    return [first] + [rest + (1 if i < extra else 0) for i in range(sessions - 1)]
+
+
+def generate(
+    engine: Engine,
+    messages: int,
+    sessions: int,
+    sizes: str = "chat",
+    words: int = 40,
+    largest: float = 0.1,
+    seed: int = 1,
+    search_index: bool = True
+) -> Dict[str, Any]:
+    # Returns the session ids (the largest first) and the number of rows.
+    rng = random.Random(seed)
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    session_ids: List[str] = []
+    created = 0
+    
+    with engine.begin() as conn:
+        session_rows, rows = [], []
+        for index, count in enumerate(session_sizes(messages, sessions, largest)):
+            session_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            session_started = start + timedelta(minutes=index)
+            session_ids.append(session_id)
+            session_rows.append({"id": session_id, "title": f"session {index}", "created_at": session_started})
+            for i in range(count):
+                heavy = sizes == "heavy" and rng.random() < HEAVY_SHARE
+                content_words = words * 20 if heavy else word_count(rng, sizes, words)
+                rows.append({
+                    "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                    "session_id": session_id,
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "content": message_content(rng, content_words, heavy),
+                    "token_count": int(content_words * TOKENS_PER_WORD),
+                    "created_at": session_started + timedelta(seconds=i),
+                })
+                if len(rows) == BATCH:
+                    flush(conn, session_rows, rows)
+                    created += len(rows)
+                    session_rows, rows = [], []
+        flush(conn, session_rows, rows)
+        created += len(rows)
+    
+    if search_index:
+        ensure_search_index(engine)
+    
+    return {"session_ids": session_ids, "messages": created}
+
+
+def flush(conn, sessions: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> None:
+    if sessions:
+        conn.execute(text("INSERT INTO session (id, title, created_at) VALUES (:id, :title, :created_at)"), sessions)
+    if rows:
+        conn.execute(text(
+            "INSERT INTO message (id, session_id, role, content, token_count, created_at, truncated) "
+            "VALUES (:id, :session_id, :role, :content, :token_count, :created_at, 0)"
+        ), rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="SQLite file to create")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, help="default: one per 200 messages")
+    parser.add_argument("--sizes", choices=SIZES, default="chat")
+    parser.add_argument("--words", type=int, default=40, help="typical words per message")
+    parser.add_argument("--largest", type=float, default=0.1, help="share of messages in the largest session")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-search-index", action="store_true")
+    args = parser.parse_args()
+    
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} already exists")
+    sessions = args.sessions or max(1, args.messages // 200)
+    engine = create_engine(f"sqlite:///{args.out}")
+    started = time.perf_counter()
+    result = generate(
+        engine, args.messages, sessions, args.sizes, args.words, args.largest, args.seed,
+        search_index=not args.no_search_index
+    )
+    engine.dispose()
+    print(
+        f"Wrote {result['messages']} messages in {len(result['session_ids'])} sessions "
+        f"to {args.out} in {time.perf_counter() - started:.1f}s "
+        f"({os.path.getsize(args.out) / 1e6:.0f} MB)"
+    )
@@ -0,0 +1,144 @@
+"""OpenAI-compatible stand-in for the LiteLLM proxy, so benchmarks run offline.
+
+Behaviour is controlled through environment variables (or the equivalent
+flags when run directly):
+    
+    FAKE_LLM_TOKENS              mean reply length in tokens (default 100)
+    FAKE_LLM_TOKENS_JITTER       +/- fraction applied to the length (default 0)
+    FAKE_LLM_TTFT_MS             delay before the first token (default 0)
+    FAKE_LLM_TOKENS_PER_SECOND   streaming rate; overrides the interval below
+    FAKE_LLM_TOKEN_INTERVAL_MS   delay between tokens (default 5)
+    FAKE_LLM_ERROR_RATE          fraction of requests answered with a 500
+    FAKE_LLM_MIDSTREAM_ERROR_RATE fraction of streams cut off halfway
+    FAKE_LLM_SEED                seed for the random choices above
+    
+    cd backend
+    python -m benchmarks.fake_llm --port 4000 --ttft-ms 300 --tokens-per-second 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TOKENS = int(os.environ.get("FAKE_LLM_TOKENS", "100"))
+TOKENS_JITTER = float(os.environ.get("FAKE_LLM_TOKENS_JITTER", "0"))
+TTFT = float(os.environ.get("FAKE_LLM_TTFT_MS", "0")) / 1000
+TOKEN_INTERVAL = float(os.environ.get("FAKE_LLM_TOKEN_INTERVAL_MS", "5")) / 1000
+if os.environ.get("FAKE_LLM_TOKENS_PER_SECOND"):
+    TOKEN_INTERVAL = 1 / float(os.environ["FAKE_LLM_TOKENS_PER_SECOND"])
+ERROR_RATE = float(os.environ.get("FAKE_LLM_ERROR_RATE", "0"))
+MIDSTREAM_ERROR_RATE = float(os.environ.get("FAKE_LLM_MIDSTREAM_ERROR_RATE", "0"))
+
+rng = random.Random(int(os.environ["FAKE_LLM_SEED"]) if os.environ.get("FAKE_LLM_SEED") else None)
+
+app = FastAPI()
+
+# Tokens actually written to clients, so benchmarks can see how much of a
+# stream was generated after the reader went away.
+stats = {"streams": 0, "tokens_sent": 0, "cancelled": 0, "errors": 0, "completions": 0}
+
+
+def _chunk(content: str) -> str:
+    payload = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "fake",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    }
+    # Compact, like the real upstream.
+    return f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+def _reply_length() -> int:
+    if TOKENS_JITTER <= 0:
+        return TOKENS
+    spread = TOKENS * TOKENS_JITTER
+    return max(1, round(rng.uniform(TOKENS - spread, TOKENS + spread)))
+
+
+def _error() -> JSONResponse:
+    stats["errors"] += 1
+    return JSONResponse(
+        {"error": {"message": "Injected failure", "type": "server_error"}},
+        status_code=500,
+    )
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    tokens = _reply_length()
+    
+    if ERROR_RATE and rng.random() < ERROR_RATE:
+        await asyncio.sleep(TTFT)
+        return _error()
+    
+    if not body.get("stream"):
+        await asyncio.sleep(TTFT + TOKEN_INTERVAL * tokens)
+        stats["completions"] += 1
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "model": "fake",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(["token"] * tokens)},
+                "finish_reason": "stop",
+            }],
+        }
+    
+    cut_off = tokens // 2 if MIDSTREAM_ERROR_RATE and rng.random() < MIDSTREAM_ERROR_RATE else None
+    
+    async def stream():
+        stats["streams"] += 1
+        try:
+            await asyncio.sleep(TTFT)
+            for i in range(tokens):
+                if i == cut_off:
+                    stats["errors"] += 1
+                    raise ConnectionError("Injected mid-stream failure")
+                if i:
+                    await asyncio.sleep(TOKEN_INTERVAL)
+                yield _chunk(f" tok{i}")
+                stats["tokens_sent"] += 1
+            yield "data: [DONE]\n\n"
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+    
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--tokens", type=int)
+    parser.add_argument("--tokens-jitter", type=float)
+    parser.add_argument("--ttft-ms", type=float)
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--token-interval-ms", type=float)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--midstream-error-rate", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    
+    # Flags become the environment the app reads, so uvicorn's import of
+    # this module sees them.
+    for name, value in vars(args).items():
+        if name not in ("host", "port") and value is not None:
+            os.environ[f"FAKE_LLM_{name.upper()}"] = str(value)
+    uvicorn.run("benchmarks.fake_llm:app", host=args.host, port=args.port, log_level="warning")
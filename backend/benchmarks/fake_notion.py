@@ -0,0 +1,175 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# In-memory stand-in for the parts of the Notion API that NotionWriter uses.
+# It enforces a request rate like Notion does (429 + Retry-After) so the
+# writer's limiter and retry logic can be exercised offline.
+
+
+class FakeNotion:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit: Optional[float] = None,
+        fail_first: int = 0,
+        fail_status: int = 503
+    ):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        # The first fail_first requests get fail_status without being applied.
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[Dict[str, Any]]] = {}
+        self.blocks: Dict[str, Dict[str, Any]] = {}
+        self.parents: Dict[str, str] = {}
+        self.requests: List[str] = []
+        self.rate_limited = 0
+        self.recent: Deque[float] = deque()
+        self.app = self.create_app()
+    
+    def _throttle(self) -> Optional[JSONResponse]:
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            code = "service_unavailable" if self.fail_status == 503 else "internal_server_error"
+            return JSONResponse(
+                {"object": "error", "status": self.fail_status, "code": code, "message": "Try again"},
+                status_code=self.fail_status,
+            )
+        
+        if self.rate_limit is None:
+            return None
+        
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] >= 1.0:
+            self.recent.popleft()
+        if len(self.recent) >= self.rate_limit:
+            self.rate_limited += 1
+            retry_after = 1.0 - (now - self.recent[0])
+            return JSONResponse(
+                {"object": "error", "status": 429, "code": "rate_limited", "message": "Rate limited"},
+                status_code=429,
+                headers={"Retry-After": f"{retry_after:.3f}"},
+            )
+        self.recent.append(now)
+        return None
+    
+    def _store_children(self, parent_id: str, blocks: List[Dict[str, Any]], after: Optional[str] = None):
+        stored = []
+        for block in blocks:
+            block = {**block, "id": str(uuid.uuid4()), "object": "block"}
+            nested = block.get(block["type"], {}).pop("children", None)
+            block["has_children"] = bool(nested)
+            if nested:
+                self._store_children(block["id"], nested)
+            self.blocks[block["id"]] = block
+            self.parents[block["id"]] = parent_id
+            stored.append(block)
+        
+        siblings = self.children.setdefault(parent_id, [])
+        if after is None:
+            siblings.extend(stored)
+        else:
+            index = next(i for i, b in enumerate(siblings) if b["id"] == after) + 1
+            siblings[index:index] = stored
+        return stored
+    
+    def _not_found(self) -> JSONResponse:
+        return JSONResponse(
+            {"object": "error", "status": 404, "code": "object_not_found", "message": "Not found"},
+            status_code=404,
+        )
+    
+    def create_app(self) -> FastAPI:
+        app = FastAPI()
+        
+        @app.middleware("http")
+        async def record(request: Request, call_next):
+            self.requests.append(f"{request.method} {request.url.path}")
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            throttled = self._throttle()
+            if throttled is not None:
+                return throttled
+            return await call_next(request)
+        
+        @app.post("/v1/pages")
+        async def create_page(request: Request):
+            body = await request.json()
+            page_id = str(uuid.uuid4())
+            self.pages[page_id] = {
+                "object": "page",
+                "id": page_id,
+                "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+                "parent": body["parent"],
+                "properties": body["properties"],
+                "archived": False,
+            }
+            self._store_children(page_id, body.get("children", []))
+            return self.pages[page_id]
+        
+        @app.get("/v1/pages/{page_id}")
+        async def retrieve_page(page_id: str):
+            if page_id not in self.pages:
+                return self._not_found()
+            return self.pages[page_id]
+        
+        @app.patch("/v1/pages/{page_id}")
+        async def update_page(page_id: str, request: Request):
+            if page_id not in self.pages:
+                return self._not_found()
+            body = await request.json()
+            self.pages[page_id].update(body)
+            return self.pages[page_id]
+        
+        @app.patch("/v1/blocks/{block_id}")
+        async def update_block(block_id: str, request: Request):
+            block = self.blocks.get(block_id)
+            if block is None:
+                return self._not_found()
+            body = await request.json()
+            block[block["type"]].update(body[block["type"]])
+            return block
+        
+        @app.delete("/v1/blocks/{block_id}")
+        async def delete_block(block_id: str):
+            block = self.blocks.pop(block_id, None)
+            if block is None:
+                return self._not_found()
+            siblings = self.children[self.parents.pop(block_id)]
+            siblings[:] = [b for b in siblings if b["id"] != block_id]
+            return {**block, "archived": True}
+        
+        @app.patch("/v1/blocks/{block_id}/children")
+        async def append_children(block_id: str, request: Request):
+            body = await request.json()
+            stored = self._store_children(block_id, body["children"], body.get("after"))
+            return {"object": "list", "results": stored, "has_more": False, "next_cursor": None}
+        
+        @app.get("/v1/blocks/{block_id}/children")
+        async def list_children(block_id: str):
+            return {"object": "list", "results": self.children.get(block_id, []), "has_more": False, "next_cursor": None}
+        
+        return app
+    
+    def page_blocks(self, page_id: str) -> List[Dict[str, Any]]:
+        return self.children.get(page_id, [])
+
+
+def create_app() -> FastAPI:
+    # Entry point for running the fake as a standalone server, e.g.
+    #   uvicorn benchmarks.fake_notion:app --port 4010
+    return FakeNotion(
+        latency=float(os.environ.get("FAKE_NOTION_LATENCY_MS", "0")) / 1000,
+        rate_limit=float(os.environ["FAKE_NOTION_RATE_LIMIT"]) if os.environ.get("FAKE_NOTION_RATE_LIMIT") else None,
+    ).app
+
+
+app = create_app()
@@ -0,0 +1,389 @@
+"""Offline load test of chat, summarize and Notion export.
+
+Starts the fake LLM, the fake Notion API and the backend as subprocesses
+against a fresh SQLite file, then runs three workloads at once for the
+duration of the chat load:
+  
+  * --streams concurrent users, each sending --turns chat messages in its own
+    session and reading the SSE reply to the end;
+  * --summarizers workers calling POST /api/sessions/{id}/summarize;
+  * --exporters workers calling POST /api/sessions/{id}/notion.
+
+It reports p50/p95/p99 time-to-first-token, inter-token latency, per-stream
+and aggregate token throughput, summarize/export latency and error rates.
+--json writes the same numbers as a flat object, and each --budget KEY<=N
+or KEY>=N (KEY=N means <=) is checked against them; the exit status is 1
+if any budget is exceeded, so a release can be gated on it:
+    
+    cd backend
+    python -m benchmarks.loadgen --streams 50 --turns 3 --ttft-ms 200 --tokens-per-second 50
+    python -m benchmarks.loadgen --json results.json \\
+        --budget ttft_p95_ms=400 --budget chat_error_rate=0 --budget 'throughput_tokens_per_s>=1500'
+
+The LLM response cache is off so every summary reaches the fake LLM.
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from sqlmodel import Session as SQLSession, SQLModel, create_engine
+
+from app.models import Session, Message
+from .servers import free_port, process_cpu_seconds, run_server
+
+BUDGET = re.compile(r"^(\w+)\s*(<=|>=|=)\s*([-+\d.eE]+)$")
+
+
+class Results:
+    def __init__(self):
+        self.ttfts: List[float] = []
+        self.gaps: List[float] = []
+        self.stream_rates: List[float] = []
+        self.tokens = 0
+        self.chat_ok = 0
+        self.chat_errors = 0
+        self.summaries: List[float] = []
+        self.summary_errors = 0
+        self.exports: List[float] = []
+        self.export_errors = 0
+        self.errors: Dict[str, int] = {}
+    
+    def error(self, kind: str, detail: str) -> None:
+        key = f"{kind}: {detail[:80]}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def seed_database(url: str, sessions: int, history: int) -> List[str]:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    start = datetime.utcnow() - timedelta(days=1)
+    
+    session_ids = []
+    with SQLSession(engine) as db:
+        for _ in range(sessions):
+            session = Session(title="load")
+            db.add(session)
+            session_ids.append(session.id)
+            for i in range(history):
+                db.add(Message(
+                    session_id=session.id,
+                    role="user" if i % 2 == 0 else "assistant",
+                    content="lorem ipsum dolor sit amet " * 20,
+                    token_count=100,
+                    created_at=start + timedelta(seconds=i)
+                ))
+        db.commit()
+    engine.dispose()
+    return session_ids
+
+
+async def chat_turn(client: httpx.AsyncClient, session_id: str, results: Results) -> None:
+    started = time.perf_counter()
+    first = last = None
+    tokens = 0
+    
+    try:
+        async with client.stream(
+            "POST", "/api/chat", json={"session_id": session_id, "text": "hello"}
+        ) as response:
+            if response.status_code != 200:
+                results.chat_errors += 1
+                results.error("chat", f"HTTP {response.status_code}")
+                return
+            async for line in response.aiter_lines():
+                # chat.py pre-formats "data: ..." and EventSourceResponse adds
+                # its own prefix, so strip as many as are present.
+                payload = line
+                while payload.startswith("data: "):
+                    payload = payload[6:]
+                if not payload or payload == line:
+                    continue
+                event = json.loads(payload)
+                if "error" in event:
+                    results.chat_errors += 1
+                    results.error("chat", str(event["error"]))
+                    return
+                if "data" not in event or event.get("event") == "end":
+                    continue
+                now = time.perf_counter()
+                if first is None:
+                    first = now
+                    results.ttfts.append(now - started)
+                else:
+                    results.gaps.append(now - last)
+                last = now
+                tokens += 1
+    except httpx.HTTPError as e:
+        results.chat_errors += 1
+        results.error("chat", f"{type(e).__name__}: {e}")
+        return
+    
+    results.chat_ok += 1
+    results.tokens += tokens
+    if first is not None and last > first:
+        results.stream_rates.append((tokens - 1) / (last - first))
+
+
+async def chat_user(
+    client: httpx.AsyncClient,
+    session_id: str,
+    delay: float,
+    turns: int,
+    results: Results
+) -> None:
+    await asyncio.sleep(delay)
+    for _ in range(turns):
+        await chat_turn(client, session_id, results)
+
+
+async def call_worker(
+    client: httpx.AsyncClient,
+    kind: str,
+    session_ids: List[str],
+    latencies: List[float],
+    results: Results,
+    done: asyncio.Event
+) -> int:
+    # Each session is summarized (or exported) cold, once; the worker stops
+    # early when the chat load finishes so these calls overlap the streams.
+    errors = 0
+    path = "summarize" if kind == "summarize" else "notion"
+    for session_id in session_ids:
+        if done.is_set():
+            break
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"/api/sessions/{session_id}/{path}")
+        except httpx.HTTPError as e:
+            errors += 1
+            results.error(kind, f"{type(e).__name__}: {e}")
+            continue
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+            results.error(kind, f"HTTP {response.status_code} {response.text}")
+    return errors
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(results: Results, elapsed: float, cpu: Optional[float]) -> Dict[str, float]:
+    summary: Dict[str, float] = {"wall_s": round(elapsed, 3)}
+    for name, values, scale in (
+        ("ttft", results.ttfts, 1000),
+        ("inter_token", results.gaps, 1000),
+        ("summarize", results.summaries, 1000),
+        ("export", results.exports, 1000),
+    ):
+        for pct in (50, 95, 99):
+            if values:
+                summary[f"{name}_p{pct}_ms"] = round(percentile(values, pct) * scale, 3)
+    if results.stream_rates:
+        for pct in (50, 5):
+            # Low percentiles are the slow streams for a rate.
+            summary[f"stream_tokens_per_s_p{pct}"] = round(percentile(results.stream_rates, pct), 1)
+    
+    chats = results.chat_ok + results.chat_errors
+    summaries = len(results.summaries) + results.summary_errors
+    exports = len(results.exports) + results.export_errors
+    summary.update({
+        "chat_turns": chats,
+        "chat_error_rate": round(results.chat_errors / chats, 4) if chats else 0.0,
+        "tokens": results.tokens,
+        "throughput_tokens_per_s": round(results.tokens / elapsed, 1) if elapsed else 0.0,
+        "summarize_calls": summaries,
+        "summarize_error_rate": round(results.summary_errors / summaries, 4) if summaries else 0.0,
+        "export_calls": exports,
+        "export_error_rate": round(results.export_errors / exports, 4) if exports else 0.0,
+    })
+    if cpu is not None:
+        summary["backend_cpu_s"] = round(cpu, 2)
+        if results.tokens:
+            summary["backend_cpu_us_per_token"] = round(cpu / results.tokens * 1e6, 1)
+    return summary
+
+
+def report(summary: Dict[str, float]) -> None:
+    def line(label: str, prefix: str, unit: str) -> bool:
+        values = [f"p{pct}={summary[f'{prefix}_p{pct}_{unit}']:8.2f}{unit}"
+                  for pct in (50, 95, 99) if f"{prefix}_p{pct}_{unit}" in summary]
+        if values:
+            print(f"{label:>16}: " + " ".join(values))
+        return bool(values)
+    
+    line("TTFT", "ttft", "ms")
+    line("inter-token", "inter_token", "ms")
+    if "stream_tokens_per_s_p50" in summary:
+        print(
+            f"{'stream rate':>16}: p50={summary['stream_tokens_per_s_p50']:.1f} tok/s "
+            f"p5={summary['stream_tokens_per_s_p5']:.1f} tok/s"
+        )
+    print(
+        f"{'throughput':>16}: {summary['throughput_tokens_per_s']:.1f} tok/s "
+        f"({summary['tokens']} tokens in {summary['wall_s']:.2f}s)"
+    )
+    print(f"{'chat':>16}: {summary['chat_turns']} turns, error rate {summary['chat_error_rate']:.2%}")
+    label = "" if line("summarize", "summarize", "ms") else "summarize:"
+    print(f"{label:>17} {summary['summarize_calls']} calls, error rate {summary['summarize_error_rate']:.2%}")
+    label = "" if line("export", "export", "ms") else "export:"
+    print(f"{label:>17} {summary['export_calls']} calls, error rate {summary['export_error_rate']:.2%}")
+    if "backend_cpu_s" in summary:
+        print(
+            f"{'backend CPU':>16}: {summary['backend_cpu_s']:.2f}s"
+            + (f", {summary['backend_cpu_us_per_token']:.1f}us per token" if "backend_cpu_us_per_token" in summary else "")
+        )
+
+
+def parse_budget(value: str) -> Tuple[str, str, float]:
+    match = BUDGET.match(value)
+    if not match:
+        raise argparse.ArgumentTypeError(f"expected KEY<=N, KEY>=N or KEY=N, got {value!r}")
+    key, op, limit = match.groups()
+    return key, ">=" if op == ">=" else "<=", float(limit)
+
+
+def check_budgets(summary: Dict[str, float], budgets: List[Tuple[str, str, float]]) -> List[str]:
+    failures = []
+    for key, op, limit in budgets:
+        if key not in summary:
+            failures.append(f"{key}: not measured in this run")
+            continue
+        value = summary[key]
+        if (op == "<=" and value > limit) or (op == ">=" and value < limit):
+            failures.append(f"{key}={value:g}, budget {op} {limit:g}")
+    return failures
+
+
+async def main(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{Path(tmp) / 'load.db'}"
+        callers = args.summarizers + args.exporters
+        session_ids = seed_database(db_url, args.streams + callers * args.calls, args.history)
+        chat_sessions = session_ids[:args.streams]
+        # Summaries and exports get sessions of their own: a stored summary
+        # is reused until its session changes, so repeat calls on one
+        # session would mostly measure that lookup.
+        call_sessions = session_ids[args.streams:]
+        
+        llm_port, notion_port, api_port = free_port(), free_port(), free_port()
+        llm_env = {
+            "FAKE_LLM_TOKENS": str(args.tokens),
+            "FAKE_LLM_TOKENS_JITTER": str(args.tokens_jitter),
+            "FAKE_LLM_TTFT_MS": str(args.ttft_ms),
+            "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+            "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+            "FAKE_LLM_MIDSTREAM_ERROR_RATE": str(args.midstream_error_rate),
+            "FAKE_LLM_SEED": str(args.seed),
+        }
+        notion_env = {"FAKE_NOTION_LATENCY_MS": str(args.notion_latency_ms)}
+        api_env = {
+            "DATABASE_URL": db_url,
+            "LITELLM_URL": f"http://127.0.0.1:{llm_port}/v1/chat/completions",
+            "OPENAI_API_KEY": "load",
+            "NOTION_API_KEY": "load",
+            "NOTION_PARENT_PAGE_ID": "load-parent",
+            "NOTION_BASE_URL": f"http://127.0.0.1:{notion_port}",
+            "LLM_CACHE_ENABLED": "false",
+        }
+        
+        with run_server("benchmarks.fake_llm:app", llm_port, llm_env), \
+                run_server("benchmarks.fake_notion:app", notion_port, notion_env), \
+                run_server("app.main:app", api_port, api_env) as backend:
+            results = Results()
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{api_port}",
+                timeout=args.timeout,
+                limits=httpx.Limits(max_connections=args.streams + callers + 1)
+            ) as client:
+                # One untimed turn so tokenizer loading and connection setup
+                # are not attributed to the measured load.
+                await chat_turn(client, chat_sessions[0], Results())
+                
+                done = asyncio.Event()
+                workers = [
+                    asyncio.create_task(call_worker(
+                        client, "summarize", call_sessions[i::callers],
+                        results.summaries, results, done
+                    ))
+                    for i in range(args.summarizers)
+                ] + [
+                    asyncio.create_task(call_worker(
+                        client, "export", call_sessions[args.summarizers + i::callers],
+                        results.exports, results, done
+                    ))
+                    for i in range(args.exporters)
+                ]
+                
+                cpu_before = process_cpu_seconds(backend.pid)
+                started = time.perf_counter()
+                await asyncio.gather(*[
+                    chat_user(client, session_id, i * args.ramp_up / max(1, args.streams), args.turns, results)
+                    for i, session_id in enumerate(chat_sessions)
+                ])
+                done.set()
+                errors = await asyncio.gather(*workers)
+                elapsed = time.perf_counter() - started
+                cpu_after = process_cpu_seconds(backend.pid)
+    
+    results.summary_errors = sum(errors[:args.summarizers])
+    results.export_errors = sum(errors[args.summarizers:])
+    cpu = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    summary = summarize(results, elapsed, cpu)
+    
+    print(
+        f"{args.streams} users x {args.turns} turns, {args.tokens} tokens at "
+        f"{args.tokens_per_second:g} tok/s, TTFT {args.ttft_ms:g}ms, "
+        f"{args.summarizers} summarizers, {args.exporters} exporters"
+    )
+    report(summary)
+    for error, count in sorted(results.errors.items(), key=lambda item: -item[1])[:10]:
+        print(f"{'error':>16}: {count} x {error}")
+    
+    if args.json:
+        output = json.dumps(summary, indent=2)
+        if args.json == "-":
+            print(output)
+        else:
+            Path(args.json).write_text(output + "\n")
+    
+    failures = check_budgets(summary, args.budget)
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=50, help="concurrent chat users")
+    parser.add_argument("--turns", type=int, default=3, help="chat turns per user")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="seconds over which users start")
+    parser.add_argument("--history", type=int, default=50, help="seeded messages per session")
+    parser.add_argument("--summarizers", type=int, default=2)
+    parser.add_argument("--exporters", type=int, default=1)
+    parser.add_argument("--calls", type=int, default=20, help="most summarize/export calls per worker")
+    parser.add_argument("--tokens", type=int, default=100, help="mean reply length")
+    parser.add_argument("--tokens-jitter", type=float, default=0.2)
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of LLM requests that fail")
+    parser.add_argument("--midstream-error-rate", type=float, default=0.0, help="fraction of streams cut off halfway")
+    parser.add_argument("--notion-latency-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[],
+                        help="fail if a result exceeds it, e.g. ttft_p95_ms=400 or throughput_tokens_per_s>=1000")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,58 @@
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError):
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        time.sleep(0.05)
+    raise TimeoutError(f"Server on port {port} did not start")
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    # User + system CPU time of a child process (Linux /proc only).
+    try:
+        fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+@contextlib.contextmanager
+def run_server(
+    app_path: str,
+    port: int,
+    env: Optional[Dict[str, str]] = None
+) -> Iterator[subprocess.Popen]:
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", app_path,
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    try:
+        wait_for_port(port)
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
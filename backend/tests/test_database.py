@@ -0,0 +1,88 @@
+import threading
+import pytest
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlmodel import Session as SQLSession, create_engine, SQLModel, select
+from sqlmodel.pool import StaticPool
+
+from app.database import run_migrations, backfill_token_counts, create_db_engine
+from app.models import Session, Message
+from app.services.llm_service import count_tokens
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+class TestMigrations:
+    def test_adds_missing_token_count_column(self, engine):
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE message DROP COLUMN token_count"))
+        
+        run_migrations(engine)
+        run_migrations(engine)
+        
+        with engine.connect() as conn:
+            columns = [row[1] for row in conn.execute(text("PRAGMA table_info(message)"))]
+        assert "token_count" in columns
+    
+    def test_backfill_token_counts(self, engine):
+        with SQLSession(engine) as db:
+            session = Session()
+            db.add(session)
+            db.add(Message(session_id=session.id, role="user", content="Hello there"))
+            db.add(Message(session_id=session.id, role="assistant", content="Hi", token_count=7))
+            db.commit()
+        
+        assert backfill_token_counts(engine, batch_size=1) == 1
+        assert backfill_token_counts(engine) == 0
+        
+        with SQLSession(engine) as db:
+            counts = {m.content: m.token_count for m in db.exec(select(Message)).all()}
+        assert counts == {"Hello there": count_tokens("Hello there"), "Hi": 7}
+    
+    def test_backfill_token_counts_stops_between_batches(self, engine):
+        with SQLSession(engine) as db:
+            session = Session()
+            db.add(session)
+            db.add_all([
+                Message(session_id=session.id, role="user", content=f"message {i}")
+                for i in range(5)
+            ])
+            db.commit()
+        
+        stop = threading.Event()
+        stop.set()
+        assert backfill_token_counts(engine, batch_size=2, stop=stop) == 0
+        assert backfill_token_counts(engine, batch_size=2) == 5
+
+
+
+class TestEngineConfiguration:
+    def test_file_database_gets_pragmas_and_pool(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+        try:
+            with engine.connect() as conn:
+                assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+                assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+                assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+                assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2
+            assert engine.pool.size() == 10
+        finally:
+            engine.dispose()
+    
+    def test_tuning_can_be_disabled(self, tmp_path):
+        with patch('app.config.settings.sqlite_tuning_enabled', False):
+            engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+        try:
+            with engine.connect() as conn:
+                assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        finally:
+            engine.dispose()
@@ -1,13 +1,31 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session as SQLSession, create_engine, SQLModel
+from sqlmodel import Session as SQLSession, create_engine, SQLModel, select
 from sqlmodel.pool import StaticPool
 from unittest.mock import patch, AsyncMock
+from sse_starlette.sse import AppStatus
 import json
+from datetime import datetime, timedelta
 
 from app.main import app
 from app.database import get_session
-from app.models import Session, Message, Summary
+from app.models import Session, Message, Summary, SummaryChunk, Job
+from app.api.chat import load_context_messages, coalesce_chunks, generate_sse_events
+from app.services.session_summary import load_summary_inputs
+
+
+def events(body: str) -> list:
+    # chat.py pre-formats "data: ..." and EventSourceResponse adds its own
+    # prefix, so strip as many as are present.
+    parsed = []
+    for line in body.splitlines():
+        payload = line
+        while payload.startswith("data: "):
+            payload = payload[6:]
+        if payload and payload != line:
+            parsed.append(json.loads(payload))
+    return parsed
 
 
 @pytest.fixture(name="session")
@@ -28,6 +46,9 @@ def client_fixture(session: SQLSession):
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    # sse-starlette keeps a module-level exit event bound to the first
+    # event loop it saw; each TestClient runs its own loop.
+    AppStatus.should_exit_event = None
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -119,6 +140,112 @@ class TestSessionEndpoints:
             assert data["title"] == "Python Discussion"
             assert "# Python Discussion" in data["markdown"]
     
+    def test_summarize_session_is_incremental(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        start = datetime(2024, 1, 1)
+        for i in range(4):
+            session.add(Message(
+                session_id=test_session.id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+                created_at=start + timedelta(seconds=i)
+            ))
+        session.commit()
+        
+        with patch('app.services.summarizer.SummarizerService.summarize_chunk') as mock_chunk, \
+                patch('app.services.summarizer.SummarizerService.combine_summaries') as mock_combine:
+            mock_chunk.return_value = "chunk summary"
+            mock_combine.return_value = "# First\n\n## TL;DR\n- one"
+            
+            response = client.post(f"/api/sessions/{test_session.id}/summarize")
+            assert response.json()["title"] == "First"
+            assert mock_chunk.call_count == 1
+            
+            # Unchanged session: served from the stored summary.
+            response = client.post(f"/api/sessions/{test_session.id}/summarize")
+            assert response.json()["title"] == "First"
+            assert mock_chunk.call_count == 1
+            
+            session.add(Message(
+                session_id=test_session.id,
+                role="user",
+                content="a follow-up",
+                created_at=start + timedelta(seconds=10)
+            ))
+            session.commit()
+            mock_combine.return_value = "# Second\n\n## TL;DR\n- two"
+            
+            response = client.post(f"/api/sessions/{test_session.id}/summarize")
+            assert response.json()["title"] == "Second"
+            assert mock_chunk.call_count == 2
+        
+        summary = session.get(Summary, test_session.id)
+        session.refresh(summary)
+        assert summary.message_count == 5
+        assert summary.markdown.startswith("# Second")
+        chunks = session.exec(select(SummaryChunk)).all()
+        assert len(chunks) == 1
+        assert chunks[0].message_count == 5
+    
+    def test_partial_summary_is_not_current(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        start = datetime(2024, 1, 1)
+        for i in range(12):
+            session.add(Message(
+                session_id=test_session.id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+                token_count=1000,
+                created_at=start + timedelta(seconds=i)
+            ))
+        session.commit()
+        
+        with patch('app.config.settings.summary_max_retries', 0), \
+                patch('app.services.summarizer.SummarizerService.summarize_chunk') as mock_chunk, \
+                patch('app.services.summarizer.SummarizerService.combine_summaries') as mock_combine:
+            mock_chunk.side_effect = ["part 1", "part 2", RuntimeError("boom"), "part 4"]
+            mock_combine.return_value = "# Partial\n\n## TL;DR\n- most of it"
+            
+            response = client.post(f"/api/sessions/{test_session.id}/summarize")
+            assert response.status_code == 200
+            assert response.json()["partial"] is True
+            assert response.json()["failed_chunks"] == [2]
+            assert mock_chunk.call_count == 4
+            
+            summary = session.get(Summary, test_session.id)
+            # Only the chunks before the failure are recorded as covered.
+            assert summary.message_count == 6
+            
+            # The next refresh maps the missing range instead of serving
+            # the partial summary; chunk 1 is reused.
+            mock_chunk.side_effect = None
+            mock_chunk.return_value = "part"
+            mock_combine.return_value = "# Complete\n\n## TL;DR\n- all of it"
+            response = client.post(f"/api/sessions/{test_session.id}/summarize")
+            assert response.json()["title"] == "Complete"
+            assert response.json()["partial"] is False
+            assert mock_chunk.call_count == 7
+        
+        session.refresh(summary)
+        assert summary.message_count == 12
+    
+    def test_summary_inputs_order_ties_by_id(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        tied = datetime(2024, 1, 1)
+        for message_id in ["m3", "m1", "m2"]:
+            session.add(Message(
+                id=message_id, session_id=test_session.id, role="user",
+                content=message_id, created_at=tied
+            ))
+        session.commit()
+        
+        _, messages, _ = load_summary_inputs(session, test_session.id)
+        
+        assert [m["id"] for m in messages] == ["m1", "m2", "m3"]
+    
     @pytest.mark.asyncio
     async def test_save_to_notion(self, client: TestClient, session: SQLSession):
         test_session = Session()
@@ -147,6 +274,142 @@ class TestSessionEndpoints:
                     assert data["url"] == "https://notion.so/test"
 
 
+class TestPagination:
+    def add_messages(self, session: SQLSession, count: int) -> str:
+        test_session = Session()
+        session.add(test_session)
+        start = datetime(2024, 1, 1)
+        for i in range(count):
+            # Pairs share a timestamp so the id tiebreak is exercised.
+            session.add(Message(
+                session_id=test_session.id,
+                role="user",
+                content=f"Message {i}",
+                created_at=start + timedelta(seconds=i // 2)
+            ))
+        session.commit()
+        return test_session.id
+    
+    def test_messages_default_to_latest_page(self, client: TestClient, session: SQLSession):
+        session_id = self.add_messages(session, 7)
+        
+        data = client.get(f"/api/sessions/{session_id}/messages?limit=3").json()
+        
+        assert len(data["messages"]) == 3
+        assert data["messages"][-1]["content"] == "Message 6"
+        assert data["older_cursor"] is not None
+        assert data["newer_cursor"] is None
+    
+    def test_messages_walk_back_and_forward(self, client: TestClient, session: SQLSession):
+        session_id = self.add_messages(session, 7)
+        url = f"/api/sessions/{session_id}/messages"
+        
+        seen = []
+        data = client.get(f"{url}?limit=3").json()
+        seen = data["messages"] + seen
+        while data["older_cursor"]:
+            data = client.get(url, params={"limit": 3, "before": data["older_cursor"]}).json()
+            seen = data["messages"] + seen
+        
+        ordered = sorted(seen, key=lambda m: (m["created_at"], m["id"]))
+        assert seen == ordered
+        assert len({m["id"] for m in seen}) == 7
+        
+        forward = client.get(url, params={"limit": 4, "after": data["newer_cursor"]}).json()
+        assert forward["messages"] == seen[len(data["messages"]):len(data["messages"]) + 4]
+    
+    def test_sessions_newest_first(self, client: TestClient, session: SQLSession):
+        start = datetime(2024, 1, 1)
+        for i in range(5):
+            session.add(Session(title=f"Session {i}", created_at=start + timedelta(days=i)))
+        session.commit()
+        
+        first = client.get("/api/sessions?limit=2").json()
+        second = client.get("/api/sessions", params={"limit": 2, "before": first["older_cursor"]}).json()
+        last = client.get("/api/sessions", params={"limit": 2, "before": second["older_cursor"]}).json()
+        
+        titles = [s["title"] for page in (first, second, last) for s in page["sessions"]]
+        assert titles == [f"Session {i}" for i in range(4, -1, -1)]
+        assert last["older_cursor"] is None
+        
+        newer = client.get("/api/sessions", params={"limit": 2, "after": last["newer_cursor"]}).json()
+        assert [s["title"] for s in newer["sessions"]] == ["Session 2", "Session 1"]
+    
+    def test_page_size_is_capped(self, client: TestClient, session: SQLSession):
+        session_id = self.add_messages(session, 5)
+        
+        with patch('app.config.settings.max_page_size', 2):
+            data = client.get(f"/api/sessions/{session_id}/messages?limit=100").json()
+        
+        assert len(data["messages"]) == 2
+    
+    def test_invalid_cursor(self, client: TestClient, session: SQLSession):
+        session_id = self.add_messages(session, 1)
+        
+        response = client.get(f"/api/sessions/{session_id}/messages?before=not-a-cursor")
+        assert response.status_code == 400
+        response = client.get("/api/sessions", params={"before": "a", "after": "b"})
+        assert response.status_code == 400
+
+
+class TestSessionDeletion:
+    def add_session(self, session: SQLSession, created_at: datetime) -> str:
+        test_session = Session(created_at=created_at)
+        session.add(test_session)
+        session.add(Message(session_id=test_session.id, role="user", content="Hello"))
+        session.add(Message(session_id=test_session.id, role="assistant", content="Hi"))
+        session.add(Summary(session_id=test_session.id, title="Hello", markdown="# Hello"))
+        session.add(SummaryChunk(
+            session_id=test_session.id, position=0, first_message_id="a",
+            last_message_id="b", message_count=2, summary="Greeting"
+        ))
+        session.add(Job(kind="summarize", session_id=test_session.id))
+        session.commit()
+        return test_session.id
+    
+    def remaining(self, session: SQLSession, model, session_id: str) -> int:
+        session.expire_all()
+        column = model.id if model is Session else model.session_id
+        return len(session.exec(select(model).where(column == session_id)).all())
+    
+    def test_delete_session_removes_related_rows(self, client: TestClient, session: SQLSession):
+        doomed = self.add_session(session, datetime(2024, 1, 1))
+        kept = self.add_session(session, datetime(2024, 1, 2))
+        
+        response = client.delete(f"/api/sessions/{doomed}")
+        assert response.status_code == 200
+        
+        for model in (Session, Message, Summary, SummaryChunk, Job):
+            assert self.remaining(session, model, doomed) == 0
+            assert self.remaining(session, model, kept) > 0
+    
+    def test_bulk_delete_by_ids(self, client: TestClient, session: SQLSession):
+        ids = [self.add_session(session, datetime(2024, 1, day)) for day in (1, 2, 3)]
+        
+        response = client.post("/api/sessions/bulk-delete", json={"session_ids": ids[:2] + ["missing"]})
+        assert response.json() == {"deleted": 2}
+        
+        assert self.remaining(session, Message, ids[0]) == 0
+        assert self.remaining(session, Message, ids[2]) == 2
+    
+    def test_bulk_delete_older_than(self, client: TestClient, session: SQLSession):
+        ids = [self.add_session(session, datetime(2024, 1, day)) for day in (1, 2, 3)]
+        
+        response = client.post("/api/sessions/bulk-delete", json={"older_than": "2024-01-02T12:00:00Z"})
+        assert response.json() == {"deleted": 2}
+        
+        assert [self.remaining(session, Session, i) for i in ids] == [0, 0, 1]
+        assert self.remaining(session, SummaryChunk, ids[1]) == 0
+    
+    def test_bulk_delete_requires_one_selector(self, client: TestClient):
+        assert client.post("/api/sessions/bulk-delete", json={}).status_code == 400
+        response = client.post(
+            "/api/sessions/bulk-delete",
+            json={"session_ids": ["a"], "older_than": "2024-01-01T00:00:00"}
+        )
+        assert response.status_code == 400
+
+
 class TestChatEndpoint:
     @pytest.mark.asyncio
     async def test_chat_stream(self, client: TestClient, session: SQLSession):
@@ -167,4 +430,329 @@ class TestChatEndpoint:
             )
             
             assert response.status_code == 200
-            assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
\ No newline at end of file
+            assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
+    
+    def test_chat_stream_persists_turn(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            async def mock_generator():
+                yield "Hello"
+                yield " world"
+            
+            mock_stream.return_value = mock_generator()
+            
+            response = client.post(
+                "/api/chat",
+                json={"session_id": test_session.id, "text": "Hi"}
+            )
+        
+        assert events(response.text)[0] == {"data": "Hello"}
+        assert events(response.text)[-1] == {"event": "end", "data": "done"}
+        
+        messages = session.exec(
+            select(Message).where(Message.session_id == test_session.id).order_by(Message.created_at)
+        ).all()
+        assert [(m.role, m.content) for m in messages] == [("user", "Hi"), ("assistant", "Hello world")]
+        assert all(m.token_count for m in messages)
+        
+        session.refresh(test_session)
+        assert test_session.title == "Hi"
+
+
+    def test_chat_stream_checkpoints_partial_reply(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            async def mock_generator():
+                yield "Partial"
+                await asyncio.sleep(0.01)
+                yield " reply"
+                await asyncio.sleep(0.01)
+                raise RuntimeError("upstream went away")
+            
+            mock_stream.return_value = mock_generator()
+            
+            with patch('app.config.settings.chat_checkpoint_interval', 0.001):
+                response = client.post(
+                    "/api/chat",
+                    json={"session_id": test_session.id, "text": "Hi"}
+                )
+        
+        assert events(response.text)[-1] == {"error": "upstream went away"}
+        
+        messages = session.exec(
+            select(Message).where(Message.session_id == test_session.id, Message.role == "assistant")
+        ).all()
+        assert [m.content for m in messages] == ["Partial reply"]
+        assert messages[0].truncated
+        assert messages[0].token_count
+    
+    def test_chat_stream_error_saves_truncated_reply(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            async def mock_generator():
+                yield "Cut"
+                raise RuntimeError("upstream went away")
+            
+            mock_stream.return_value = mock_generator()
+            
+            # No checkpoint fires before the error.
+            with patch('app.config.settings.chat_checkpoint_interval', 0.0):
+                client.post("/api/chat", json={"session_id": test_session.id, "text": "Hi"})
+        
+        messages = session.exec(
+            select(Message).where(Message.session_id == test_session.id, Message.role == "assistant")
+        ).all()
+        assert [(m.content, m.truncated) for m in messages] == [("Cut", True)]
+    
+    def test_chat_stream_checkpoint_is_completed_in_place(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            async def mock_generator():
+                for word in ["one", " two", " three"]:
+                    await asyncio.sleep(0.01)
+                    yield word
+            
+            mock_stream.return_value = mock_generator()
+            
+            with patch('app.config.settings.chat_checkpoint_interval', 0.001):
+                client.post("/api/chat", json={"session_id": test_session.id, "text": "Hi"})
+        
+        messages = session.exec(
+            select(Message).where(Message.session_id == test_session.id, Message.role == "assistant")
+        ).all()
+        assert len(messages) == 1
+        assert messages[0].content == "one two three"
+        assert messages[0].token_count
+
+
+class TestDisconnect:
+    def upstream(self, closed: list, words=("Partial", " reply", " never", " read")):
+        async def mock_generator():
+            try:
+                for word in words:
+                    yield word
+                    await asyncio.sleep(0.05)
+            finally:
+                closed.append(True)
+        return mock_generator()
+    
+    def assistant_messages(self, session: SQLSession, session_id: str):
+        return session.exec(
+            select(Message).where(Message.session_id == session_id, Message.role == "assistant")
+        ).all()
+    
+    @pytest.mark.asyncio
+    async def test_close_at_yield_saves_truncated_reply(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        closed = []
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            mock_stream.return_value = self.upstream(closed)
+            stream = generate_sse_events(test_session.id, "Hi", session)
+            assert json.loads(await stream.__anext__()) == {"data": "Partial"}
+            await stream.aclose()
+        
+        assert closed == [True]
+        messages = self.assistant_messages(session, test_session.id)
+        assert [(m.content, m.truncated) for m in messages] == [("Partial", True)]
+    
+    @pytest.mark.asyncio
+    async def test_cancel_while_waiting_on_upstream(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        closed = []
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            mock_stream.return_value = self.upstream(closed)
+            received = []
+            
+            async def consume():
+                async for event in generate_sse_events(test_session.id, "Hi", session, coalesce_ms=10):
+                    received.append(json.loads(event))
+            
+            task = asyncio.ensure_future(consume())
+            while len(received) < 2:
+                await asyncio.sleep(0.005)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        
+        assert closed == [True]
+        messages = self.assistant_messages(session, test_session.id)
+        assert len(messages) == 1
+        assert messages[0].content == "".join(event["data"] for event in received)
+        assert messages[0].truncated
+    
+    @pytest.mark.asyncio
+    async def test_completed_reply_is_not_truncated(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            mock_stream.return_value = self.upstream([], words=("Done",))
+            received = [json.loads(event) async for event in generate_sse_events(test_session.id, "Hi", session)]
+        
+        assert received[-1] == {"event": "end", "data": "done"}
+        messages = self.assistant_messages(session, test_session.id)
+        assert [(m.content, m.truncated) for m in messages] == [("Done", False)]
+    
+    def test_messages_report_truncation(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.add(Message(session_id=test_session.id, role="assistant", content="Cut", truncated=True))
+        session.commit()
+        
+        response = client.get(f"/api/sessions/{test_session.id}/messages")
+        
+        assert [m["truncated"] for m in response.json()["messages"]] == [True]
+
+
+class TestCoalescing:
+    async def timed_chunks(self, schedule):
+        # schedule: (delay before the chunk in seconds, chunk)
+        for delay, chunk in schedule:
+            await asyncio.sleep(delay)
+            yield chunk
+    
+    async def collect(self, schedule, window_ms, max_bytes=4096):
+        return [chunk async for chunk in coalesce_chunks(self.timed_chunks(schedule), window_ms, max_bytes)]
+    
+    @pytest.mark.asyncio
+    async def test_disabled_passes_chunks_through(self):
+        result = await self.collect([(0, "a"), (0, "b"), (0, "c")], window_ms=0)
+        assert result == ["a", "b", "c"]
+    
+    @pytest.mark.asyncio
+    async def test_close_closes_source(self):
+        closed = []
+        
+        async def source():
+            try:
+                yield "first"
+                await asyncio.sleep(1)
+                yield "late"
+            finally:
+                closed.append(True)
+        
+        for window_ms in (0, 50):
+            closed.clear()
+            stream = coalesce_chunks(source(), window_ms, 4096)
+            assert await stream.__anext__() == "first"
+            await stream.aclose()
+            assert closed == [True]
+    
+    @pytest.mark.asyncio
+    async def test_first_chunk_is_not_delayed(self):
+        stream = coalesce_chunks(self.timed_chunks([(0, "first"), (0.5, "late")]), 1000, 4096)
+        
+        started = asyncio.get_running_loop().time()
+        assert await stream.__anext__() == "first"
+        assert asyncio.get_running_loop().time() - started < 0.1
+        await stream.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_bursts_are_joined_within_window(self):
+        schedule = [(0, "T"), (0, "a"), (0, "b"), (0, "c"), (0.2, "d"), (0, "e")]
+        
+        result = await self.collect(schedule, window_ms=50)
+        
+        assert result == ["T", "abc", "de"]
+    
+    @pytest.mark.asyncio
+    async def test_flushes_at_max_bytes(self):
+        schedule = [(0, "T")] + [(0, "xx")] * 5
+        
+        result = await self.collect(schedule, window_ms=1000, max_bytes=4)
+        
+        assert result == ["T", "xxxx", "xxxx", "xx"]
+    
+    def test_chat_stream_coalesces_per_request(self, client: TestClient, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.commit()
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            async def mock_generator():
+                for word in ["Hello", " big", " wide", " world"]:
+                    yield word
+            
+            mock_stream.return_value = mock_generator()
+            
+            response = client.post(
+                "/api/chat",
+                json={"session_id": test_session.id, "text": "Hi", "coalesce_ms": 500}
+            )
+        
+        assert [e.get("data") for e in events(response.text)] == ["Hello", " big wide world", "done"]
+        
+        messages = session.exec(
+            select(Message).where(Message.session_id == test_session.id).order_by(Message.created_at)
+        ).all()
+        assert messages[-1].content == "Hello big wide world"
+
+
+class TestContextWindow:
+    def test_load_context_messages_stops_at_budget(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        start = datetime(2024, 1, 1)
+        for i in range(120):
+            session.add(Message(
+                session_id=test_session.id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+                token_count=10,
+                created_at=start + timedelta(seconds=i)
+            ))
+        session.commit()
+        
+        context = load_context_messages(session, test_session.id, max_tokens=255, batch_size=7)
+        
+        assert [msg["content"] for msg in context] == [f"message {i}" for i in range(95, 120)]
+    
+    def test_load_context_messages_with_tied_timestamps(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        tied = datetime(2024, 1, 1)
+        for i in range(20):
+            session.add(Message(
+                id=f"m{i:02d}",
+                session_id=test_session.id,
+                role="user",
+                content=f"message {i}",
+                token_count=10,
+                created_at=tied
+            ))
+        session.commit()
+        
+        context = load_context_messages(session, test_session.id, max_tokens=1000, batch_size=3)
+        
+        assert [msg["content"] for msg in context] == [f"message {i}" for i in range(20)]
+    
+    def test_load_context_messages_short_session(self, session: SQLSession):
+        test_session = Session()
+        session.add(test_session)
+        session.add(Message(session_id=test_session.id, role="user", content="Hello"))
+        session.commit()
+        
+        context = load_context_messages(session, test_session.id, max_tokens=5000)
+        
+        assert len(context) == 1
+        assert context[0]["content"] == "Hello"
+        assert context[0]["token_count"] > 0
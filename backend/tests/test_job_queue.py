@@ -0,0 +1,187 @@
+import asyncio
+import json
+import pytest
+import httpx
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlmodel import Session as SQLSession, SQLModel, create_engine
+from sse_starlette.sse import AppStatus
+
+from app.main import app
+from app.database import get_session
+from app.models import Session, Message, Job
+from app.api.jobs import require_job_queue
+from app.api.sessions import delete_session_rows
+from app.services.job_queue import JobQueue
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'jobs.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="session_id")
+def session_id_fixture(engine):
+    with SQLSession(engine) as db:
+        session = Session()
+        db.add(session)
+        start = datetime(2024, 1, 1)
+        for i in range(12):
+            db.add(Message(
+                session_id=session.id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+                token_count=300,
+                created_at=start + timedelta(seconds=i)
+            ))
+        db.commit()
+        return session.id
+
+
+@pytest.fixture
+def mock_llm():
+    with patch('app.services.summarizer.SummarizerService.summarize_chunk') as mock_chunk, \
+            patch('app.services.summarizer.SummarizerService.combine_summaries') as mock_combine:
+        mock_chunk.return_value = "chunk summary"
+        mock_combine.return_value = "# Job Summary\n\n## TL;DR\n- done"
+        yield mock_chunk
+
+
+async def wait_for_status(job_queue: JobQueue, job_id: str, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await job_queue.get(job_id)
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+class TestJobQueue:
+    @pytest.mark.asyncio
+    async def test_summarize_job_reports_progress(self, engine, session_id, mock_llm):
+        job_queue = JobQueue(engine, concurrency=1)
+        await job_queue.start()
+        try:
+            job = await job_queue.enqueue("summarize", session_id)
+            assert job["status"] == "pending"
+            
+            job = await wait_for_status(job_queue, job["id"])
+        finally:
+            await job_queue.stop()
+        
+        assert job["status"] == "succeeded"
+        assert job["result"]["title"] == "Job Summary"
+        assert job["progress_total"] == mock_llm.call_count == 2
+        assert job["progress_done"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_unfinished_jobs_resume_after_restart(self, engine, session_id, mock_llm):
+        with SQLSession(engine) as db:
+            job = Job(kind="summarize", session_id=session_id, status="running")
+            db.add(job)
+            db.commit()
+            job_id = job.id
+        
+        job_queue = JobQueue(engine, concurrency=1)
+        await job_queue.start()
+        try:
+            job = await wait_for_status(job_queue, job_id)
+        finally:
+            await job_queue.stop()
+        
+        assert job["status"] == "succeeded"
+    
+    @pytest.mark.asyncio
+    async def test_failed_job_records_error(self, engine, mock_llm):
+        with SQLSession(engine) as db:
+            session = Session()
+            db.add(session)
+            db.commit()
+            empty_session_id = session.id
+        
+        job_queue = JobQueue(engine, concurrency=1)
+        await job_queue.start()
+        try:
+            job = await job_queue.enqueue("summarize", empty_session_id)
+            job = await wait_for_status(job_queue, job["id"])
+        finally:
+            await job_queue.stop()
+        
+        assert job["status"] == "failed"
+        assert "No messages" in job["error"]
+    
+    @pytest.mark.asyncio
+    async def test_deleting_session_cancels_its_jobs(self, engine, session_id, mock_llm):
+        job_queue = JobQueue(engine, concurrency=1)
+        cancelled = await job_queue.enqueue("summarize", session_id)
+        with SQLSession(engine) as db:
+            delete_session_rows(db, [session_id])
+            db.commit()
+        
+        await job_queue.start()
+        try:
+            events = [job async for job in job_queue.events(cancelled["id"])]
+            await job_queue.queue.join()
+            assert events == []
+            assert await job_queue.get(cancelled["id"]) is None
+            assert not job_queue.workers[0].done()
+            
+            # The worker survives and runs the next job.
+            with SQLSession(engine) as db:
+                session = Session()
+                db.add(session)
+                db.add(Message(session_id=session.id, role="user", content="hello"))
+                db.commit()
+                other_session_id = session.id
+            job = await job_queue.enqueue("summarize", other_session_id)
+            job = await wait_for_status(job_queue, job["id"])
+        finally:
+            await job_queue.stop()
+        
+        assert job["status"] == "succeeded"
+
+
+class TestJobEndpoints:
+    @pytest.mark.asyncio
+    async def test_create_and_follow_job(self, engine, session_id, mock_llm):
+        job_queue = JobQueue(engine, concurrency=1)
+        
+        def get_session_override():
+            with SQLSession(engine) as db:
+                yield db
+        
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[require_job_queue] = lambda: job_queue
+        AppStatus.should_exit_event = None
+        await job_queue.start()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/jobs", json={"session_id": session_id})
+                assert response.status_code == 202
+                job_id = response.json()["id"]
+                
+                response = await client.get(f"/api/jobs/{job_id}/events")
+                states = [
+                    json.loads(line[len("data: "):])
+                    for line in response.text.splitlines()
+                    if line.startswith("data: ")
+                ]
+                assert states[-1]["status"] == "succeeded"
+                assert states[-1]["progress_done"] == 2
+                
+                response = await client.get(f"/api/jobs/{job_id}")
+                assert response.json()["result"]["title"] == "Job Summary"
+                
+                response = await client.post("/api/jobs", json={"session_id": "missing"})
+                assert response.status_code == 404
+        finally:
+            await job_queue.stop()
+            app.dependency_overrides.clear()
@@ -1,6 +1,17 @@
+import os
 import pytest
+import tiktoken
+import tiktoken.load
+import tiktoken.registry
 from unittest.mock import AsyncMock, MagicMock, patch
-from app.services.llm_service import LLMService
+from app.config import Settings
+from app.services import llm_service as llm_module
+from app.services.llm_service import LLMService, parse_delta_content
+
+
+async def async_lines(lines):
+    for line in lines:
+        yield line
 
 
 class TestLLMService:
@@ -33,15 +44,28 @@ class TestLLMService:
         )
         assert total_tokens <= 50
     
+    def test_trim_messages_uses_stored_token_counts(self, llm_service):
+        messages = [
+            {"role": "user", "content": "first", "token_count": 30},
+            {"role": "assistant", "content": "second", "token_count": 30},
+            {"role": "user", "content": "third", "token_count": 15},
+        ]
+        
+        with patch.object(llm_service, 'count_tokens') as mock_count:
+            trimmed = llm_service.trim_messages_to_token_limit(messages, max_tokens=50)
+        
+        mock_count.assert_not_called()
+        assert [msg["content"] for msg in trimmed] == ["second", "third"]
+    
     @pytest.mark.asyncio
     async def test_stream_chat_completion(self, llm_service):
         with patch.object(llm_service.client, 'stream') as mock_stream:
             mock_response = AsyncMock()
-            mock_response.aiter_lines = AsyncMock(return_value=[
+            mock_response.aiter_lines = MagicMock(return_value=async_lines([
                 'data: {"choices":[{"delta":{"content":"Hello"}}]}',
                 'data: {"choices":[{"delta":{"content":" world"}}]}',
                 'data: [DONE]'
-            ].__aiter__())
+            ]))
             mock_response.raise_for_status = MagicMock()
             
             mock_stream.return_value.__aenter__.return_value = mock_response
@@ -54,6 +78,33 @@ class TestLLMService:
             
             assert chunks == ["Hello", " world"]
     
+    @pytest.mark.asyncio
+    async def test_stream_skips_empty_and_malformed_chunks(self, llm_service):
+        with patch.object(llm_service.client, 'stream') as mock_stream:
+            mock_response = AsyncMock()
+            mock_response.aiter_lines = MagicMock(return_value=async_lines([
+                'data: {"choices":[{"delta":{"role":"assistant","content":""}}]}',
+                'data: {"choices":[{"delta":{"content":"A \\"quoted\\" \\u00e9"}}]}',
+                'data: {not json',
+                '',
+                'data: {"choices":[{"delta":{},"finish_reason":"stop"}]}',
+                'data: [DONE]'
+            ]))
+            mock_response.raise_for_status = MagicMock()
+            mock_stream.return_value.__aenter__.return_value = mock_response
+            
+            chunks = [chunk async for chunk in llm_service.stream_chat_completion([{"role": "user", "content": "Hi"}])]
+        
+        assert chunks == ['A "quoted" \u00e9']
+    
+    def test_parse_delta_content(self):
+        assert parse_delta_content('{"choices":[{"index":0,"delta":{"content":"Hi\\n"},"finish_reason":null}]}') == "Hi\n"
+        assert parse_delta_content('{"choices": [{"delta": {"content": "spaced"}}]}') == "spaced"
+        assert parse_delta_content('{"choices":[{"delta":{"role":"assistant","content":null}}]}') is None
+        assert parse_delta_content('{"choices":[]}') is None
+        with pytest.raises(ValueError):
+            parse_delta_content('{"choices":[{"delta":{"content":"unterminated')
+    
     @pytest.mark.asyncio
     async def test_get_completion(self, llm_service):
         with patch.object(llm_service.client, 'post') as mock_post:
@@ -67,4 +118,71 @@ class TestLLMService:
             messages = [{"role": "user", "content": "Test"}]
             result = await llm_service.get_completion(messages)
             
-            assert result == "Test response"
\ No newline at end of file
+            assert result == "Test response"
+    
+    @pytest.mark.asyncio
+    async def test_shared_client_is_reused(self):
+        client = await llm_module.init_http_client()
+        try:
+            async with LLMService() as first, LLMService() as second:
+                assert first.client is client
+                assert second.client is client
+                assert first.encoder is second.encoder
+            assert not client.is_closed
+        finally:
+            await llm_module.close_http_client()
+        
+        assert client.is_closed
+        assert llm_module.get_http_client() is None
+    
+    @pytest.mark.asyncio
+    async def test_private_client_closed_without_pool(self):
+        async with LLMService() as service:
+            client = service.client
+        assert client.is_closed
+    
+    @pytest.mark.asyncio
+    async def test_pool_stats(self):
+        assert llm_module.get_pool_stats()["initialized"] is False
+        
+        await llm_module.init_http_client()
+        try:
+            stats = llm_module.get_pool_stats()
+            assert stats["initialized"] is True
+            assert stats["connections"] == 0
+            assert stats["max_connections"] > 0
+        finally:
+            await llm_module.close_http_client()
+
+
+class TestEncoder:
+    @pytest.fixture(autouse=True)
+    def fresh_encoder(self):
+        # Each test loads its own encoder; later tests get a normal one.
+        llm_module.get_encoder.cache_clear()
+        with patch.dict(os.environ):
+            yield
+        llm_module.get_encoder.cache_clear()
+    
+    def test_bundled_encoding_loads_offline(self):
+        bundled = Settings.model_fields["tiktoken_cache_dir"].default
+        with patch('app.config.settings.tiktoken_cache_dir', bundled), \
+                patch.object(tiktoken.registry, 'ENCODINGS', {}), \
+                patch.object(tiktoken.load, 'read_file', side_effect=OSError("offline")) as read_file:
+            assert llm_module.count_tokens("Hello, world") == 3
+        
+        read_file.assert_not_called()
+    
+    def test_existing_cache_dir_is_kept(self, tmp_path):
+        os.environ["TIKTOKEN_CACHE_DIR"] = str(tmp_path)
+        with patch('app.config.settings.tiktoken_cache_dir', "/elsewhere"), \
+                patch.object(tiktoken, 'get_encoding'):
+            llm_module.get_encoder()
+        
+        assert os.environ["TIKTOKEN_CACHE_DIR"] == str(tmp_path)
+    
+    def test_warm_up_reports_failure(self):
+        with patch('app.config.settings.tokenizer_encoding', 'no_such_encoding'):
+            assert llm_module.warm_up_encoder() is False
+        
+        assert llm_module.warm_up_encoder() is True
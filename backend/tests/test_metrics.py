@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session as SQLSession, create_engine, SQLModel
+from sqlmodel.pool import StaticPool
+from unittest.mock import patch
+from sse_starlette.sse import AppStatus
+
+from app import metrics
+from app.main import app
+from app.database import get_session
+from app.metrics import Counter, Gauge, Histogram, Registry
+from app.models import Session
+from app.services.notion_writer import endpoint_name
+
+
+class TestMetricTypes:
+    def test_counter_renders_labels(self):
+        registry = Registry()
+        requests = registry.register(Counter("requests_total", "Requests", ["kind"]))
+        requests.inc(kind="a")
+        requests.inc(2, kind="b")
+        requests.inc(kind="a")
+        
+        assert registry.render() == (
+            "# HELP requests_total Requests\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{kind="a"} 2\n'
+            'requests_total{kind="b"} 2\n'
+        )
+    
+    def test_labels_must_match(self):
+        requests = Counter("requests_total", "Requests", ["kind"])
+        
+        with pytest.raises(ValueError):
+            requests.inc(other="x")
+    
+    def test_label_values_are_escaped(self):
+        requests = Counter("requests_total", "Requests", ["kind"])
+        requests.inc(kind='say "hi"\n')
+        
+        assert 'requests_total{kind="say \\"hi\\"\\n"} 1' in requests.render()
+    
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+        
+        lines = latency.render()
+        
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert "latency_seconds_sum 3.65" in lines
+        assert "latency_seconds_count 4" in lines
+    
+    def test_histogram_timer(self):
+        latency = Histogram("latency_seconds", "Latency", ["stage"])
+        
+        with latency.time(stage="x"):
+            pass
+        
+        assert latency.count(stage="x") == 1
+    
+    def test_gauge_collector_failure_is_contained(self):
+        def broken():
+            raise RuntimeError("pool gone")
+        
+        gauge = Gauge("pool", "Pool", ["state"], collect=broken)
+        
+        assert gauge.render() == ["# HELP pool Pool", "# TYPE pool gauge"]
+    
+    def test_duplicate_registration_rejected(self):
+        registry = Registry()
+        registry.register(Counter("requests_total", "Requests"))
+        
+        with pytest.raises(ValueError):
+            registry.register(Counter("requests_total", "Requests"))
+
+
+class TestNotionEndpointName:
+    def test_names_follow_client_attributes(self):
+        from notion_client import Client
+        
+        client = Client(auth="test")
+        
+        assert endpoint_name(client.blocks.children.append) == "blocks.children.append"
+        assert endpoint_name(client.pages.create) == "pages.create"
+
+
+class TestMetricsEndpoint:
+    @pytest.fixture(name="client")
+    def client_fixture(self):
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        SQLModel.metadata.create_all(engine)
+        with SQLSession(engine) as session:
+            app.dependency_overrides[get_session] = lambda: session
+            # See the client fixture in test_integration.
+            AppStatus.should_exit_event = None
+            yield TestClient(app), session
+        app.dependency_overrides.clear()
+    
+    def test_prometheus_text(self, client):
+        http, _ = client
+        
+        response = http.get("/api/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE chat_stage_seconds histogram" in response.text
+        assert "# TYPE llm_pool_connections gauge" in response.text
+    
+    def test_chat_records_stages(self, client):
+        http, session = client
+        chat = Session()
+        session.add(chat)
+        session.commit()
+        
+        completed = metrics.CHAT_STREAMS.get(outcome="completed")
+        first_tokens = metrics.CHAT_STAGE_SECONDS.count(stage="first_token")
+        
+        with patch('app.services.llm_service.LLMService.stream_chat_completion') as mock_stream:
+            async def mock_generator():
+                yield "Hello"
+                await asyncio.sleep(0)
+                yield " there"
+            
+            mock_stream.return_value = mock_generator()
+            http.post("/api/chat", json={"session_id": chat.id, "text": "Hi"})
+        
+        assert metrics.CHAT_STREAMS.get(outcome="completed") == completed + 1
+        assert metrics.CHAT_STAGE_SECONDS.count(stage="first_token") == first_tokens + 1
+        assert metrics.CHAT_ACTIVE_STREAMS.get() == 0
+        
+        text = http.get("/api/metrics").text
+        for stage in ("history", "first_token", "stream", "persist"):
+            assert f'chat_stage_seconds_count{{stage="{stage}"}}' in text
@@ -1,6 +1,29 @@
+import json
+import time
+import httpx
 import pytest
 from unittest.mock import MagicMock, patch
-from app.services.notion_writer import NotionWriter
+from fastapi.testclient import TestClient
+from sqlmodel import Session as SQLSession, SQLModel, create_engine
+from app.models import Session, Summary
+from notion_client.errors import RequestTimeoutError
+from app.services.notion_writer import NotionWriter, TokenBucket, is_retryable_notion_error
+from app.services.session_summary import export_to_notion
+from benchmarks.fake_notion import FakeNotion
+
+
+def make_writer(fake: FakeNotion) -> NotionWriter:
+    http_client = TestClient(fake.app, base_url="https://api.notion.com")
+    return NotionWriter(
+        "test_api_key",
+        "test_parent_id",
+        http_client=http_client,
+        rate_limiter=TokenBucket(rate=1000, capacity=1000)
+    )
+
+
+def paragraphs(count: int) -> str:
+    return "\n".join(f"Paragraph {i}" for i in range(count))
 
 
 class TestNotionWriter:
@@ -99,6 +122,67 @@ code block
         assert "paragraph" in block_types
         assert "code" in block_types
     
+    def test_parse_inline_formatting_links_and_italics(self, notion_writer):
+        text = "See [docs](https://example.com) for *details* on snake_case_names and _this_"
+        result = notion_writer.parse_inline_formatting(text)
+        
+        assert [r["text"]["content"] for r in result] == [
+            "See ", "docs", " for ", "details", " on snake_case_names and ", "this"
+        ]
+        assert result[1]["text"]["link"] == {"url": "https://example.com"}
+        assert result[3]["annotations"] == {"italic": True}
+        assert result[5]["annotations"] == {"italic": True}
+    
+    def test_parse_inline_formatting_splits_long_text(self, notion_writer):
+        text = "a" * 4500 + " **" + "b" * 2500 + "**"
+        result = notion_writer.parse_inline_formatting(text)
+        
+        assert [len(r["text"]["content"]) for r in result] == [2000, 2000, 501, 2000, 500]
+        assert all(r.get("annotations", {}).get("bold") for r in result[3:])
+        assert "".join(r["text"]["content"] for r in result) == "a" * 4500 + " " + "b" * 2500
+    
+    def test_markdown_to_notion_blocks_heading3(self, notion_writer):
+        blocks = notion_writer.markdown_to_notion_blocks("### Details\n#### Deeper")
+        
+        assert [b["type"] for b in blocks] == ["heading_3", "heading_3"]
+        assert blocks[1]["heading_3"]["rich_text"][0]["text"]["content"] == "Deeper"
+    
+    def test_markdown_to_notion_blocks_numbered(self, notion_writer):
+        blocks = notion_writer.markdown_to_notion_blocks("1. First\n2) Second")
+        
+        assert [b["type"] for b in blocks] == ["numbered_list_item", "numbered_list_item"]
+        assert blocks[1]["numbered_list_item"]["rich_text"][0]["text"]["content"] == "Second"
+    
+    def test_markdown_to_notion_blocks_nested_lists(self, notion_writer):
+        markdown = "- Parent\n  1. Child\n     - Grandchild\n       - Too deep\n  2. Child two\n- Next"
+        blocks = notion_writer.markdown_to_notion_blocks(markdown)
+        
+        assert len(blocks) == 2
+        children = blocks[0]["bulleted_list_item"]["children"]
+        assert [c["numbered_list_item"]["rich_text"][0]["text"]["content"] for c in children] == [
+            "Child", "Child two"
+        ]
+        grandchildren = children[0]["numbered_list_item"]["children"]
+        assert [g["bulleted_list_item"]["rich_text"][0]["text"]["content"] for g in grandchildren] == [
+            "Grandchild", "Too deep"
+        ]
+        assert "children" not in grandchildren[0]["bulleted_list_item"]
+    
+    def test_markdown_to_notion_blocks_long_code(self, notion_writer):
+        code = "\n".join("x" * 99 for _ in range(50))
+        blocks = notion_writer.markdown_to_notion_blocks(f"```\n{code}\n```")
+        
+        rich_text = blocks[0]["code"]["rich_text"]
+        assert len(rich_text) == 3
+        assert "".join(r["text"]["content"] for r in rich_text) == code
+    
+    def test_iter_notion_blocks_is_lazy(self, notion_writer):
+        blocks = notion_writer.iter_notion_blocks("# One\n\n- Two\n- Three")
+        
+        assert next(blocks)["type"] == "heading_1"
+        assert next(blocks)["type"] == "bulleted_list_item"
+        assert len(list(blocks)) == 1
+    
     @pytest.mark.asyncio
     async def test_create_notion_page(self, notion_writer):
         with patch.object(notion_writer.client.pages, 'create') as mock_create:
@@ -127,4 +211,192 @@ code block
         with patch.object(notion_writer.client.pages, 'retrieve') as mock_retrieve:
             mock_retrieve.side_effect = Exception("Not found")
             
-            assert notion_writer.validate_config() == False
\ No newline at end of file
+            assert notion_writer.validate_config() == False
+
+
+class TestNotionExport:
+    @pytest.mark.asyncio
+    async def test_large_export_appends_in_order(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        
+        result = await writer.create_notion_page("Big Page", paragraphs(1050))
+        
+        blocks = fake.page_blocks(result["page_id"])
+        assert len(blocks) == 1050
+        assert [b["paragraph"]["rich_text"][0]["text"]["content"] for b in blocks] == [
+            f"Paragraph {i}" for i in range(1050)
+        ]
+        assert fake.requests.count("POST /v1/pages") == 1
+        assert sum(r.endswith("/children") for r in fake.requests) == 11
+    
+    @pytest.mark.asyncio
+    async def test_retries_server_errors(self):
+        fake = FakeNotion(fail_first=2)
+        writer = make_writer(fake)
+        
+        with patch('app.config.settings.notion_retry_backoff', 0):
+            result = await writer.create_notion_page("Page", paragraphs(3))
+        
+        assert len(fake.page_blocks(result["page_id"])) == 3
+        assert fake.requests.count("POST /v1/pages") == 3
+    
+    @pytest.mark.asyncio
+    async def test_does_not_retry_ambiguous_failures_of_writes(self):
+        # A 500 may come after Notion created the page; retrying would
+        # create a second one.
+        fake = FakeNotion(fail_first=1, fail_status=500)
+        writer = make_writer(fake)
+        
+        with patch('app.config.settings.notion_retry_backoff', 0):
+            with pytest.raises(Exception):
+                await writer.create_notion_page("Page", paragraphs(3))
+        assert fake.requests == ["POST /v1/pages"]
+        
+        # Reads are safe to repeat.
+        fake = FakeNotion(fail_first=2, fail_status=500)
+        writer = make_writer(fake)
+        with patch('app.config.settings.notion_retry_backoff', 0):
+            with pytest.raises(Exception):
+                await writer.request(writer.client.pages.retrieve, page_id="missing")
+        assert fake.requests == ["GET /v1/pages/missing"] * 3
+    
+    def test_writes_retry_only_unapplied_failures(self):
+        # A timed-out or reset append may have been applied; a refused
+        # connection was not.
+        assert not is_retryable_notion_error(RequestTimeoutError(), idempotent=False)
+        assert not is_retryable_notion_error(httpx.ReadError("reset"), idempotent=False)
+        assert is_retryable_notion_error(httpx.ConnectError("refused"), idempotent=False)
+        assert is_retryable_notion_error(RequestTimeoutError())
+    
+    @pytest.mark.asyncio
+    async def test_honors_retry_after_on_rate_limit(self):
+        fake = FakeNotion(rate_limit=2)
+        writer = make_writer(fake)
+        
+        with patch('app.config.settings.notion_max_retries', 10):
+            result = await writer.create_notion_page("Page", paragraphs(350))
+        
+        assert fake.rate_limited > 0
+        assert len(fake.page_blocks(result["page_id"])) == 350
+    
+    @pytest.mark.asyncio
+    async def test_does_not_retry_client_errors(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        
+        with pytest.raises(Exception):
+            await writer.request(writer.client.pages.retrieve, page_id="missing")
+        assert fake.requests == ["GET /v1/pages/missing"]
+    
+    @pytest.mark.asyncio
+    async def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        
+        started = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        
+        assert time.monotonic() - started >= 0.19
+
+
+def page_text(fake: FakeNotion, page_id: str) -> list:
+    return [
+        block[block["type"]]["rich_text"][0]["text"]["content"]
+        for block in fake.page_blocks(page_id)
+    ]
+
+
+class TestNotionSync:
+    @pytest.mark.asyncio
+    async def test_unchanged_export_only_updates_title(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        markdown = "# Title\n\n" + paragraphs(300)
+        first = await writer.create_notion_page("Page", markdown)
+        fake.requests.clear()
+        
+        result = await writer.sync_notion_page("Page", markdown, first["page_id"], first["blocks"])
+        
+        assert fake.requests == [f"PATCH /v1/pages/{first['page_id']}"]
+        assert result["blocks"] == first["blocks"]
+    
+    @pytest.mark.asyncio
+    async def test_changed_blocks_are_patched_in_place(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        first = await writer.create_notion_page("Page", paragraphs(300))
+        fake.requests.clear()
+        
+        markdown = paragraphs(300).replace("Paragraph 150", "Edited 150")
+        result = await writer.sync_notion_page("Renamed", markdown, first["page_id"], first["blocks"])
+        
+        assert len(fake.requests) == 2
+        assert f"PATCH /v1/blocks/{first['blocks'][150]['id']}" in fake.requests
+        assert page_text(fake, first["page_id"])[150] == "Edited 150"
+        assert fake.pages[first["page_id"]]["properties"]["title"]["title"][0]["text"]["content"] == "Renamed"
+        assert [b["id"] for b in result["blocks"]] == [b["id"] for b in fake.page_blocks(first["page_id"])]
+    
+    @pytest.mark.asyncio
+    async def test_inserts_and_deletes_keep_order(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        first = await writer.create_notion_page("Page", "# Title\n\n- a\n- b\n- c\n\nEnd")
+        
+        markdown = "# Title\n\n- a\n## New\n- c\n- d\n\nEnd"
+        result = await writer.sync_notion_page("Page", markdown, first["page_id"], first["blocks"])
+        
+        assert page_text(fake, first["page_id"]) == ["Title", "a", "New", "c", "d", "End"]
+        assert [b["type"] for b in fake.page_blocks(first["page_id"])] == [
+            b["type"] for b in writer.markdown_to_notion_blocks(markdown)
+        ]
+        assert [b["id"] for b in result["blocks"]] == [b["id"] for b in fake.page_blocks(first["page_id"])]
+    
+    @pytest.mark.asyncio
+    async def test_change_at_top_rewrites_page(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        first = await writer.create_notion_page("Page", "# Title\n\nBody")
+        
+        result = await writer.sync_notion_page("Page", "Intro\n\n# Title\n\nBody", first["page_id"], first["blocks"])
+        
+        assert result["page_id"] == first["page_id"]
+        assert page_text(fake, first["page_id"]) == ["Intro", "Title", "Body"]
+    
+    @pytest.mark.asyncio
+    async def test_missing_page_is_recreated(self):
+        fake = FakeNotion()
+        writer = make_writer(fake)
+        first = await writer.create_notion_page("Page", "Body")
+        del fake.pages[first["page_id"]]
+        
+        result = await writer.sync_notion_page("Page", "Body", first["page_id"], first["blocks"])
+        
+        assert result["page_id"] != first["page_id"]
+        assert page_text(fake, result["page_id"]) == ["Body"]
+    
+    @pytest.mark.asyncio
+    async def test_export_reuses_stored_page(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'notion.db'}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        with SQLSession(engine) as db:
+            session = Session()
+            db.add(session)
+            db.add(Summary(session_id=session.id, title="Page", markdown="# Page\n\nOne"))
+            db.commit()
+            session_id = session.id
+        
+        fake = FakeNotion()
+        with patch('app.services.session_summary.NotionWriter', lambda *args: make_writer(fake)):
+            with SQLSession(engine) as db:
+                first = await export_to_notion(db, session_id, "Page", "# Page\n\nOne")
+                second = await export_to_notion(db, session_id, "Page", "# Page\n\nOne\n\nTwo")
+        
+        assert second == first
+        assert len(fake.pages) == 1
+        assert page_text(fake, first["page_id"]) == ["Page", "One", "Two"]
+        with SQLSession(engine) as db:
+            summary = db.get(Summary, session_id)
+            assert summary.notion_page_id == first["page_id"]
+            assert len(json.loads(summary.notion_blocks)) == 3
+        engine.dispose()
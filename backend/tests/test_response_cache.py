@@ -0,0 +1,164 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services import response_cache as cache_module
+from app.services.llm_service import LLMService
+from app.services.response_cache import ResponseCache, cache_key
+
+
+class TestResponseCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache.db"), ttl=3600, max_bytes=1000)
+        yield cache
+        cache.close()
+    
+    def test_key_depends_on_model_params_and_prompt(self):
+        messages = [{"role": "user", "content": "Summarize"}]
+        params = {"temperature": 0.3, "top_p": 1.0}
+        
+        key = cache_key("gpt-4o-mini", params, messages)
+        
+        assert key == cache_key("gpt-4o-mini", {"top_p": 1.0, "temperature": 0.3}, messages)
+        assert key != cache_key("gpt-4o", params, messages)
+        assert key != cache_key("gpt-4o-mini", {"temperature": 0.7, "top_p": 1.0}, messages)
+        assert key != cache_key("gpt-4o-mini", params, [{"role": "user", "content": "Other"}])
+    
+    def test_hit_and_miss_counters(self, cache):
+        assert cache.get("a") is None
+        cache.put("a", "model", "response", latency=2.0)
+        
+        assert cache.get("a") == "response"
+        assert cache.get("a") == "response"
+        
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (2, 1)
+        assert stats["saved_seconds"] == 4.0
+        assert stats["entries"] == 1
+    
+    def test_expired_entries_miss(self, cache):
+        cache.put("a", "model", "response", latency=1.0)
+        
+        with patch("app.services.response_cache.time.time", return_value=cache.stats()["ttl"] + 1e10):
+            assert cache.get("a") is None
+        
+        assert cache.stats()["entries"] == 0
+    
+    def test_least_recently_used_evicted_over_size(self, cache):
+        cache.put("a", "model", "x" * 400, latency=1.0)
+        cache.put("b", "model", "y" * 400, latency=1.0)
+        cache.get("a")
+        cache.put("c", "model", "z" * 400, latency=1.0)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "x" * 400
+        assert cache.get("c") == "z" * 400
+        assert cache.stats()["bytes"] <= 1000
+    
+    def test_running_total_follows_replaces_and_evictions(self, cache):
+        cache.put("a", "model", "x" * 300, latency=1.0)
+        cache.put("a", "model", "x" * 100, latency=1.0)
+        cache.put("b", "model", "y" * 500, latency=1.0)
+        assert cache.total_bytes == cache.stats()["bytes"] == 600
+        
+        cache.put("c", "model", "z" * 600, latency=1.0)
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+        assert cache.total_bytes == cache.stats()["bytes"] == 600
+        
+        cache.clear()
+        assert cache.total_bytes == 0
+    
+    def test_stats_counters_match_stored_rows(self, cache):
+        cache.put("a", "model", "x" * 300, latency=1.0)
+        cache.put("a", "model", "x" * 100, latency=1.0)
+        cache.put("b", "model", "y" * 500, latency=1.0)
+        cache.put("c", "model", "z" * 600, latency=1.0)
+        
+        with patch.object(cache, "connection", wraps=cache.connection) as connection:
+            stats = cache.stats()
+        connection.execute.assert_not_called()
+        assert (stats["entries"], stats["bytes"]) == cache._stored_totals() == (1, 600)
+        
+        cache.clear()
+        assert cache.stats()["entries"] == 0
+    
+    def test_expired_entries_swept_periodically(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "sweep.db"), ttl=30, max_bytes=1000, sweep_interval=60)
+        try:
+            with patch("app.services.response_cache.time.time", return_value=1000.0):
+                cache.put("old", "model", "response", latency=1.0)
+            # "old" has expired, but the last sweep was too recent.
+            with patch("app.services.response_cache.time.time", return_value=1040.0):
+                cache.put("new", "model", "response", latency=1.0)
+            assert cache.stats()["entries"] == 2
+            
+            with patch("app.services.response_cache.time.time", return_value=1065.0):
+                cache.put("newer", "model", "response", latency=1.0)
+                assert cache.stats()["entries"] == 2
+                assert cache.get("old") is None
+                assert cache.get("new") == "response"
+            assert cache.total_bytes == cache.stats()["bytes"]
+        finally:
+            cache.close()
+    
+    def test_entries_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        first = ResponseCache(path, ttl=3600, max_bytes=1000)
+        first.put("a", "model", "response", latency=1.0)
+        first.close()
+        
+        second = ResponseCache(path, ttl=3600, max_bytes=1000)
+        try:
+            assert second.get("a") == "response"
+        finally:
+            second.close()
+
+
+class TestCachedCompletion:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        with patch.object(cache_module, "_response_cache", ResponseCache(str(tmp_path / "cache.db"), 3600, 10000)) as cache:
+            yield cache
+            cache.close()
+    
+    def mock_post(self, llm_service: LLMService, content: str):
+        mock_response = AsyncMock()
+        mock_response.json = MagicMock(return_value={"choices": [{"message": {"content": content}}]})
+        mock_response.raise_for_status = MagicMock()
+        return patch.object(llm_service.client, 'post', return_value=mock_response)
+    
+    @pytest.mark.asyncio
+    async def test_opted_in_completion_is_reused(self, cache):
+        llm_service = LLMService()
+        messages = [{"role": "user", "content": "Summarize this"}]
+        
+        with self.mock_post(llm_service, "Summary") as mock_post:
+            first = await llm_service.get_completion(messages, temperature=0.3, cache=True)
+            second = await llm_service.get_completion(messages, temperature=0.3, cache=True)
+        
+        assert first == second == "Summary"
+        assert mock_post.call_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    @pytest.mark.asyncio
+    async def test_completion_is_not_cached_by_default(self, cache):
+        llm_service = LLMService()
+        messages = [{"role": "user", "content": "Hello"}]
+        
+        with self.mock_post(llm_service, "Hi") as mock_post:
+            await llm_service.get_completion(messages)
+            await llm_service.get_completion(messages)
+        
+        assert mock_post.call_count == 2
+        assert cache.stats()["entries"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_failed_completion_is_not_cached(self, cache):
+        llm_service = LLMService()
+        messages = [{"role": "user", "content": "Summarize this"}]
+        
+        with patch.object(llm_service.client, 'post', side_effect=RuntimeError("down")):
+            with pytest.raises(RuntimeError):
+                await llm_service.get_completion(messages, cache=True)
+        
+        assert cache.stats()["entries"] == 0
@@ -0,0 +1,185 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session as SQLSession, create_engine, SQLModel, delete
+from sqlmodel.pool import StaticPool
+from sqlalchemy import text
+
+from app.main import app
+from app.database import get_session
+from app.models import Session, Message
+from app.search import build_match_query, ensure_search_index, rebuild_search_index, search_messages
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    assert ensure_search_index(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with SQLSession(engine) as session:
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: SQLSession):
+    app.dependency_overrides[get_session] = lambda: session
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def add_session(db: SQLSession, title: str, contents):
+    chat = Session(title=title)
+    db.add(chat)
+    messages = [
+        Message(session_id=chat.id, role="user" if i % 2 == 0 else "assistant", content=content)
+        for i, content in enumerate(contents)
+    ]
+    db.add_all(messages)
+    db.commit()
+    return chat, messages
+
+
+class TestMatchQuery:
+    def test_words_are_quoted_and_last_is_prefix(self):
+        assert build_match_query("sqlite wal") == '"sqlite" "wal"*'
+    
+    def test_operators_and_punctuation_are_literal(self):
+        assert build_match_query('NOT "drop" OR (x') == '"NOT" "drop" "OR" "x"*'
+    
+    def test_no_words(self):
+        assert build_match_query("  -- ") is None
+
+
+class TestSearchIndex:
+    def test_index_follows_inserts_updates_and_deletes(self, session: SQLSession):
+        chat, messages = add_session(session, "Index", ["the quick brown fox"])
+        assert [r["id"] for r in search_messages(session, "fox", 10)] == [messages[0].id]
+        
+        messages[0].content = "the lazy dog"
+        session.add(messages[0])
+        session.commit()
+        assert search_messages(session, "fox", 10) == []
+        assert len(search_messages(session, "lazy", 10)) == 1
+        
+        session.exec(delete(Message).where(Message.session_id == chat.id))
+        session.commit()
+        assert search_messages(session, "lazy", 10) == []
+    
+    def test_existing_messages_are_backfilled(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        with SQLSession(engine) as db:
+            add_session(db, "Old", ["written before the index existed"])
+        
+        ensure_search_index(engine)
+        
+        with SQLSession(engine) as db:
+            assert len(search_messages(db, "index existed", 10)) == 1
+    
+    def test_rebuild_restores_a_stale_index(self, engine, session: SQLSession):
+        add_session(session, "Stale", ["postgres migration notes"])
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('delete-all')"))
+        assert search_messages(session, "migration", 10) == []
+        
+        assert rebuild_search_index(engine) == 1
+        assert len(search_messages(session, "migration", 10)) == 1
+    
+    def test_index_survives_renumbered_rowids(self, engine, session: SQLSession):
+        # What a VACUUM may do to a table without an INTEGER PRIMARY KEY.
+        chat, messages = add_session(session, "Vacuum", ["alpha notes", "beta notes", "gamma notes"])
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE message SET rowid = 1000 - rowid"))
+        
+        assert [r["id"] for r in search_messages(session, "beta", 10)] == [messages[1].id]
+        
+        session.delete(messages[1])
+        session.commit()
+        assert search_messages(session, "beta", 10) == []
+        assert len(search_messages(session, "notes", 10)) == 2
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO message_fts(message_fts) VALUES ('integrity-check')"))
+    
+    def test_rowid_keyed_index_is_replaced(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE message_fts USING fts5(content, content='message', content_rowid='rowid')"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER message_fts_insert AFTER INSERT ON message BEGIN "
+                "INSERT INTO message_fts(rowid, content) VALUES (new.rowid, new.content); END"
+            ))
+        with SQLSession(engine) as db:
+            add_session(db, "Old", ["indexed by rowid"])
+        
+        assert ensure_search_index(engine)
+        
+        with SQLSession(engine) as db:
+            add_session(db, "New", ["indexed by key"])
+            assert len(search_messages(db, "indexed", 10)) == 2
+
+
+class TestSearchEndpoint:
+    def test_ranked_results_with_snippets(self, client: TestClient, session: SQLSession):
+        chat, _ = add_session(session, "Databases", [
+            "sqlite sqlite sqlite is everywhere",
+            "we mostly talked about caching, and sqlite once",
+        ])
+        add_session(session, "Other", ["nothing relevant here"])
+        
+        response = client.get("/api/search", params={"q": "sqlite"})
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 2
+        assert results[0]["snippet"].startswith("<mark>sqlite</mark> <mark>sqlite</mark>")
+        assert results[0]["score"] <= results[1]["score"]
+        assert {r["session_id"] for r in results} == {chat.id}
+        assert results[0]["session_title"] == "Databases"
+        assert response.json()["next_offset"] is None
+    
+    def test_prefix_and_diacritics(self, client: TestClient, session: SQLSession):
+        add_session(session, "Cafe", ["meet at the café for configuration review"])
+        
+        assert len(client.get("/api/search", params={"q": "cafe config"}).json()["results"]) == 1
+    
+    def test_pagination(self, client: TestClient, session: SQLSession):
+        add_session(session, "Many", [f"deploy step {i}" for i in range(5)])
+        
+        first = client.get("/api/search", params={"q": "deploy", "limit": 2}).json()
+        second = client.get("/api/search", params={"q": "deploy", "limit": 2, "offset": first["next_offset"]}).json()
+        last = client.get("/api/search", params={"q": "deploy", "limit": 2, "offset": second["next_offset"]}).json()
+        
+        ids = [r["message_id"] for page in (first, second, last) for r in page["results"]]
+        assert len(ids) == len(set(ids)) == 5
+        assert last["next_offset"] is None
+    
+    def test_filter_by_session(self, client: TestClient, session: SQLSession):
+        chat, _ = add_session(session, "One", ["release checklist"])
+        add_session(session, "Two", ["release notes"])
+        
+        results = client.get("/api/search", params={"q": "release", "session_id": chat.id}).json()["results"]
+        
+        assert [r["session_id"] for r in results] == [chat.id]
+    
+    def test_query_syntax_is_not_an_error(self, client: TestClient, session: SQLSession):
+        add_session(session, "Syntax", ["quote \"this\" please"])
+        
+        response = client.get("/api/search", params={"q": '"this" (please*'})
+        
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 1
+    
+    def test_empty_query_rejected(self, client: TestClient):
+        assert client.get("/api/search", params={"q": ""}).status_code == 422
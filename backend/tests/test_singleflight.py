@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from sqlmodel import Session as SQLSession, SQLModel, create_engine, select
+
+from app.models import Session, Message, Summary
+from app.services.singleflight import SingleFlight
+from app.services.session_summary import refresh_summary
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        calls = []
+        
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+        
+        results = await asyncio.gather(*[flights.do("key", work, 21) for _ in range(5)])
+        
+        assert results == [42] * 5
+        assert calls == [21]
+        assert not flights.in_flight("key")
+        
+        assert await flights.do("key", work, 1) == 2
+        assert calls == [21, 1]
+    
+    @pytest.mark.asyncio
+    async def test_exception_is_shared_and_key_released(self):
+        flights = SingleFlight()
+        
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        
+        results = await asyncio.gather(
+            flights.do("key", fail), flights.do("key", fail),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(r, ValueError) for r in results)
+        assert not flights.in_flight("key")
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        flights = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        first = asyncio.ensure_future(flights.do("key", work))
+        second = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        
+        assert await second == "done"
+
+
+class TestSummaryCoalescing:
+    @pytest.mark.asyncio
+    async def test_concurrent_refresh_summarizes_once(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'flight.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        SQLModel.metadata.create_all(engine)
+        with SQLSession(engine) as db:
+            session = Session()
+            db.add(session)
+            db.add(Message(session_id=session.id, role="user", content="Hello"))
+            db.commit()
+            session_id = session.id
+        
+        async def slow_summarize(*args):
+            await asyncio.sleep(0.05)
+            return "Title", "# Title"
+        
+        with patch('app.services.summarizer.SummarizerService.summarize_session', side_effect=slow_summarize) as mock_summarize:
+            with SQLSession(engine) as db1, SQLSession(engine) as db2:
+                results = await asyncio.gather(
+                    refresh_summary(db1, session_id),
+                    refresh_summary(db2, session_id),
+                )
+        
+        assert mock_summarize.call_count == 1
+        assert results[0] == results[1] == {
+            "title": "Title", "markdown": "# Title", "partial": False, "failed_chunks": []
+        }
+        with SQLSession(engine) as db:
+            assert len(db.exec(select(Summary)).all()) == 1
+        engine.dispose()
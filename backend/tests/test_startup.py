@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+from unittest.mock import patch
+
+import app.services
+from app import json_utils
+from app.config import Settings
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestLazyImports:
+    def test_app_import_defers_heavy_dependencies(self):
+        # A fresh interpreter, since this one has loaded them already.
+        code = (
+            "import sys, app.main; "
+            "print(','.join(m for m in ('tiktoken', 'notion_client') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_DIR,
+            env={**os.environ, "OPENAI_API_KEY": "test"},
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        assert result.stdout.strip() == ""
+    
+    def test_services_exports_resolve(self):
+        from app.services import SummarizationError
+        from app.services.summarizer import SummarizationError as direct
+        
+        assert SummarizationError is direct
+        for name in app.services.__all__:
+            assert getattr(app.services, name).__name__ == name
+    
+    def test_unknown_service_is_an_attribute_error(self):
+        with pytest.raises(AttributeError):
+            app.services.NoSuchService
+
+
+class TestJsonBackend:
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValidationError):
+            Settings(openai_api_key="test", json_backend="ojson")
+    
+    def test_explicit_orjson_requires_it_installed(self):
+        with patch.object(json_utils, "orjson", None):
+            with pytest.raises(RuntimeError):
+                json_utils._select_backend("orjson")
+            assert json_utils._select_backend("auto") == "json"
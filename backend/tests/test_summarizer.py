@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from app.services.summarizer import SummarizerService
+import asyncio
+import httpx
+from app.services.summarizer import SummarizerService, SummarizationError
 
 
 class TestSummarizerService:
@@ -28,6 +30,19 @@ class TestSummarizerService:
             all_messages.extend(chunk)
         assert len(all_messages) == len(messages)
     
+    def test_chunk_messages_uses_stored_token_counts(self, summarizer):
+        messages = [
+            {"role": "user", "content": "a", "token_count": 40},
+            {"role": "assistant", "content": "b", "token_count": 40},
+            {"role": "user", "content": "c", "token_count": 40},
+        ]
+        
+        with patch('app.services.llm_service.count_tokens') as mock_count:
+            chunks = summarizer.chunk_messages(messages, chunk_size=50)
+        
+        mock_count.assert_not_called()
+        assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+    
     def test_format_chunk_for_summary(self, summarizer):
         messages = [
             {"role": "user", "content": "Hello"},
@@ -83,6 +98,17 @@ class TestSummarizerService:
             assert result == "Summary of the chunk"
             mock_completion.assert_called_once()
     
+    @pytest.mark.asyncio
+    async def test_summary_prompts_opt_into_cache(self, summarizer):
+        with patch.object(summarizer.llm_service, 'get_completion') as mock_completion:
+            mock_completion.return_value = "Summary"
+            
+            await summarizer.summarize_chunk("User: Test")
+            await summarizer.merge_summaries(["a", "b"])
+            await summarizer.combine_summaries(["a"], "Title")
+        
+        assert all(call.kwargs["cache"] is True for call in mock_completion.call_args_list)
+    
     @pytest.mark.asyncio
     async def test_combine_summaries(self, summarizer):
         with patch.object(summarizer.llm_service, 'get_completion') as mock_completion:
@@ -117,4 +143,134 @@ class TestSummarizerService:
         
         assert title == "Empty Session"
         assert "# Empty Session" in markdown
-        assert "N/A" in markdown
\ No newline at end of file
+        assert "N/A" in markdown
+    
+    @pytest.mark.asyncio
+    async def test_map_chunks_runs_concurrently_and_keeps_order(self, summarizer):
+        active = 0
+        peak = 0
+        
+        async def fake_summarize(chunk_text):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return f"summary of {chunk_text}"
+        
+        chunks = [[{"role": "user", "content": f"chunk {i}"}] for i in range(10)]
+        with patch('app.config.settings.summary_concurrency', 3):
+            summarizer = SummarizerService()
+        
+        with patch.object(summarizer, 'summarize_chunk', side_effect=fake_summarize):
+            summaries = await summarizer.map_chunks(chunks)
+        
+        assert summaries == [f"summary of User: chunk {i}" for i in range(10)]
+        assert peak == 3
+    
+    @pytest.mark.asyncio
+    async def test_map_chunks_retries_transient_errors(self, summarizer):
+        attempts = []
+        
+        async def flaky_summarize(chunk_text):
+            attempts.append(chunk_text)
+            if len(attempts) == 1:
+                raise httpx.ConnectError("connection reset")
+            return "ok"
+        
+        chunks = [[{"role": "user", "content": "hello"}]]
+        with patch('app.config.settings.summary_retry_backoff', 0):
+            with patch.object(summarizer, 'summarize_chunk', side_effect=flaky_summarize):
+                summaries = await summarizer.map_chunks(chunks)
+        
+        assert summaries == ["ok"]
+        assert len(attempts) == 2
+    
+    @pytest.mark.asyncio
+    async def test_map_chunks_reports_partial_failure(self, summarizer):
+        async def failing_summarize(chunk_text):
+            if "bad" in chunk_text:
+                raise ValueError("malformed response")
+            return chunk_text
+        
+        chunks = [
+            [{"role": "user", "content": "good 1"}],
+            [{"role": "user", "content": "bad"}],
+            [{"role": "user", "content": "good 2"}],
+        ]
+        with patch.object(summarizer, 'summarize_chunk', side_effect=failing_summarize):
+            summaries = await summarizer.map_chunks(chunks)
+        
+        assert summaries == ["User: good 1", "User: good 2"]
+        assert summarizer.failed_chunks == [1]
+        
+        with patch.object(summarizer, 'summarize_chunk', side_effect=ValueError("down")):
+            with pytest.raises(SummarizationError) as exc_info:
+                await summarizer.map_chunks(chunks)
+        assert exc_info.value.failed_chunks == [0, 1, 2]
+
+    
+    @pytest.mark.asyncio
+    async def test_reduce_summaries_merges_until_within_budget(self, summarizer):
+        merge_calls = []
+        
+        async def fake_merge(group):
+            merge_calls.append(len(group))
+            return "merged"
+        
+        summaries = ["word " * 40 for _ in range(8)]
+        with patch('app.config.settings.summary_reduce_budget', 100):
+            with patch.object(summarizer, 'merge_summaries', side_effect=fake_merge):
+                reduced = await summarizer.reduce_summaries(summaries)
+        
+        assert reduced == ["merged"] * 4
+        assert merge_calls == [2, 2, 2, 2]
+    
+    @pytest.mark.asyncio
+    async def test_reduce_summaries_noop_within_budget(self, summarizer):
+        with patch.object(summarizer, 'merge_summaries') as mock_merge:
+            reduced = await summarizer.reduce_summaries(["short one", "short two"])
+        
+        assert reduced == ["short one", "short two"]
+        mock_merge.assert_not_called()
+
+    
+    @pytest.mark.asyncio
+    async def test_summarize_session_reuses_previous_chunks(self, summarizer):
+        messages = [
+            {"id": f"m{i}", "role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}", "token_count": 10}
+            for i in range(25)
+        ]
+        previous_chunks = [
+            {"first_message_id": "m0", "last_message_id": "m9", "message_count": 10, "summary": "first"},
+            {"first_message_id": "m10", "last_message_id": "m19", "message_count": 10, "summary": "second"},
+            {"first_message_id": "m20", "last_message_id": "m21", "message_count": 2, "summary": "partial"},
+        ]
+        
+        mapped = []
+        
+        async def fake_summarize(chunk_text):
+            mapped.append(chunk_text)
+            return "tail"
+        
+        with patch.object(summarizer, 'summarize_chunk', side_effect=fake_summarize):
+            with patch.object(summarizer, 'combine_summaries', return_value="# Done") as mock_combine:
+                title, markdown = await summarizer.summarize_session(messages, previous_chunks)
+        
+        assert len(mapped) == 1
+        assert "message 20" in mapped[0] and "message 24" in mapped[0]
+        assert "message 19" not in mapped[0]
+        assert mock_combine.call_args[0][0] == ["first", "second", "tail"]
+        assert [c["summary"] for c in summarizer.chunks] == ["first", "second", "tail"]
+        assert summarizer.chunks[-1]["first_message_id"] == "m20"
+        assert summarizer.chunks[-1]["message_count"] == 5
+        assert title == "Done"
+    
+    def test_reusable_chunks_discards_mismatched_history(self, summarizer):
+        messages = [{"id": f"m{i}", "role": "user", "content": "x"} for i in range(5)]
+        previous_chunks = [
+            {"first_message_id": "m0", "last_message_id": "gone", "message_count": 3, "summary": "a"},
+            {"first_message_id": "m3", "last_message_id": "m4", "message_count": 2, "summary": "b"},
+        ]
+        
+        assert summarizer.reusable_chunks(messages, previous_chunks) == []
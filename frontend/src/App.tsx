@@ -12,12 +12,16 @@ function App() {
   const [sessionTitle, setSessionTitle] = useState<string>('New Chat');
   const [messages, setMessages] = useState<Message[]>([]);
   const [sessions, setSessions] = useState<Session[]>([]);
+  const [olderSessionsCursor, setOlderSessionsCursor] = useState<string | null>(null);
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState<string | null>(null);
   const [isStreaming, setIsStreaming] = useState(false);
   const [currentStreamContent, setCurrentStreamContent] = useState('');
   const [error, setError] = useState<string | null>(null);
   const [success, setSuccess] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const sseClient = useRef<SSEClient>(new SSEClient());
+  const keepScrollPosition = useRef(false);
+  const loadingMoreSessions = useRef(false);
 
   useEffect(() => {
     initializeSession();
@@ -28,6 +32,11 @@ function App() {
   }, []);
 
   useEffect(() => {
+    // Prepending earlier history shouldn't jump back to the bottom.
+    if (keepScrollPosition.current) {
+      keepScrollPosition.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages, currentStreamContent]);
 
@@ -37,13 +46,62 @@ function App() {
 
   const loadSessions = async () => {
     try {
-      const { sessions } = await sessionApi.list();
+      const { sessions, older_cursor } = await sessionApi.list();
       setSessions(sessions);
+      setOlderSessionsCursor(older_cursor);
+    } catch (error) {
+      console.error('Failed to load sessions:', error);
+    }
+  };
+
+  const loadMoreSessions = async () => {
+    // Scroll events keep firing near the bottom; one page at a time, or
+    // several requests go out with the same cursor.
+    if (!olderSessionsCursor || loadingMoreSessions.current) return;
+    loadingMoreSessions.current = true;
+    try {
+      const { sessions, older_cursor } = await sessionApi.list({ before: olderSessionsCursor });
+      setSessions(prev => {
+        const loaded = new Set(prev.map(session => session.id));
+        return [...prev, ...sessions.filter(session => !loaded.has(session.id))];
+      });
+      setOlderSessionsCursor(older_cursor);
     } catch (error) {
       console.error('Failed to load sessions:', error);
+    } finally {
+      loadingMoreSessions.current = false;
+    }
+  };
+
+  const loadMessages = async (id: string) => {
+    const { messages, older_cursor } = await sessionApi.getMessages(id);
+    setMessages(messages);
+    setOlderMessagesCursor(older_cursor);
+  };
+
+  const loadEarlierMessages = async () => {
+    if (!sessionId || !olderMessagesCursor) return;
+    try {
+      const { messages, older_cursor } = await sessionApi.getMessages(sessionId, {
+        before: olderMessagesCursor,
+      });
+      keepScrollPosition.current = true;
+      setMessages(prev => [...messages, ...prev]);
+      setOlderMessagesCursor(older_cursor);
+    } catch (error) {
+      console.error('Failed to load earlier messages:', error);
     }
   };
 
+  const refreshLatestMessages = async (id: string) => {
+    // Replace the latest page but keep any earlier history already loaded.
+    const { messages: latest } = await sessionApi.getMessages(id);
+    setMessages(prev => {
+      const start = latest.length ? prev.findIndex(m => m.id === latest[0].id) : -1;
+      return start > 0 ? [...prev.slice(0, start), ...latest] : latest;
+    });
+  };
+
   const initializeSession = async () => {
     try {
       const storedSessionId = localStorage.getItem('currentSessionId');
@@ -53,8 +111,7 @@ function App() {
         setSessionId(storedSessionId);
         setSessionTitle(session.title || 'New Chat');
         
-        const { messages } = await sessionApi.getMessages(storedSessionId);
-        setMessages(messages);
+        await loadMessages(storedSessionId);
       } else {
         await createNewSession();
       }
@@ -70,6 +127,7 @@ function App() {
       setSessionId(id);
       setSessionTitle('New Chat');
       setMessages([]);
+      setOlderMessagesCursor(null);
       localStorage.setItem('currentSessionId', id);
       await loadSessions();
     } catch (error) {
@@ -92,8 +150,7 @@ function App() {
       setSessionTitle(session.title || 'New Chat');
       localStorage.setItem('currentSessionId', selectedSessionId);
       
-      const { messages } = await sessionApi.getMessages(selectedSessionId);
-      setMessages(messages);
+      await loadMessages(selectedSessionId);
       setCurrentStreamContent('');
       setError(null);
       setSuccess(null);
@@ -160,8 +217,7 @@ function App() {
           setCurrentStreamContent('');
           setIsStreaming(false);
           
-          const { messages } = await sessionApi.getMessages(sessionId);
-          setMessages(messages);
+          await refreshLatestMessages(sessionId);
           await loadSessions();
         },
       });
@@ -182,6 +238,7 @@ function App() {
         role: 'assistant',
         content: currentStreamContent,
         created_at: new Date().toISOString(),
+        truncated: true,
       };
       setMessages(prev => [...prev, assistantMessage]);
       setCurrentStreamContent('');
@@ -194,7 +251,9 @@ function App() {
     try {
       const summary = await sessionApi.summarize(sessionId);
       setSessionTitle(summary.title);
-      setSuccess('Session summarized successfully');
+      setSuccess(summary.partial
+        ? 'Session summarized, but some parts failed and were left out; summarize again to retry them'
+        : 'Session summarized successfully');
       setTimeout(() => setSuccess(null), 3000);
       await loadSessions();
     } catch (error) {
@@ -208,7 +267,8 @@ function App() {
 
     try {
       const notion = await sessionApi.saveToNotion(sessionId);
-      setSuccess(`Saved to Notion! <a href="${notion.url}" target="_blank">View page</a>`);
+      const partial = notion.partial ? ' Some parts of the summary failed and were left out.' : '';
+      setSuccess(`Saved to Notion! <a href="${notion.url}" target="_blank">View page</a>${partial}`);
       setTimeout(() => setSuccess(null), 5000);
     } catch (error: any) {
       console.error('Failed to save to Notion:', error);
@@ -225,6 +285,8 @@ function App() {
         sessions={sessions}
         onRefresh={loadSessions}
         onDeleteSession={handleDeleteSession}
+        hasMore={olderSessionsCursor !== null}
+        onLoadMore={loadMoreSessions}
       />
       
       <div className="main-content">
@@ -261,11 +323,17 @@ function App() {
 
         <main className="chat-container">
         <div className="messages-list">
+          {olderMessagesCursor && (
+            <button onClick={loadEarlierMessages} className="load-earlier-button">
+              Load earlier messages
+            </button>
+          )}
           {messages.map((message) => (
             <ChatMessage
               key={message.id}
               role={message.role}
               content={message.content}
+              truncated={message.truncated}
             />
           ))}
           {isStreaming && currentStreamContent && (
@@ -6,12 +6,14 @@ interface ChatMessageProps {
   role: 'user' | 'assistant';
   content: string;
   isStreaming?: boolean;
+  truncated?: boolean;
 }
 
 export const ChatMessage: React.FC<ChatMessageProps> = ({ 
   role, 
   content, 
-  isStreaming = false 
+  isStreaming = false,
+  truncated = false
 }) => {
   return (
     <div className={`chat-message ${role}`}>
@@ -25,6 +27,7 @@ export const ChatMessage: React.FC<ChatMessageProps> = ({
           <p>{content}</p>
         )}
         {isStreaming && <span className="streaming-indicator">●</span>}
+        {truncated && <div className="truncated-note">Response stopped early</div>}
       </div>
     </div>
   );
@@ -1,6 +1,19 @@
 import { useState, useEffect } from 'react';
+import type { UIEvent } from 'react';
 import './SessionSidebar.css';
-import type { Session } from '../services/api';
+import { searchApi } from '../services/api';
+import type { Session, SearchResult } from '../services/api';
+
+// Renders a search snippet, turning the server's <mark> tags into elements
+// without interpreting anything else in the message as HTML.
+function Snippet({ text }: { text: string }) {
+  const parts = text.split(/<mark>|<\/mark>/);
+  return (
+    <>
+      {parts.map((part, i) => (i % 2 === 1 ? <mark key={i}>{part}</mark> : part))}
+    </>
+  );
+}
 
 interface SessionSidebarProps {
   currentSessionId: string | null;
@@ -9,6 +22,8 @@ interface SessionSidebarProps {
   sessions: Session[];
   onRefresh: () => void;
   onDeleteSession: (sessionId: string) => void;
+  hasMore?: boolean;
+  onLoadMore?: () => void;
 }
 
 export function SessionSidebar({
@@ -17,11 +32,63 @@ export function SessionSidebar({
   onNewChat,
   sessions,
   onRefresh,
-  onDeleteSession
+  onDeleteSession,
+  hasMore = false,
+  onLoadMore
 }: SessionSidebarProps) {
   const [isCollapsed, setIsCollapsed] = useState(false);
   const [hoveredSessionId, setHoveredSessionId] = useState<string | null>(null);
   const [confirmDelete, setConfirmDelete] = useState<string | null>(null);
+  const [query, setQuery] = useState('');
+  const [results, setResults] = useState<SearchResult[] | null>(null);
+  const [nextOffset, setNextOffset] = useState<number | null>(null);
+
+  // Searches once typing pauses; clearing the box goes back to the list.
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setResults(null);
+      setNextOffset(null);
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await searchApi.search(q);
+        if (!cancelled) {
+          setResults(data.results);
+          setNextOffset(data.next_offset);
+        }
+      } catch (error) {
+        console.error('Search failed:', error);
+      }
+    }, 250);
+
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query]);
+
+  const loadMoreResults = async () => {
+    if (nextOffset === null) return;
+    try {
+      const data = await searchApi.search(query.trim(), { offset: nextOffset });
+      setResults(prev => [...(prev || []), ...data.results]);
+      setNextOffset(data.next_offset);
+    } catch (error) {
+      console.error('Search failed:', error);
+    }
+  };
+
+  // Older sessions are fetched a page at a time as the list nears its end.
+  const handleScroll = (e: UIEvent<HTMLDivElement>) => {
+    const list = e.currentTarget;
+    if (hasMore && list.scrollHeight - list.scrollTop - list.clientHeight < 100) {
+      onLoadMore?.();
+    }
+  };
 
   const formatDate = (dateString: string) => {
     const date = new Date(dateString);
@@ -109,7 +176,51 @@ export function SessionSidebar({
       </div>
 
       {!isCollapsed && (
-        <div className="sessions-list">
+        <div className="sidebar-search">
+          <input
+            type="search"
+            placeholder="Search conversations"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+          />
+        </div>
+      )}
+
+      {!isCollapsed && results !== null && (
+        <div className="sessions-list search-results">
+          {results.length === 0 ? (
+            <div className="no-sessions">
+              <p>No matches</p>
+            </div>
+          ) : (
+            results.map(result => (
+              <button
+                key={result.message_id}
+                className={`search-result ${result.session_id === currentSessionId ? 'active' : ''}`}
+                onClick={() => onSessionSelect(result.session_id)}
+              >
+                <div className="session-title">
+                  {result.session_title || 'New Chat'}
+                </div>
+                <div className="search-snippet">
+                  <Snippet text={result.snippet} />
+                </div>
+                <div className="session-time">
+                  {result.role === 'user' ? 'You' : 'Assistant'} · {formatDate(result.created_at)}
+                </div>
+              </button>
+            ))
+          )}
+          {nextOffset !== null && (
+            <button className="load-more-button" onClick={loadMoreResults}>
+              More results
+            </button>
+          )}
+        </div>
+      )}
+
+      {!isCollapsed && results === null && (
+        <div className="sessions-list" onScroll={handleScroll}>
           {groupedSessions.length === 0 ? (
             <div className="no-sessions">
               <p>No conversations yet</p>
@@ -172,6 +283,11 @@ export function SessionSidebar({
               </div>
             ))
           )}
+          {hasMore && (
+            <button className="load-more-button" onClick={onLoadMore}>
+              Load more
+            </button>
+          )}
         </div>
       )}
 
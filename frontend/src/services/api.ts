@@ -20,21 +20,52 @@ export interface Message {
   role: 'user' | 'assistant';
   content: string;
   created_at: string;
+  truncated?: boolean;
 }
 
 export interface Summary {
   title: string;
   markdown: string;
+  // Set when some parts of the session could not be summarized; the next
+  // request retries them.
+  partial: boolean;
+  failed_chunks: number[];
+}
+
+export interface PageParams {
+  limit?: number;
+  before?: string;
+  after?: string;
+}
+
+// Cursor pagination: pass older_cursor as `before` for the previous page,
+// newer_cursor as `after` for the next one. Null means no more pages.
+export interface PageCursors {
+  older_cursor: string | null;
+  newer_cursor: string | null;
+}
+
+export interface SearchResult {
+  message_id: string;
+  session_id: string;
+  session_title: string | null;
+  role: 'user' | 'assistant';
+  created_at: string;
+  // Matched terms are wrapped in <mark>...</mark>.
+  snippet: string;
+  score: number;
 }
 
 export interface NotionPage {
   page_id: string;
   url: string;
+  partial: boolean;
+  failed_chunks: number[];
 }
 
 export const sessionApi = {
-  list: async (): Promise<{ sessions: Session[] }> => {
-    const response = await api.get('/sessions');
+  list: async (params: PageParams = {}): Promise<{ sessions: Session[] } & PageCursors> => {
+    const response = await api.get('/sessions', { params });
     return response.data;
   },
 
@@ -48,8 +79,11 @@ export const sessionApi = {
     return response.data;
   },
 
-  getMessages: async (sessionId: string): Promise<{ messages: Message[] }> => {
-    const response = await api.get(`/sessions/${sessionId}/messages`);
+  getMessages: async (
+    sessionId: string,
+    params: PageParams = {}
+  ): Promise<{ messages: Message[] } & PageCursors> => {
+    const response = await api.get(`/sessions/${sessionId}/messages`, { params });
     return response.data;
   },
 
@@ -69,6 +103,16 @@ export const sessionApi = {
   },
 };
 
+export const searchApi = {
+  search: async (
+    q: string,
+    params: { limit?: number; offset?: number; session_id?: string } = {}
+  ): Promise<{ results: SearchResult[]; next_offset: number | null }> => {
+    const response = await api.get('/search', { params: { q, ...params } });
+    return response.data;
+  },
+};
+
 export const healthApi = {
   check: async (): Promise<{ ok: boolean }> => {
     const response = await api.get('/healthz');